@@ -1,169 +1,1715 @@
 import os
+import sys
+import time
+import signal
+import cProfile
+import argparse
+import html
+import mmap
+import hashlib
+import pickle
+import json
+import zlib
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from collections import namedtuple
+from contextlib import closing
+import numpy as np
 import pandas as pd
 from pathlib import Path
 import re
-from bs4 import BeautifulSoup
-import matplotlib.pyplot as plt
-import seaborn as sns
 import base64
 from io import BytesIO
+from benchmark_runner import MANIFEST_FILE, run_benchmarks, load_invocation_record
+from run_statistics import repeated_run_statistics, run_opcode_totals
+from cost_model import build_model_system, fit_cost_model, cost_model_table, subtract_baseline
+from results_store import (RESULTS_DB_FILE, open_results_db, store_run, list_runs, opcode_history,
+                           aggregate_results, aggregates_frame, load_run_aggregates, resolve_run_id)
+from report_sections import extract_report_sections, summarize_sections
+from compare import (DEFAULT_COST_THRESHOLD, DEFAULT_GAS_THRESHOLD, compare_opcodes, compare_benchmarks,
+                     print_comparison, count_regressions)
+from scaling import fit_scaling, complexity_curve
+from profiling import StageTimer
+from watcher import DirectoryWatcher
+from opcodes import find_opcode_catalogue, load_opcode_registry, code_array, append_code
+from static_gas import DEFAULT_LOOP_ITERATIONS, STATIC_ESTIMATE_FILE, estimate_gas, print_estimates
+from flamegraph import (FLAMEGRAPH_KINDS, load_profile, average_profiles, export_flamegraphs, diff_profiles,
+                        print_profile_diff, write_diff_folded, render_diff_flamegraph)
 
-def parse_execution_trace(html_file):
-    """Parse the Full Execution Trace section from the HTML file"""
-    try:
-        with open(html_file, 'r') as f:
-            soup = BeautifulSoup(f.read(), 'html.parser')
-            
-            # Find the Full Execution Trace section
-            trace_section = None
-            for h2 in soup.find_all('h2'):
-                if 'Full Execution Trace' in h2.get_text():
-                    # Navigate to the pre > code element
-                    div = h2.find_next('div')
-                    if div:
-                        pre = div.find('pre')
-                        if pre:
-                            trace_section = pre.find('code')
-                    break
-            
-            if not trace_section:
-                print(f"No execution trace found in {html_file}")
+# Bump whenever the parsed rows produced for a report change, to invalidate cached parses
+PARSER_VERSION = 9
+
+# Default location and size cap of the on-disk cache of parsed reports
+TRACE_CACHE_FILE = '.trace_cache.pkl'
+TRACE_CACHE_MAX_ENTRIES = 5000
+
+# Raw per-trace-line output file for each supported format
+RAW_OUTPUT_FILES = {
+    'csv': 'opcode_gas_units.csv',
+    'parquet': 'opcode_gas_units.parquet',
+    'npz': 'opcode_gas_units.npz'
+}
+
+# Per-(opcode, benchmark) statistics written by the streaming aggregation
+OPCODE_BENCHMARK_STATS_FILE = 'opcode_benchmark_statistics.csv'
+
+# Aggregated (benchmark, opcode) rows written when ingesting the Execution tables only
+EXECUTION_TABLE_FILE = 'opcode_execution_table.csv'
+
+# Statistics across repeated runs of the same benchmark
+BENCHMARK_RUN_STATS_FILE = 'benchmark_run_statistics.csv'
+BENCHMARK_OPCODE_RUN_STATS_FILE = 'benchmark_opcode_run_statistics.csv'
+
+# Least-squares cost model and how well it explains each benchmark
+COST_MODEL_FILE = 'opcode_cost_model.csv'
+COST_MODEL_RESIDUALS_FILE = 'cost_model_residuals.csv'
+
+# Storage, state and dependency metrics per benchmark, and the per-resource rows behind them
+IO_STATS_FILE = 'benchmark_io_statistics.csv'
+SECTION_RECORDS_FILE = 'storage_io_records.csv'
+
+# Columns of the Storage & IO tables of the reports: (column, title, decimals)
+IO_REPORT_COLUMNS = [
+    ('total_gas', 'Total Gas', 6),
+    ('intrinsic_gas', 'Intrinsic', 6),
+    ('dependency_gas', 'Dependency Gas', 6),
+    ('gas_per_dependency_byte', 'Gas / Dependency Byte', 9),
+    ('state_reads', 'State Reads', 0),
+    ('gas_per_state_read', 'Gas / Read', 6),
+    ('state_writes', 'State Writes', 0),
+    ('gas_per_state_write', 'Gas / Write', 6),
+    ('transaction_write_gas', 'Transaction Write', 6),
+    ('storage_fee_apt', 'Storage Fee (APT)', 8),
+    ('io_share', 'IO Share', 4),
+]
+
+# Per-(benchmark, opcode) and per-benchmark output of the compare command
+COMPARISON_FILE = 'gas_comparison.csv'
+BENCHMARK_COMPARISON_FILE = 'gas_comparison_benchmarks.csv'
+
+# Marginal opcode mix and gas of every benchmark once the baseline benchmark is subtracted
+DEFAULT_BASELINE = 'benchmark_nop'
+MARGINAL_MIX_FILE = 'marginal_opcode_mix.csv'
+MARGINAL_GAS_FILE = 'marginal_gas.csv'
+
+# Folded stacks of the report flamegraphs, and the differential flamegraph of the flamediff command
+FLAMEGRAPH_DIR = 'flamegraphs'
+FLAMEGRAPH_DIFF_FILE = 'flamegraph_diff.svg'
+FLAMEGRAPH_DIFF_FOLDED_FILE = 'flamegraph_diff.folded'
+
+# Gas of every parameter sweep point, the complexity fitted to each sweep, and their curves
+SCALING_POINTS_FILE = 'gas_scaling_points.csv'
+SCALING_FILE = 'gas_scaling.csv'
+SCALING_PLOT_FILE = 'gas_scaling.png'
+
+# Maximum number of sweep curves drawn in the scaling plot
+SCALING_PLOT_MAX_CURVES = 12
+
+# Stage and per-report timings written by --profile, and the cProfile dump of --cprofile
+ANALYSIS_PROFILE_FILE = 'analysis_profile.json'
+CPROFILE_FILE = 'analysis_profile.pstats'
+
+# Watch mode: seconds between rewrites of the outputs, quiet time a new report
+# directory needs before it is parsed, and how often pending reports are checked
+WATCH_WRITE_INTERVAL = 5.0
+WATCH_SETTLE_SECONDS = 1.0
+WATCH_TICK_SECONDS = 0.5
+
+# Directory the reports are read from unless --reports names others
+GAS_PROFILING_DIR = 'gas-profiling'
+
+# Module whose entry functions are named by the function alone; functions
+# of any other module are named module::function
+BENCHMARK_MODULE = 'opcode_benchmark'
+
+# Address, module and entry function ending a report directory name
+# ("txn-<hash>-0xc3c2-opcode_benchmark-benchmark_casting") or a report title
+REPORT_IDENTITY_RE = re.compile(r'(0x[0-9a-fA-F]+)-(\w+)-(\w+)$')
+
+# Title of a report, searched for in its first REPORT_TITLE_BYTES bytes
+REPORT_TITLE_RE = re.compile(rb'<title>\s*Gas Report - ([^<]*?)\s*</title>')
+REPORT_TITLE_BYTES = 4096
+
+# Columns of a partial aggregate file: one row per (benchmark, opcode) with
+# the RunningStats of its gas units, and the reports of the benchmark
+PARTIAL_COLUMNS = ['benchmark', 'address', 'module', 'function', 'reports', 'opcode',
+                   'count', 'sum', 'min', 'max', 'mean', 'm2']
+
+# Per-(address, module, function, opcode) statistics written by the merge command
+MODULE_OPCODE_STATS_FILE = 'module_opcode_statistics.csv'
+
+# Marker of the section holding the per-instruction trace in Aptos gas reports
+TRACE_MARKER = b'Full Execution Trace'
+
+# Header line of the trace holding the execution & IO total of the transaction
+TRACE_TOTAL_RE = re.compile(rb'\(gas unit, full trace\)\s+(\d+(?:\.\d+)?)')
+
+# Looking for patterns like "opcode_name    0.000588    0.02%"
+TRACE_LINE_RE = re.compile(r'^\s*([a-zA-Z0-9_]+)\s+(\d+\.\d+)\s+\d+\.\d+%')
+
+# Marker and row pattern of the aggregated Execution table (Operation, Number of Hits, Cost in Gas Units)
+EXECUTION_TABLE_MARKER = b'<h4>Execution</h4>'
+EXECUTION_ROW_RE = re.compile(rb'<tr>\s*<td>([^<]*)</td>\s*<td[^>]*>(\d+)</td>\s*<td[^>]*>(\d+(?:\.\d+)?)</td>')
+
+# Any trace line: indentation, name, and optional gas and percentage columns
+TREE_LINE_RE = re.compile(r'^( *)(\S.*?)(?:\s{2,}(\d+(?:\.\d+)?)(?:\s+\d+(?:\.\d+)?%)?)?\s*$')
+
+# Spaces of indentation per level of the Full Execution Trace
+TRACE_INDENT = 4
+
+# Function frames look like "0x1::signer::address_of" or "0xc3c2..::module::function"
+FUNCTION_FRAME_RE = re.compile(r'^0x[0-9a-fA-F.]+::\w+::\w+(<.*>)?$')
+
+# High-level sections of the trace that are not opcodes
+TRACE_SECTIONS = frozenset([
+    "execution", "intrinsic", "keyless", "dependencies",
+    "ledger", "transaction", "events", "state", "state_write_ops"
+])
+
+def extract_trace_text_stream(html_file):
+    """Extract the Full Execution Trace text by scanning the raw file, without building a DOM"""
+    with open(html_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            marker = mm.find(TRACE_MARKER)
+            if marker == -1:
+                return None
+            start = mm.find(b'<code', marker)
+            if start == -1:
                 return None
+            start = mm.find(b'>', start)
+            end = mm.find(b'</code>', start)
+            if start == -1 or end == -1:
+                return None
+            # Only the trace block is decoded and unescaped
+            return html.unescape(mm[start + 1:end].decode('utf-8'))
 
-            # Extract the text from the code tag
-            trace_text = trace_section.get_text()
-            
-            # Parse each line of the trace
-            opcode_data = []
-            for line in trace_text.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Use regex to extract opcode name and gas units
-                # Looking for patterns like "opcode_name    0.000588    0.02%"
-                # We need to be more flexible with whitespace
-                match = re.match(r'^\s*([a-zA-Z0-9_]+)\s+(\d+\.\d+)\s+\d+\.\d+%', line)
-                if match:
-                    opcode = match.group(1)
-                    gas = float(match.group(2))
-                    
-                    # Skip high-level sections and module/function names
-                    if (not opcode.startswith('0x') and 
-                        opcode not in ["execution", "intrinsic", "keyless", "dependencies", 
-                                     "ledger", "transaction", "events", "state", "state_write_ops"]):
-                        opcode_data.append({
-                            'opcode': opcode,
-                            'gas_units': gas
-                        })
-            
-            return opcode_data
+def extract_total_gas_stream(html_file):
+    """Extract the execution & IO gas total of the transaction from the trace header"""
+    with open(html_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            marker = mm.find(TRACE_MARKER)
+            if marker == -1:
+                return None
+            match = TRACE_TOTAL_RE.search(mm, marker)
+            return float(match.group(1)) if match else None
+
+def extract_execution_table_stream(html_file):
+    """Extract (operation, hits, gas) rows of the aggregated Execution table, without building a DOM"""
+    with open(html_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            start = mm.find(EXECUTION_TABLE_MARKER)
+            if start == -1:
+                return None
+            end = mm.find(b'</table>', start)
+            if end == -1:
+                return None
+            return [(html.unescape(name.decode('utf-8')).strip(), int(hits), float(gas))
+                    for name, hits, gas in EXECUTION_ROW_RE.findall(mm[start:end])]
+
+def extract_trace_text_soup(html_file):
+    """Extract the Full Execution Trace text using BeautifulSoup"""
+    # Only needed as a fallback, so imported lazily
+    from bs4 import BeautifulSoup
+
+    with open(html_file, 'r') as f:
+        soup = BeautifulSoup(f.read(), 'html.parser')
+
+    # Find the Full Execution Trace section
+    for h2 in soup.find_all('h2'):
+        if 'Full Execution Trace' in h2.get_text():
+            # Navigate to the pre > code element
+            div = h2.find_next('div')
+            if div:
+                pre = div.find('pre')
+                if pre:
+                    code = pre.find('code')
+                    if code:
+                        return code.get_text()
+            break
+
+    return None
+
+def iter_lines(text):
+    """Yield the lines of text one at a time, without splitting it into a list"""
+    start = 0
+    while True:
+        end = text.find('\n', start)
+        if end < 0:
+            yield text[start:]
+            return
+        yield text[start:end]
+        start = end + 1
+
+def iter_trace_lines(trace_text, call_stats=None):
+    """Yield (opcode, gas_units) for every opcode line of a Full Execution Trace
+
+    When call_stats, a CallStats, is given every line is folded into it in
+    the same pass.
+    """
+    for line in iter_lines(trace_text):
+        if call_stats is not None:
+            call_stats.add_line(line)
+        line = line.strip()
+        if not line:
+            continue
+
+        match = TRACE_LINE_RE.match(line)
+        if match:
+            opcode = match.group(1)
+
+            # Skip high-level sections and module/function names
+            if not opcode.startswith('0x') and opcode not in TRACE_SECTIONS:
+                yield opcode, float(match.group(2))
+
+def parse_trace_lines(trace_text):
+    """Parse opcode entries out of the text of a Full Execution Trace"""
+    return [{'opcode': opcode, 'gas_units': gas} for opcode, gas in iter_trace_lines(trace_text)]
+
+def read_execution_trace(html_file, parser='stream'):
+    """Return the text of the Full Execution Trace of a report, or None if there is none
+
+    The streaming extractor is used by default and falls back to BeautifulSoup
+    when it cannot locate the trace.
+    """
+    trace_text = None
+    if parser == 'stream':
+        trace_text = extract_trace_text_stream(html_file)
+    if trace_text is None:
+        trace_text = extract_trace_text_soup(html_file)
+    return trace_text
+
+def parse_execution_trace(html_file, parser='stream', verify_parser=False):
+    """Parse the Full Execution Trace section from the HTML file
+
+    With verify_parser, both extractors are run and any difference in the
+    extracted rows is reported.
+    """
+    try:
+        trace_text = read_execution_trace(html_file, parser)
+
+        if trace_text is None:
+            print(f"No execution trace found in {html_file}")
+            return None
+
+        opcode_data = parse_trace_lines(trace_text)
+
+        if verify_parser:
+            verify_trace_parsers(html_file, opcode_data)
+
+        return opcode_data
 
     except Exception as e:
         print(f"Error reading HTML file {html_file}: {e}")
         print(f"Exception details: {str(e)}")
         return None
 
-def analyze_gas_profiling():
-    gas_profiling_dir = Path('gas-profiling')
-    all_opcode_data = []
+class CallStats:
+    """Inclusive and exclusive gas per function and per (function, operation) pair of a trace
+
+    Lines are folded in one at a time, in trace order, rebuilding the call
+    stack from their indentation. Trace gas of a function frame is inclusive
+    of everything below it, so its exclusive gas is what is left after
+    subtracting the frames of its direct callees. Operations (opcodes and
+    load<...> lines) are exclusive to their innermost enclosing function and
+    inclusive to every function on the stack, counted once per function so
+    that recursion is not double counted. Only the open frames are held, so
+    memory grows with the call depth rather than the length of the trace.
+    """
+    __slots__ = ('names', 'name_index', 'is_function', 'stack', 'frames', 'function_stats', 'pair_stats')
+
+    def __init__(self):
+        self.names = []
+        self.name_index = {}
+        self.is_function = []
+        # Open nodes as [name_id, gas, callee_gas, has_children], innermost last
+        self.stack = []
+        # (depth, name_id) of the enclosing function frames
+        self.frames = []
+        self.function_stats = {}
+        self.pair_stats = {}
+
+    def add_line(self, line):
+        """Fold one line of a Full Execution Trace in"""
+        match = TREE_LINE_RE.match(line)
+        if not match:
+            return
+
+        depth = len(match.group(1)) // TRACE_INDENT
+        name = match.group(2)
+        gas = float(match.group(3)) if match.group(3) else 0.0
+        name_id = self.name_index.get(name)
+        if name_id is None:
+            name_id = self.name_index[name] = len(self.names)
+            self.names.append(name)
+            self.is_function.append(bool(FUNCTION_FRAME_RE.match(name)))
+
+        # Nodes as deep as this one are complete; the last line is closed
+        # before the frames move on, as it belongs to the current ones
+        while len(self.stack) > depth:
+            self.close(self.stack.pop())
+        frames = self.frames
+        while frames and frames[-1][0] >= depth:
+            frames.pop()
+
+        is_function = self.is_function[name_id]
+        if self.stack:
+            parent = self.stack[-1]
+            parent[3] = True
+            if is_function:
+                parent[2] += gas
+        if is_function:
+            stats = self.function_stats.setdefault(name, [0, 0.0, 0.0])
+            stats[0] += 1
+            if all(frame_name != name_id for _, frame_name in frames):
+                stats[1] += gas
+            frames.append((depth, name_id))
+        self.stack.append([name_id, gas, 0.0, False])
+
+    def close(self, node):
+        """Account for a node once all of its children have been seen"""
+        name_id, gas, callee_gas, has_children = node
+        if self.is_function[name_id]:
+            self.function_stats[self.names[name_id]][2] += max(gas - callee_gas, 0.0)
+        elif self.frames and not has_children:
+            operation = self.names[name_id]
+            innermost = self.frames[-1][1]
+            for frame_name in {frame_name for _, frame_name in self.frames}:
+                stats = self.pair_stats.setdefault((self.names[frame_name], operation), [0, 0.0, 0.0])
+                if frame_name == innermost:
+                    stats[0] += 1
+                    stats[2] += gas
+                stats[1] += gas
+
+    def finish(self):
+        """Close the frames still open and return the stats
+
+        Returns ({function: [calls, inclusive, exclusive]},
+                 {(function, operation): [direct_hits, inclusive, exclusive]}).
+        """
+        while self.stack:
+            self.close(self.stack.pop())
+        return self.function_stats, self.pair_stats
+
+def verify_trace_parsers(html_file, opcode_data):
+    """Check that the streaming and BeautifulSoup extractors produce identical rows"""
+    stream_text = extract_trace_text_stream(html_file)
+    soup_text = extract_trace_text_soup(html_file)
+    stream_rows = parse_trace_lines(stream_text) if stream_text is not None else None
+    soup_rows = parse_trace_lines(soup_text) if soup_text is not None else None
+
+    if stream_rows == soup_rows == opcode_data:
+        return True
+
+    print(f"Parser mismatch in {html_file}: "
+          f"stream={len(stream_rows or [])} rows, soup={len(soup_rows or [])} rows")
+    for i, (a, b) in enumerate(zip(stream_rows or [], soup_rows or [])):
+        if a != b:
+            print(f"  First difference at row {i}: stream={a} soup={b}")
+            break
+    return False
 
-    # Check if directory exists
-    if not gas_profiling_dir.exists():
-        print(f"Gas profiling directory not found at: {gas_profiling_dir}")
+def benchmark_name_from_dir(dir_name):
+    """Extract the benchmarked operation name from a txn-* directory name"""
+    return identity_name(parse_report_identity(dir_name))
+
+# Address, module and entry function of the transaction a report profiles
+ReportIdentity = namedtuple('ReportIdentity', ['address', 'module', 'function'])
+
+def parse_report_identity(text):
+    """Return the ReportIdentity ending a directory name or report title, None when there is none"""
+    identity_match = REPORT_IDENTITY_RE.search(text)
+    return ReportIdentity(*identity_match.groups()) if identity_match else None
+
+def identity_name(identity):
+    """Return the benchmark name of a ReportIdentity: the function, qualified by its module outside BENCHMARK_MODULE"""
+    if identity is None:
+        return 'unknown'
+    if identity.module == BENCHMARK_MODULE:
+        return identity.function
+    return f"{identity.module}::{identity.function}"
+
+def report_identity(benchmark_dir):
+    """Return the ReportIdentity of a report directory, from its title or else its name, None when neither has one"""
+    try:
+        with open(benchmark_dir / 'index.html', 'rb') as f:
+            title_match = REPORT_TITLE_RE.search(f.read(REPORT_TITLE_BYTES))
+    except OSError:
+        title_match = None
+    if title_match:
+        identity = parse_report_identity(title_match.group(1).decode('utf-8', 'replace'))
+        if identity is not None:
+            return identity
+    return parse_report_identity(benchmark_dir.name)
+
+def benchmark_label(benchmark_dir, identity=None):
+    """Return the benchmark name of a report directory, including its sweep point if it has one"""
+    record = load_invocation_record(benchmark_dir)
+    if record is not None and record.get('params'):
+        return record['label']
+    return identity_name(identity or report_identity(benchmark_dir))
+
+def shard_of(name, shards):
+    """Return the shard, out of shards, a report directory name belongs to; stable across machines"""
+    return zlib.crc32(name.encode()) % shards
+
+def discover_benchmark_dirs(report_dirs=(GAS_PROFILING_DIR,), shard=None):
+    """Return the txn-* directories of every report directory, ordered by benchmark
+
+    shard, an (index, count) pair, keeps only the directories of that shard.
+    Directories that do not exist are reported and skipped.
+    """
+    benchmark_dirs = []
+    for report_dir in map(Path, report_dirs):
+        if not report_dir.is_dir():
+            print(f"Gas profiling directory not found at: {report_dir}")
+            continue
+        benchmark_dirs.extend(report_dir.glob('txn-*'))
+    if shard is not None:
+        index, count = shard
+        benchmark_dirs = [d for d in benchmark_dirs if shard_of(d.name, count) == index]
+    # Order directories by benchmark so the output does not depend on the filesystem or on workers
+    return sorted(benchmark_dirs, key=lambda d: (benchmark_name_from_dir(d.name), d.name, str(d)))
+
+class RunningStats:
+    """Online count, sum, min, max and Welford mean/variance of a stream of values
+
+    Two instances over disjoint streams can be merged, so per-report
+    accumulators built in worker processes combine exactly.
+    """
+    __slots__ = ('count', 'total', 'min', 'max', 'mean', 'm2')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    @classmethod
+    def from_summary(cls, count, total, minimum, maximum, mean, m2):
+        """Rebuild an accumulator from its saved fields, e.g. a row of a partial aggregate file"""
+        stats = cls()
+        stats.count = int(count)
+        stats.total = float(total)
+        stats.min = float(minimum)
+        stats.max = float(maximum)
+        stats.mean = float(mean)
+        stats.m2 = float(m2)
+        return stats
+
+    def add(self, value):
+        """Add a single value"""
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+    def merge(self, other):
+        """Fold the values summarized by other into this accumulator (Chan et al.)"""
+        if other.count == 0:
+            return
+        count = self.count + other.count
+        delta = other.mean - self.mean
+        self.mean += delta * other.count / count
+        self.m2 += other.m2 + delta * delta * self.count * other.count / count
+        self.count = count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+
+    @property
+    def variance(self):
+        """Population variance of the values"""
+        return self.m2 / self.count if self.count else 0.0
+
+# Options controlling how each report is parsed. ingest is 'trace' or
+# 'table'; aggregate is 'frame' (per-line rows) or 'stream' (per-opcode
+# RunningStats only, plus the rows when keep_rows is set)
+ParseOptions = namedtuple(
+    'ParseOptions',
+    ['parser', 'verify_parser', 'ingest', 'aggregate', 'keep_rows'],
+    defaults=('stream', False, 'trace', 'frame', True)
+)
+
+# Where and how an analysis is appended to the results history: the
+# database file, the label of the run and whether every trace line is
+# stored along with the per-(benchmark, opcode) aggregates
+StoreOptions = namedtuple('StoreOptions', ['db_file', 'run_label', 'raw'], defaults=(RESULTS_DB_FILE, None, False))
+
+# Compact result of parsing one txn-* directory; opcode_codes holds the
+# OpcodeRegistry IDs of the trace lines and opcode_names the dynamic names of
+# the registry that parsed it (see OpcodeRegistry.remap), the stats dicts are the output of CallStats.finish,
+# execution_table is the output of compact_execution_table,
+# opcode_accumulators maps opcodes to their RunningStats, total_gas is
+# the execution & IO total of the transaction, sections holds the
+# ReportSections of the storage, state and dependency tables,
+# parse_profile the ParseProfile of the process that parsed it and identity
+# the ReportIdentity of the report
+BenchmarkResult = namedtuple(
+    'BenchmarkResult',
+    ['operation_name', 'opcode_names', 'opcode_codes', 'gas_units',
+     'function_stats', 'function_opcode_stats', 'execution_table', 'opcode_accumulators', 'total_gas',
+     'sections', 'parse_profile', 'identity'],
+    defaults=(None, None, None, None, None, None, None, None, None, None, None)
+)
+
+# Wall and CPU seconds spent parsing one report, the trace lines (or
+# Execution table rows) read from it and the size of its index.html
+ParseProfile = namedtuple('ParseProfile', ['wall_seconds', 'cpu_seconds', 'trace_lines', 'bytes'])
+
+def compact_execution_table(rows):
+    """Pack opcode rows of the Execution table into (names, hits, gas) columns"""
+    registry = load_opcode_registry()
+    names = []
+    hits = array('Q')
+    gas = array('d')
+    for name, row_hits, row_gas in rows:
+        # Same filtering as the trace: natives and sections are not opcodes
+        if not name.startswith('0x') and name not in TRACE_SECTIONS:
+            names.append(registry.name(registry.intern(name)))
+            hits.append(row_hits)
+            gas.append(row_gas)
+    return tuple(names), hits, gas
+
+def process_benchmark_dir(benchmark_dir, options=ParseOptions()):
+    """Parse a single txn-* directory into a BenchmarkResult carrying its ParseProfile and ReportIdentity"""
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    identity = report_identity(benchmark_dir)
+    result = parse_benchmark_dir(benchmark_dir, options, identity)
+    if result.gas_units is not None:
+        lines = len(result.gas_units)
+    elif result.opcode_accumulators is not None:
+        lines = sum(accumulator.count for accumulator in result.opcode_accumulators.values())
+    else:
+        lines = len(result.execution_table[0]) if result.execution_table is not None else 0
+    html_file = benchmark_dir / 'index.html'
+    size = html_file.stat().st_size if html_file.exists() else 0
+    return result._replace(parse_profile=ParseProfile(time.perf_counter() - start, time.process_time() - cpu_start,
+                                                      lines, size), identity=identity)
+
+def parse_benchmark_dir(benchmark_dir, options=ParseOptions(), identity=None):
+    """Parse a single txn-* directory into a compact BenchmarkResult
+
+    With ingest='table' only the aggregated Execution table is read; otherwise
+    the Full Execution Trace is parsed as well. With aggregate='stream' the
+    trace lines flow straight into per-opcode accumulators, and the rows are
+    only kept when keep_rows is set. Call stats are folded in the same single
+    pass over the trace, so memory beyond the trace text grows with the
+    distinct opcodes and functions rather than the trace length. Arrays keep the result cheap to pickle
+    when the directory is parsed in a worker process. Only operation_name is
+    set when the report could not be parsed. identity, the ReportIdentity of
+    the report, saves reading its title again.
+    """
+    operation_name = benchmark_label(benchmark_dir, identity)
+    html_file = benchmark_dir / 'index.html'
+
+    if not html_file.exists():
+        return BenchmarkResult(operation_name)
+
+    try:
+        table_rows = extract_execution_table_stream(html_file)
+        total_gas = extract_total_gas_stream(html_file)
+        trace_text = read_execution_trace(html_file, options.parser) if options.ingest == 'trace' else None
+        sections = extract_report_sections(html_file, trace_text)
+    except Exception as e:
+        print(f"Error reading HTML file {html_file}: {e}")
+        table_rows = trace_text = total_gas = sections = None
+
+    execution_table = compact_execution_table(table_rows) if table_rows else None
+    if options.ingest == 'table':
+        if execution_table is None:
+            print(f"Failed to extract the Execution table from {html_file}")
+        return BenchmarkResult(operation_name, execution_table=execution_table, total_gas=total_gas,
+                               sections=sections)
+
+    if trace_text is not None and options.verify_parser:
+        verify_trace_parsers(html_file, parse_trace_lines(trace_text))
+
+    streaming = options.aggregate == 'stream'
+    keep_rows = options.keep_rows or not streaming
+    registry = load_opcode_registry()
+    opcode_ids = registry.ids
+    opcode_codes = code_array()
+    gas_units = array('d')
+    accumulators = {}
+    # Call stats are folded in the same pass over the trace
+    call_stats = CallStats()
+    for opcode, gas in iter_trace_lines(trace_text, call_stats) if trace_text is not None else ():
+        if keep_rows:
+            code = opcode_ids.get(opcode)
+            opcode_codes = append_code(opcode_codes, registry.intern(opcode) if code is None else code)
+            gas_units.append(gas)
+        if streaming:
+            accumulator = accumulators.get(opcode)
+            if accumulator is None:
+                accumulator = accumulators[opcode] = RunningStats()
+            accumulator.add(gas)
+
+    if not gas_units and not accumulators:
+        print(f"Failed to extract opcode data from {html_file}")
+        return BenchmarkResult(operation_name, execution_table=execution_table, total_gas=total_gas,
+                               sections=sections)
+
+    function_stats, function_opcode_stats = call_stats.finish()
+
+    return BenchmarkResult(operation_name,
+                           registry.dynamic_names if keep_rows else None,
+                           opcode_codes if keep_rows else None,
+                           gas_units if keep_rows else None,
+                           function_stats, function_opcode_stats, execution_table,
+                           accumulators if streaming else None, total_gas, sections)
+
+def ingest_benchmark_dirs(benchmark_dirs, options=ParseOptions(), jobs=1):
+    """Parse benchmark directories, in worker processes when jobs > 1
+
+    Results are yielded in the order of benchmark_dirs, whichever worker
+    finishes first.
+    """
+    if jobs <= 1 or len(benchmark_dirs) <= 1:
+        for benchmark_dir in benchmark_dirs:
+            yield process_benchmark_dir(benchmark_dir, options)
         return
 
-    # Iterate through all benchmark directories
-    for benchmark_dir in gas_profiling_dir.glob('txn-*'):
-        benchmark_name = benchmark_dir.name
-        print(f"\nProcessing benchmark: {benchmark_name}")
-        
-        # Extract operation name from directory name
-        operation_match = re.search(r'opcode_benchmark-(\w+)', benchmark_name)
-        operation_name = operation_match.group(1) if operation_match else 'unknown'
+    worker = partial(process_benchmark_dir, options=options)
+    chunksize = max(1, len(benchmark_dirs) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(worker, benchmark_dirs, chunksize=chunksize)
+
+def file_digest(path):
+    """Return a content hash of a file"""
+    with open(path, 'rb') as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+def load_trace_cache(cache_path):
+    """Load the cache of parsed reports, discarding it if another parser version wrote it"""
+    cache_path = Path(cache_path)
+    if not cache_path.exists():
+        return {}
+
+    try:
+        with open(cache_path, 'rb') as f:
+            cache = pickle.load(f)
+    except Exception as e:
+        print(f"Ignoring unreadable trace cache {cache_path}: {e}")
+        return {}
+
+    if not isinstance(cache, dict) or cache.get('version') != PARSER_VERSION:
+        print(f"Trace cache {cache_path} was written by another parser version, rebuilding it")
+        return {}
+
+    return cache['entries']
+
+def save_trace_cache(cache_path, entries, max_entries=TRACE_CACHE_MAX_ENTRIES):
+    """Write the cache of parsed reports, keeping only the most recently used entries"""
+    # Entries are kept in least- to most-recently used order
+    for key in list(entries)[:max(0, len(entries) - max_entries)]:
+        del entries[key]
+
+    cache_path = Path(cache_path)
+    tmp_path = cache_path.with_name(cache_path.name + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': PARSER_VERSION, 'entries': entries}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, cache_path)
+
+def trace_cache_key(html_file, options=ParseOptions()):
+    """Return the cache key of a report parsed with the given options"""
+    if options.ingest == 'table':
+        return f"table:{Path(html_file).resolve()}"
+    rows = 'rows' if options.keep_rows or options.aggregate != 'stream' else 'norows'
+    return f"trace-{options.aggregate}-{rows}:{Path(html_file).resolve()}"
+
+def lookup_trace_cache(entries, html_file, options=ParseOptions()):
+    """Return the cached parse of a report, or None if it is missing or stale
+
+    A matching size and mtime is trusted; otherwise the content hash decides,
+    so touched but unchanged reports are not parsed again.
+    """
+    key = trace_cache_key(html_file, options)
+    entry = entries.pop(key, None)
+    if entry is None:
+        return None
+
+    size, mtime_ns, digest, result = entry
+    stat = os.stat(html_file)
+    if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+        if stat.st_size != size or file_digest(html_file) != digest:
+            return None
+
+    # Re-insert to mark the entry as most recently used
+    entries[key] = (stat.st_size, stat.st_mtime_ns, digest, result)
+    return result
+
+def store_trace_cache(entries, html_file, result, options=ParseOptions()):
+    """Record the parse of a report in the cache"""
+    stat = os.stat(html_file)
+    entries[trace_cache_key(html_file, options)] = (stat.st_size, stat.st_mtime_ns, file_digest(html_file), result)
 
-        # Path to HTML file
+def record_parse_profiles(timer, benchmark_dirs, results, cached=()):
+    """Add the ParseProfile of every result to a StageTimer; indices in cached came from the trace cache"""
+    cached = set(cached)
+    for i, (benchmark_dir, result) in enumerate(zip(benchmark_dirs, results)):
+        profile = result.parse_profile
+        timer.add_report(benchmark_dir.name, benchmark=result.operation_name, cached=i in cached,
+                         **(profile._asdict() if profile is not None else {}))
+
+def ingest_with_cache(benchmark_dirs, options=ParseOptions(), jobs=1, cache_entries=None, timer=None):
+    """Parse benchmark directories, reusing cached results for unchanged reports
+
+    Returns the results in the order of benchmark_dirs. With a StageTimer,
+    the parse timings of the reports are recorded in it; cached reports
+    keep the timings of the run that parsed them.
+    """
+    if cache_entries is None:
+        results = list(ingest_benchmark_dirs(benchmark_dirs, options, jobs))
+        if timer is not None:
+            record_parse_profiles(timer, benchmark_dirs, results)
+        return results
+
+    results = [None] * len(benchmark_dirs)
+    misses = []
+    for i, benchmark_dir in enumerate(benchmark_dirs):
         html_file = benchmark_dir / 'index.html'
+        # Cached parses are bypassed when the extractors are being cross-checked
+        cached = None
+        if html_file.exists() and not options.verify_parser:
+            cached = lookup_trace_cache(cache_entries, html_file, options)
+        if cached is None:
+            misses.append(i)
+        else:
+            results[i] = cached
 
+    print(f"Trace cache: {len(benchmark_dirs) - len(misses)} cached, {len(misses)} to parse")
+
+    parsed = ingest_benchmark_dirs([benchmark_dirs[i] for i in misses], options, jobs)
+    for i, result in zip(misses, parsed):
+        results[i] = result
+        html_file = benchmark_dirs[i] / 'index.html'
         if html_file.exists():
-            # Get execution trace data
-            trace_data = parse_execution_trace(html_file)
-            
-            if trace_data:
-                # Add benchmark information to each opcode entry
-                for entry in trace_data:
-                    entry['benchmark'] = operation_name
-                all_opcode_data.extend(trace_data)
-                print(f"Extracted {len(trace_data)} opcode entries from {operation_name}")
-            else:
-                print(f"Failed to extract opcode data from {html_file}")
-
-    if not all_opcode_data:
-        print("\nNo opcode data was collected.")
-        return
+            store_trace_cache(cache_entries, html_file, result, options)
 
-    # Create DataFrame
-    df = pd.DataFrame(all_opcode_data)
-    
-    # Group by opcode and calculate statistics
-    opcode_stats = df.groupby('opcode')['gas_units'].agg([
-        'count',
-        'mean',
-        'min',
-        'max',
-        'sum'
-    ]).round(6)  # More precision for gas units
-
-    # Save raw opcode data to CSV
-    output_file = 'opcode_gas_units.csv'
+    if timer is not None:
+        missed = set(misses)
+        record_parse_profiles(timer, benchmark_dirs, results, (i for i in range(len(results)) if i not in missed))
+    return results
+
+def save_raw_opcode_data(df, raw_format='csv'):
+    """Save the raw per-trace-line opcode data and return the name of the written file
+
+    The columnar formats store opcode and benchmark dictionary-encoded and
+    gas_units as float64. Parquet needs pyarrow (or fastparquet); without it
+    the data is written as a compressed npz archive of the same columns.
+    """
+    if raw_format == 'parquet':
+        output_file = RAW_OUTPUT_FILES['parquet']
+        try:
+            df.astype({'opcode': 'category', 'benchmark': 'category', 'gas_units': 'float64'}) \
+                .to_parquet(output_file, index=False)
+            return output_file
+        except ImportError:
+            print("Parquet output needs pyarrow or fastparquet, writing npz instead")
+            raw_format = 'npz'
+
+    if raw_format == 'npz':
+        output_file = RAW_OUTPUT_FILES['npz']
+        opcode = pd.Categorical(df['opcode'])
+        benchmark = pd.Categorical(df['benchmark'])
+        np.savez_compressed(
+            output_file,
+            opcode_codes=opcode.codes,
+            opcode_names=np.asarray(opcode.categories, dtype=str),
+            benchmark_codes=benchmark.codes,
+            benchmark_names=np.asarray(benchmark.categories, dtype=str),
+            gas_units=df['gas_units'].to_numpy(dtype='float64')
+        )
+        return output_file
+
+    output_file = RAW_OUTPUT_FILES['csv']
     df.to_csv(output_file, index=False)
-    print(f"\nRaw opcode data saved to {output_file}")
+    return output_file
+
+def load_raw_opcode_data(raw_file, columns=None):
+    """Load raw opcode data written by save_raw_opcode_data, reading only the given columns"""
+    raw_file = Path(raw_file)
+    columns = columns or ['opcode', 'gas_units', 'benchmark']
+
+    if raw_file.suffix == '.parquet':
+        return pd.read_parquet(raw_file, columns=columns)
+
+    if raw_file.suffix == '.npz':
+        # Arrays inside an npz archive are only decompressed when accessed
+        data = {}
+        with np.load(raw_file) as archive:
+            for column in columns:
+                if column == 'gas_units':
+                    data[column] = archive['gas_units']
+                else:
+                    data[column] = pd.Categorical.from_codes(archive[f'{column}_codes'],
+                                                             archive[f'{column}_names'])
+        return pd.DataFrame(data)
+
+    return pd.read_csv(raw_file, usecols=columns, dtype={'opcode': 'category', 'benchmark': 'category'})[columns]
+
+def merge_call_stats(totals, stats):
+    """Add [count, inclusive, exclusive] call stats of one report into running totals"""
+    for key, (count, inclusive, exclusive) in stats.items():
+        total = totals.get(key)
+        if total is None:
+            totals[key] = [count, inclusive, exclusive]
+        else:
+            total[0] += count
+            total[1] += inclusive
+            total[2] += exclusive
+
+def save_call_stats(function_stats, function_opcode_stats):
+    """Save per-function and per-(function, opcode) gas to CSV, most expensive first"""
+    function_df = pd.DataFrame(
+        [(function, *stats) for function, stats in function_stats.items()],
+        columns=['function', 'calls', 'inclusive_gas', 'exclusive_gas']
+    ).sort_values('inclusive_gas', ascending=False).round(6)
+    function_file = 'function_gas.csv'
+    function_df.to_csv(function_file, index=False)
+    print(f"Function gas saved to {function_file}")
+
+    pair_df = pd.DataFrame(
+        [(function, opcode, *stats) for (function, opcode), stats in function_opcode_stats.items()],
+        columns=['function', 'opcode', 'direct_hits', 'inclusive_gas', 'exclusive_gas']
+    ).sort_values(['function', 'inclusive_gas'], ascending=[True, False]).round(6)
+    pair_file = 'function_opcode_gas.csv'
+    pair_df.to_csv(pair_file, index=False)
+    print(f"Function/opcode gas saved to {pair_file}")
+
+def aggregate_execution_tables(benchmark_dirs, results):
+    """Compute opcode statistics from the aggregated Execution tables of the reports
+
+    Returns (df, opcode_stats). df has one row per (benchmark, opcode) with the
+    hit count, total gas and average gas per hit. count, sum and mean equal
+    those of the per-line mode; min and max are taken over the per-benchmark
+    averages, which matches the per-line values whenever an opcode has a
+    constant cost within each benchmark.
+    """
+    opcode_column = []
+    hits_column = []
+    total_column = []
+    benchmark_column = []
+    for benchmark_dir, result in zip(benchmark_dirs, results):
+        print(f"\nProcessing benchmark: {benchmark_dir.name}")
+        if result.execution_table is None:
+            continue
+        names, hits, gas = result.execution_table
+        opcode_column.extend(names)
+        hits_column.extend(hits)
+        total_column.extend(gas)
+        benchmark_column.extend([result.operation_name] * len(names))
+        print(f"Extracted {len(names)} aggregated opcodes from {result.operation_name}")
+
+    if not opcode_column:
+        return None, None
+
+    df = pd.DataFrame({
+        'opcode': opcode_column,
+        'hits': np.asarray(hits_column, dtype='int64'),
+        'total_gas': np.asarray(total_column, dtype='float64'),
+        'benchmark': benchmark_column
+    })
+    df['gas_units'] = df['total_gas'] / df['hits']
+
+    grouped = df.groupby('opcode')
+    opcode_stats = pd.DataFrame({
+        'count': grouped['hits'].sum(),
+        'mean': grouped['total_gas'].sum() / grouped['hits'].sum(),
+        'min': grouped['gas_units'].min(),
+        'max': grouped['gas_units'].max(),
+        'sum': grouped['total_gas'].sum()
+    }).round(6)
+
+    return df, opcode_stats
+
+def cross_check_execution_table(benchmark_dir, result, tolerance=1e-6):
+    """Check per-line trace totals of a report against its aggregated Execution table
+
+    Prints and returns False when an opcode's hit count or total gas differ.
+    """
+    if result.execution_table is None:
+        print(f"Cross-check: no Execution table in {benchmark_dir.name}")
+        return False
+
+    registry = load_opcode_registry()
+    trace_totals = registry.totals(registry.remap(result.opcode_codes, result.opcode_names), result.gas_units)
+
+    names, hits, gas = result.execution_table
+    table_totals = {name: [row_hits, row_gas] for name, row_hits, row_gas in zip(names, hits, gas)}
+
+    consistent = True
+    for opcode in sorted(trace_totals.keys() | table_totals.keys()):
+        trace_hits, trace_gas = trace_totals.get(opcode, (0, 0.0))
+        table_hits, table_gas = table_totals.get(opcode, (0, 0.0))
+        if trace_hits != table_hits or abs(trace_gas - table_gas) > tolerance:
+            print(f"Cross-check mismatch in {benchmark_dir.name} for {opcode}: "
+                  f"trace {trace_hits} hits / {trace_gas:.6f} gas, "
+                  f"table {table_hits} hits / {table_gas:.6f} gas")
+            consistent = False
+    return consistent
+
+def result_accumulators(result):
+    """Return {opcode: RunningStats} of a parsed report, or None when it has no opcode data
+
+    Results parsed into rows are summarized here; with the Execution table
+    alone every hit is taken at the average gas per hit of its opcode.
+    """
+    if result.opcode_accumulators is not None:
+        return result.opcode_accumulators
+    if result.opcode_codes is not None:
+        registry = load_opcode_registry()
+        codes = registry.remap(result.opcode_codes, result.opcode_names)
+        gas = np.frombuffer(result.gas_units, dtype=np.float64)
+        accumulators = {}
+        for code in np.unique(codes):
+            values = gas[codes == code]
+            mean = values.mean()
+            accumulators[registry.name(code)] = RunningStats.from_summary(
+                len(values), values.sum(), values.min(), values.max(), mean, ((values - mean) ** 2).sum())
+        return accumulators
+    if result.execution_table is not None:
+        return {name: RunningStats.from_summary(hits, gas, gas / hits, gas / hits, gas / hits, 0.0)
+                for name, hits, gas in zip(*result.execution_table) if hits}
+    return None
+
+class StreamingAggregates:
+    """Per-(opcode, benchmark) RunningStats and call stats, folded in one report at a time
+
+    Adding a report costs time proportional to its distinct opcodes and
+    functions, and memory is bounded by the number of distinct (opcode,
+    benchmark) pairs, so the aggregates can be kept up to date as reports
+    arrive. The pairs can be saved as a partial aggregate file, and the
+    files of several shards folded back in with add_partial.
+    """
+
+    def __init__(self):
+        self.pairs = {}
+        self.function_stats = {}
+        self.function_opcode_stats = {}
+        self.identities = {}
+        self.benchmark_reports = {}
+        self.reports = 0
+
+    def merge_pair(self, opcode, benchmark, accumulator):
+        """Fold the RunningStats of an (opcode, benchmark) pair in"""
+        key = (opcode, benchmark)
+        total = self.pairs.get(key)
+        if total is None:
+            total = self.pairs[key] = RunningStats()
+        total.merge(accumulator)
+
+    def count_reports(self, benchmark, identity, reports=1):
+        """Count reports of a benchmark, remembering its ReportIdentity"""
+        if identity is not None:
+            self.identities.setdefault(benchmark, identity)
+        self.benchmark_reports[benchmark] = self.benchmark_reports.get(benchmark, 0) + reports
+        self.reports += reports
+
+    def add(self, result):
+        """Fold the accumulators and call stats of a parsed result in
+
+        Returns the number of opcode entries added, or None when the result
+        has no opcode data.
+        """
+        accumulators = result_accumulators(result)
+        if accumulators is None:
+            return None
+        for opcode, accumulator in accumulators.items():
+            self.merge_pair(opcode, result.operation_name, accumulator)
+        if result.function_stats is not None:
+            merge_call_stats(self.function_stats, result.function_stats)
+            merge_call_stats(self.function_opcode_stats, result.function_opcode_stats)
+        self.count_reports(result.operation_name, result.identity)
+        return sum(accumulator.count for accumulator in accumulators.values())
+
+    def partial_frame(self):
+        """Return the pairs as a partial aggregate frame with PARTIAL_COLUMNS"""
+        rows = []
+        for (opcode, benchmark), acc in sorted(self.pairs.items()):
+            identity = self.identities.get(benchmark) or ReportIdentity('', '', '')
+            rows.append((benchmark, *identity, self.benchmark_reports.get(benchmark, 0), opcode,
+                         acc.count, acc.total, acc.min, acc.max, acc.mean, acc.m2))
+        return pd.DataFrame(rows, columns=PARTIAL_COLUMNS)
+
+    def add_partial(self, partial):
+        """Fold a partial aggregate frame, e.g. another shard's, in
+
+        Raises ValueError when columns of PARTIAL_COLUMNS are missing.
+        Call stats are not part of partial aggregates.
+        """
+        missing = [column for column in PARTIAL_COLUMNS if column not in partial.columns]
+        if missing:
+            raise ValueError(f"missing partial aggregate columns: {', '.join(missing)}")
+        partial = partial.fillna({'address': '', 'module': '', 'function': ''})
+        for opcode, benchmark, *summary in zip(*(partial[column] for column in
+                                                  ['opcode', 'benchmark', 'count', 'sum', 'min', 'max', 'mean', 'm2'])):
+            self.merge_pair(opcode, benchmark, RunningStats.from_summary(*summary))
+        for benchmark, rows in partial.groupby('benchmark', sort=False):
+            first = rows.iloc[0]
+            identity = ReportIdentity(first['address'], first['module'], first['function'])
+            self.count_reports(benchmark, identity if identity.function else None, int(first['reports']))
+
+    def frames(self):
+        """Return (df, opcode_stats): one row per (opcode, benchmark) and one per opcode, or (None, None)"""
+        if not self.pairs:
+            return None, None
+
+        opcode_accumulators = {}
+        for (opcode, _), accumulator in self.pairs.items():
+            total = opcode_accumulators.get(opcode)
+            if total is None:
+                total = opcode_accumulators[opcode] = RunningStats()
+            total.merge(accumulator)
+
+        df = pd.DataFrame(
+            [(opcode, benchmark, acc.count, acc.total / acc.count, acc.variance ** 0.5, acc.min, acc.max,
+              acc.total)
+             for (opcode, benchmark), acc in sorted(self.pairs.items())],
+            columns=['opcode', 'benchmark', 'count', 'gas_units', 'std', 'min', 'max', 'sum']
+        ).round(6)
+
+        opcode_stats = pd.DataFrame(
+            [(opcode, acc.count, acc.total / acc.count, acc.min, acc.max, acc.total)
+             for opcode, acc in sorted(opcode_accumulators.items())],
+            columns=['opcode', 'count', 'mean', 'min', 'max', 'sum']
+        ).set_index('opcode').round(6)
+
+        return df, opcode_stats
+
+    def module_frame(self):
+        """Return one row per (address, module, function, opcode), merging the sweep points of a function"""
+        accumulators = {}
+        for (opcode, benchmark), accumulator in self.pairs.items():
+            identity = self.identities.get(benchmark) or ReportIdentity('', '', benchmark)
+            key = (*identity, opcode)
+            total = accumulators.get(key)
+            if total is None:
+                total = accumulators[key] = RunningStats()
+            total.merge(accumulator)
+        return pd.DataFrame(
+            [(*key, acc.count, acc.mean, acc.variance ** 0.5, acc.min, acc.max, acc.total)
+             for key, acc in sorted(accumulators.items())],
+            columns=['address', 'module', 'function', 'opcode', 'count', 'mean', 'std', 'min', 'max', 'sum']
+        ).round(6)
+
+def aggregate_streaming(benchmark_dirs, results, raw_file=None):
+    """Fold per-report opcode accumulators into per-(opcode, benchmark) and per-opcode statistics
+
+    No per-line rows are held: memory is bounded by the number of distinct
+    opcodes per benchmark. When raw_file is given, the rows kept by the
+    workers are appended to it one report at a time.
+
+    Returns (df, opcode_stats, function_stats, function_opcode_stats) where df
+    has one row per (opcode, benchmark), or all None if nothing was parsed.
+    """
+    registry = load_opcode_registry()
+    aggregates = StreamingAggregates()
+
+    raw_out = open(raw_file, 'w') if raw_file else None
+    try:
+        if raw_out:
+            raw_out.write('opcode,gas_units,benchmark\n')
+
+        for benchmark_dir, result in zip(benchmark_dirs, results):
+            print(f"\nProcessing benchmark: {benchmark_dir.name}")
+            entries = aggregates.add(result)
+            if entries is None:
+                continue
+
+            if raw_out and result.opcode_codes is not None:
+                names = registry.decode(registry.remap(result.opcode_codes, result.opcode_names))
+                raw_out.writelines(f"{name},{gas!r},{result.operation_name}\n"
+                                   for name, gas in zip(names, result.gas_units))
+
+            print(f"Extracted {entries} opcode entries from {result.operation_name}")
+    finally:
+        if raw_out:
+            raw_out.close()
+
+    df, opcode_stats = aggregates.frames()
+    if df is None:
+        return None, None, None, None
+    return df, opcode_stats, aggregates.function_stats, aggregates.function_opcode_stats
+
+def analyze_gas_profiling(parser='stream', verify_parser=False, jobs=1,
+                          cache_file=TRACE_CACHE_FILE, cache_max_entries=TRACE_CACHE_MAX_ENTRIES,
+                          raw_format='csv', ingest='trace', cross_check=False, report=True,
+                          report_mode='static', aggregate='frame', write_raw=False,
+                          repeat_stats=False, confidence=0.95, variable_cv=1e-3, fit_model=False,
+                          baseline=None, store=None, flamegraphs=False, timer=None,
+                          report_dirs=(GAS_PROFILING_DIR,), shard=None):
+    """Analyze every report in gas-profiling/ and write the statistics, data files and report
+
+    report_dirs lists the directories holding the txn-* reports, and shard,
+    an (index, count) pair, restricts the analysis to one shard of them.
+    store, a StoreOptions, appends the run to the results database.
+    timer, a StageTimer, receives the time, peak memory and item counts of
+    every stage and the parse timings of every report.
+    """
+    timer = timer or StageTimer()
+    report_dirs = [Path(report_dir) for report_dir in report_dirs]
+
+    # Check if a directory exists
+    if not any(report_dir.exists() for report_dir in report_dirs):
+        print(f"Gas profiling directory not found at: {', '.join(map(str, report_dirs))}")
+        return
+
+    benchmark_dirs = discover_benchmark_dirs(report_dirs, shard)
+    timer.lap('discovery', files=len(benchmark_dirs))
+
+    # Iterate through all benchmark directories
+    cache_entries = load_trace_cache(cache_file) if cache_file else None
+    # Per-line rows are only kept for the outputs that read them back
+    keep_rows = write_raw or cross_check or repeat_stats or (store is not None and store.raw)
+    options = ParseOptions(parser, verify_parser, ingest, aggregate, keep_rows)
+    results = ingest_with_cache(benchmark_dirs, options, jobs, cache_entries, timer)
+    if cache_file:
+        save_trace_cache(cache_file, cache_entries, cache_max_entries)
+    timer.lap('parsing', reports=len(results),
+              trace_lines=sum(result.parse_profile.trace_lines for result in results if result.parse_profile))
+
+    if ingest == 'table':
+        df, opcode_stats = aggregate_execution_tables(benchmark_dirs, results)
+        if df is None:
+            print("\nNo opcode data was collected.")
+            return
+
+        # The per-line trace is not read in this mode; save the aggregated rows instead
+        raw_file = EXECUTION_TABLE_FILE
+        df.to_csv(raw_file, index=False)
+        print(f"\nAggregated opcode data saved to {raw_file}")
+        function_stats = function_opcode_stats = None
+    elif aggregate == 'stream':
+        if write_raw and raw_format != 'csv':
+            print(f"Streaming aggregation writes raw rows as CSV only, ignoring --raw-format {raw_format}")
+        raw_file = RAW_OUTPUT_FILES['csv'] if write_raw else None
+        df, opcode_stats, function_stats, function_opcode_stats = aggregate_streaming(
+            benchmark_dirs, results, raw_file)
+        if df is None:
+            print("\nNo opcode data was collected.")
+            return
+
+        if cross_check:
+            mismatched_reports = [benchmark_dir.name for benchmark_dir, result in zip(benchmark_dirs, results)
+                                  if result.opcode_codes is not None
+                                  and not cross_check_execution_table(benchmark_dir, result)]
+            print(f"\nExecution table cross-check: {len(mismatched_reports)} of {len(benchmark_dirs)} reports disagree")
+
+        # df holds one row per (opcode, benchmark) in this mode
+        benchmark_stats_file = OPCODE_BENCHMARK_STATS_FILE
+        df.to_csv(benchmark_stats_file, index=False)
+        print(f"\nPer-benchmark opcode statistics saved to {benchmark_stats_file}")
+        if raw_file:
+            print(f"Raw opcode data saved to {raw_file}")
+        else:
+            raw_file = benchmark_stats_file
+    else:
+        # Rows stay registry IDs and benchmark indices until the frame is built
+        registry = load_opcode_registry()
+        code_chunks = []
+        gas_chunks = []
+        benchmark_names = []
+        benchmark_index = {}
+        benchmark_chunks = []
+        function_stats = {}
+        function_opcode_stats = {}
+        mismatched_reports = []
+        for benchmark_dir, result in zip(benchmark_dirs, results):
+            print(f"\nProcessing benchmark: {benchmark_dir.name}")
+
+            if result.opcode_codes is not None:
+                code_chunks.append(registry.remap(result.opcode_codes, result.opcode_names))
+                gas_chunks.append(np.frombuffer(result.gas_units, dtype=np.float64))
+                benchmark = benchmark_index.setdefault(result.operation_name, len(benchmark_names))
+                if benchmark == len(benchmark_names):
+                    benchmark_names.append(result.operation_name)
+                benchmark_chunks.append(np.full(len(result.gas_units), benchmark, dtype=np.uint32))
+                merge_call_stats(function_stats, result.function_stats)
+                merge_call_stats(function_opcode_stats, result.function_opcode_stats)
+                print(f"Extracted {len(result.gas_units)} opcode entries from {result.operation_name}")
+
+                if cross_check and not cross_check_execution_table(benchmark_dir, result):
+                    mismatched_reports.append(benchmark_dir.name)
+
+        if cross_check:
+            print(f"\nExecution table cross-check: {len(mismatched_reports)} of {len(benchmark_dirs)} reports disagree")
+
+        if not any(len(chunk) for chunk in code_chunks):
+            print("\nNo opcode data was collected.")
+            return
+
+        # Opcode and benchmark are dictionary-encoded; names are only materialized on output
+        df = pd.DataFrame({
+            'opcode': registry.categorical(np.concatenate(code_chunks).astype(registry.code_dtype())),
+            'gas_units': np.concatenate(gas_chunks),
+            'benchmark': pd.Categorical.from_codes(np.concatenate(benchmark_chunks), benchmark_names)
+        })
+
+        # Group by opcode and calculate statistics
+        opcode_stats = df.groupby('opcode', observed=True)['gas_units'].agg([
+            'count',
+            'mean',
+            'min',
+            'max',
+            'sum'
+        ]).round(6)  # More precision for gas units
+
+        # Save raw opcode data
+        raw_file = save_raw_opcode_data(df, raw_format)
+        print(f"\nRaw opcode data saved to {raw_file}")
+
+    # Add medians, confidence intervals and the variable-cost test across repeated runs
+    if repeat_stats:
+        opcode_stats = opcode_stats.join(save_repeated_run_statistics(results, confidence, variable_cv))
 
     # Save opcode statistics to a separate CSV
     stats_file = 'opcode_statistics.csv'
     opcode_stats.to_csv(stats_file)
     print(f"Opcode statistics saved to {stats_file}")
 
-    # Track opcodes coverage
-    track_opcode_coverage(opcode_stats)
+    # Save inclusive/exclusive gas per function and per (function, opcode) pair
+    if function_stats is not None:
+        save_call_stats(function_stats, function_opcode_stats)
+    timer.lap('aggregation', rows=len(df), opcodes=len(opcode_stats))
+
+    # Save storage, state read/write and dependency costs per benchmark
+    save_io_statistics(results)
+
+    # Solve for per-opcode unit costs and the per-transaction overhead across all benchmarks
+    if fit_model:
+        save_cost_model(results)
+
+    # Isolate the marginal cost of every benchmark over the baseline benchmark
+    if baseline:
+        save_marginal_costs(results, baseline)
+
+    # Convert the flamegraph SVGs of every report to folded stacks
+    if flamegraphs:
+        written = export_flamegraphs(benchmark_dirs, FLAMEGRAPH_DIR)
+        print(f"\nFolded stacks of {written} flamegraphs saved to {FLAMEGRAPH_DIR}/")
+
+    # Fit gas against the swept parameters of the benchmarks run as parameter sweeps
+    save_scaling_fits(benchmark_dirs, results, plot=report)
+
+    # Append this run to the results history
+    if store is not None:
+        try:
+            with closing(open_results_db(store.db_file)) as conn:
+                run_id = store_run(conn, results, store.run_label,
+                                   ', '.join(str(d.resolve()) for d in report_dirs), store.raw)
+            print(f"\nResults stored as run {run_id} in {store.db_file}")
+        except Exception as e:
+            print(f"Error storing results in {store.db_file}: {e}")
+
+    timer.lap('analyses')
+
+    # Track opcodes coverage
+    catalogue = load_opcode_catalogue()
+    coverage_df = track_opcode_coverage(opcode_stats, catalogue)
+    timer.lap('coverage', catalogue_opcodes=len(coverage_df) if coverage_df is not None else 0)
+
+    # Print summary
+    print("\n=== Opcode Gas Usage Summary ===")
+    print(f"\nTotal unique opcodes found: {len(opcode_stats)}")
+    if not opcode_stats.empty:
+        print("\nTop 10 most gas-intensive opcodes (by average cost):")
+        print(opcode_stats.sort_values('mean', ascending=False).head(10))
+    
+    # Generate HTML report
+    if report and report_mode == 'interactive':
+        generate_interactive_report(df, opcode_stats, raw_file, opcode_type_lookup(catalogue), coverage_df)
+    elif report:
+        generate_html_report(df, opcode_stats, raw_file, opcode_type_lookup(catalogue), jobs, timer)
+    timer.lap('html')
+
+def report_ready(benchmark_dir, first_seen, settle=WATCH_SETTLE_SECONDS):
+    """Whether a report directory first seen at first_seen (monotonic) has an index.html quiet for settle seconds"""
+    html_file = benchmark_dir / 'index.html'
+    if time.monotonic() - first_seen < settle or not html_file.exists():
+        return False
+    return time.time() - html_file.stat().st_mtime >= settle
+
+def write_aggregate_outputs(aggregates, catalogue, report=True, jobs=1):
+    """Rewrite the statistics, coverage and optionally the HTML report from StreamingAggregates"""
+    df, opcode_stats = aggregates.frames()
+    if df is None:
+        return
+    try:
+        df.to_csv(OPCODE_BENCHMARK_STATS_FILE, index=False)
+        opcode_stats.to_csv('opcode_statistics.csv')
+        print(f"Opcode statistics saved to opcode_statistics.csv and {OPCODE_BENCHMARK_STATS_FILE}")
+        aggregates.module_frame().to_csv(MODULE_OPCODE_STATS_FILE, index=False)
+        print(f"Per-function opcode statistics saved to {MODULE_OPCODE_STATS_FILE}")
+        if aggregates.function_stats:
+            save_call_stats(aggregates.function_stats, aggregates.function_opcode_stats)
+        track_opcode_coverage(opcode_stats, catalogue)
+        if report:
+            generate_html_report(df, opcode_stats, OPCODE_BENCHMARK_STATS_FILE, opcode_type_lookup(catalogue), jobs)
+    except Exception as e:
+        print(f"Error writing outputs: {e}")
+
+def write_partial_aggregates(output, report_dirs=(GAS_PROFILING_DIR,), shard=None, jobs=1, parser='stream',
+                             ingest='trace', cache_file=TRACE_CACHE_FILE, cache_max_entries=TRACE_CACHE_MAX_ENTRIES):
+    """Parse a shard of the reports and save its partial aggregates to output
+
+    The file holds the RunningStats of every (benchmark, opcode) pair with
+    the address, module and function of the benchmark, so the files of any
+    number of shards merge into exact global statistics. Returns whether
+    the file was written.
+    """
+    benchmark_dirs = discover_benchmark_dirs(report_dirs, shard)
+    cache_entries = load_trace_cache(cache_file) if cache_file else None
+    options = ParseOptions(parser, ingest=ingest, aggregate='stream', keep_rows=False)
+    results = ingest_with_cache(benchmark_dirs, options, jobs, cache_entries)
+    if cache_file:
+        save_trace_cache(cache_file, cache_entries, cache_max_entries)
+
+    aggregates = StreamingAggregates()
+    for result in results:
+        aggregates.add(result)
+    if not aggregates.pairs:
+        # An empty shard still writes the header, so merging every shard's file keeps working
+        print("\nNo opcode data was collected.")
+
+    partial = aggregates.partial_frame()
+    try:
+        partial.to_csv(output, index=False)
+    except Exception as e:
+        print(f"Error writing partial aggregates to {output}: {e}")
+        return False
+    shard_name = f"shard {shard[0]}/{shard[1]}" if shard is not None else "all reports"
+    print(f"Partial aggregates of {aggregates.reports} reports ({shard_name}, {len(aggregates.benchmark_reports)} "
+          f"benchmarks, {len(partial)} rows) saved to {output}")
+    return True
+
+def merge_partial_aggregates(partial_files, report=True, jobs=1, output=None):
+    """Merge partial aggregate files into the global statistics and coverage outputs
+
+    The reports themselves are not read. output, when given, receives the
+    merged partial aggregates, which merge again like any shard. Returns
+    whether every file could be read.
+    """
+    aggregates = StreamingAggregates()
+    for partial_file in partial_files:
+        try:
+            # Round-trip parsing keeps the merged moments exact
+            aggregates.add_partial(pd.read_csv(partial_file, keep_default_na=False, float_precision='round_trip',
+                                               dtype={'benchmark': str, 'address': str, 'module': str,
+                                                      'function': str, 'opcode': str}))
+        except Exception as e:
+            print(f"Error reading partial aggregates {partial_file}: {e}")
+            return False
+    if not aggregates.pairs:
+        print("No opcode data in the partial aggregates.")
+        return False
+
+    print(f"Merged {len(partial_files)} partial aggregate files: {aggregates.reports} reports, "
+          f"{len(aggregates.benchmark_reports)} benchmarks, {len(aggregates.pairs)} (opcode, benchmark) pairs")
+    write_aggregate_outputs(aggregates, load_opcode_catalogue(), report, jobs)
+    if output:
+        aggregates.partial_frame().to_csv(output, index=False)
+        print(f"Merged partial aggregates saved to {output}")
+    return True
+
+def write_watch_outputs(aggregates, catalogue, report=True, jobs=1):
+    """Rewrite the outputs from the watch aggregates, under a timestamped header"""
+    if not aggregates.pairs:
+        return
+    opcodes = len({opcode for opcode, _ in aggregates.pairs})
+    print(f"\n=== {time.strftime('%H:%M:%S')}: {aggregates.reports} reports, {opcodes} opcodes ===")
+    write_aggregate_outputs(aggregates, catalogue, report, jobs)
+
+def add_watched_report(aggregates, benchmark_dir, options):
+    """Parse a new report into the watch aggregates and return whether it added any opcode data"""
+    result = process_benchmark_dir(benchmark_dir, options)
+    entries = aggregates.add(result)
+    if entries is None:
+        return False
+    print(f"Added {entries} opcode entries from {result.operation_name} ({aggregates.reports} reports)")
+    return True
+
+def stop_watch(signum, frame):
+    """Signal handler ending watch mode"""
+    raise KeyboardInterrupt
+
+def watch_gas_profiling(interval=WATCH_WRITE_INTERVAL, settle=WATCH_SETTLE_SECONDS, polling=False, report=True,
+                        jobs=1, parser='stream', cache_file=TRACE_CACHE_FILE, idle_exit=None,
+                        cache_max_entries=TRACE_CACHE_MAX_ENTRIES):
+    """Keep the opcode statistics up to date while reports land in gas-profiling/
+
+    Reports already there are ingested first, through the trace cache. Each
+    new txn-* directory is then parsed on its own once it has settled and
+    folded into StreamingAggregates, so an update costs time proportional to
+    the new report. The outputs are rewritten at most every interval
+    seconds, and once more on exit. Watching stops on Ctrl-C or SIGTERM, or
+    after idle_exit seconds without a new report. Reports removed while watching
+    stay counted.
+    """
+    gas_profiling_dir = Path(GAS_PROFILING_DIR)
+    gas_profiling_dir.mkdir(exist_ok=True)
+    options = ParseOptions(parser, aggregate='stream', keep_rows=False)
+    catalogue = load_opcode_catalogue()
+    aggregates = StreamingAggregates()
+
+    # SIGTERM stops the watch like Ctrl-C, so a watcher run in the background still flushes its outputs
+    signal.signal(signal.SIGTERM, stop_watch)
+
+    # Watch before listing, so no directory arrives unnoticed in between
+    watcher = DirectoryWatcher(gas_profiling_dir, polling)
+    now = time.monotonic()
+    existing = discover_benchmark_dirs([gas_profiling_dir])
+    settled = [d for d in existing if report_ready(d, now - settle, settle)]
+    pending = {d.name: now for d in existing if d not in settled}
+    seen = {d.name for d in settled}
+
+    cache_entries = load_trace_cache(cache_file) if cache_file else None
+    for result in ingest_with_cache(settled, options, jobs, cache_entries):
+        aggregates.add(result)
+    if cache_file:
+        save_trace_cache(cache_file, cache_entries, cache_max_entries)
+
+    print(f"\nWatching {gas_profiling_dir}/ with {watcher.mode}, {aggregates.reports} reports so far "
+          f"(Ctrl-C to stop)")
+    dirty = aggregates.reports > 0
+    last_write = float('-inf')
+    last_report = time.monotonic()
+    try:
+        while True:
+            if dirty and time.monotonic() - last_write >= interval:
+                write_watch_outputs(aggregates, catalogue, report, jobs)
+                last_write = time.monotonic()
+                dirty = False
+            if idle_exit is not None and not pending and time.monotonic() - last_report >= idle_exit:
+                print(f"\nNo new reports for {idle_exit:g}s, stopping")
+                break
+
+            for name in watcher.wait(WATCH_TICK_SECONDS):
+                if name.startswith('txn-') and name not in seen:
+                    pending.setdefault(name, time.monotonic())
+
+            for name, first_seen in sorted(pending.items()):
+                benchmark_dir = gas_profiling_dir / name
+                if not benchmark_dir.is_dir():
+                    del pending[name]
+                    continue
+                if not report_ready(benchmark_dir, first_seen, settle):
+                    continue
+                del pending[name]
+                seen.add(name)
+                last_report = time.monotonic()
+                dirty = add_watched_report(aggregates, benchmark_dir, options) or dirty
+    except KeyboardInterrupt:
+        print("\nStopping watch")
+    finally:
+        watcher.close()
+
+    # Reports still settling when the watch stopped are complete unless they lack an index.html
+    for name in sorted(pending):
+        if (gas_profiling_dir / name / 'index.html').exists():
+            dirty = add_watched_report(aggregates, gas_profiling_dir / name, options) or dirty
+
+    if dirty:
+        write_watch_outputs(aggregates, catalogue, report, jobs)
+
+def save_repeated_run_statistics(results, confidence=0.95, variable_cv=1e-3):
+    """Save per-benchmark and per-(benchmark, opcode) statistics across repeated runs
+
+    Returns the per-opcode statistics, indexed by opcode, with columns
+    prefixed by 'run_' except for the 'variable' flag.
+    """
+    benchmark_df, benchmark_opcode_df, opcode_df = repeated_run_statistics(results, confidence, variable_cv)
+
+    benchmark_df.to_csv(BENCHMARK_RUN_STATS_FILE)
+    benchmark_opcode_df.to_csv(BENCHMARK_OPCODE_RUN_STATS_FILE, index=False)
+    print(f"\nRepeated-run statistics saved to {BENCHMARK_RUN_STATS_FILE} and {BENCHMARK_OPCODE_RUN_STATS_FILE}")
+
+    single_run = benchmark_df.index[benchmark_df['runs'] < 2]
+    if len(single_run):
+        print(f"Warning: {len(single_run)} benchmarks ran only once, their intervals are degenerate")
+    rejected = benchmark_df[benchmark_df['rejected'] > 0]
+    for benchmark, row in rejected.iterrows():
+        print(f"Rejected {int(row['rejected'])} of {int(row['runs'])} runs of {benchmark} as outliers")
+
+    print(f"\nMedian gas per benchmark ({confidence:.0%} confidence interval):")
+    for benchmark, row in benchmark_df.iterrows():
+        print(f"  {benchmark}: {row['median']:.6f} [{row['ci_low']:.6f}, {row['ci_high']:.6f}], CV {row['cv']:.4%}")
+    print(f"Variable-cost opcodes: {', '.join(opcode_df.index[opcode_df['variable']]) or 'none'}")
+
+    return opcode_df.rename(columns=lambda c: c if c == 'variable' else f'run_{c}')
+
+def save_io_statistics(results):
+    """Save storage and IO metrics per benchmark and the per-resource section records"""
+    io_stats, records = summarize_sections(results)
+    if io_stats is None:
+        return None
+
+    io_stats.round(9).to_csv(IO_STATS_FILE)
+    records.round(9).to_csv(SECTION_RECORDS_FILE, index=False)
+    print(f"Storage and IO statistics saved to {IO_STATS_FILE}, per-resource records to {SECTION_RECORDS_FILE}")
+
+    io_heavy = io_stats[io_stats['io_share'] > 0.5].index
+    if len(io_heavy):
+        print(f"Benchmarks dominated by storage and IO: {', '.join(io_heavy)}")
+    return io_stats
+
+def save_cost_model(results, worst=5):
+    """Fit the least-squares cost model and save it along with its residuals per benchmark"""
+    hits, opcode_gas, totals = build_model_system(results)
+    if hits is None:
+        print("\nNo transaction totals found, skipping the cost model")
+        return None
+
+    unit_costs, overhead, residuals = fit_cost_model(hits, opcode_gas, totals)
+    cost_model_table(unit_costs, overhead, hits, opcode_gas).round(9).to_csv(COST_MODEL_FILE)
+    residuals.round(9).to_csv(COST_MODEL_RESIDUALS_FILE)
+    print(f"\nCost model saved to {COST_MODEL_FILE}, residuals to {COST_MODEL_RESIDUALS_FILE}")
+
+    measured = residuals['measured']
+    spread = ((measured - measured.mean()) ** 2).sum()
+    r_squared = 1 - (residuals['residual'] ** 2).sum() / spread if spread > 0 else 1.0
+    print(f"Fitted {len(unit_costs)} opcode costs on {len(hits)} benchmarks: "
+          f"overhead {overhead:.6f} gas per transaction, R^2 {r_squared:.6f}")
+    print("Benchmarks worst explained by the model:")
+    for benchmark, row in residuals.reindex(residuals['relative_residual'].abs()
+                                            .sort_values(ascending=False).index).head(worst).iterrows():
+        print(f"  {benchmark}: measured {row['measured']:.6f}, predicted {row['predicted']:.6f} "
+              f"({row['relative_residual']:+.2%})")
+    return unit_costs, overhead
+
+def save_marginal_costs(results, baseline=DEFAULT_BASELINE):
+    """Subtract the baseline benchmark from every other benchmark and save the marginal costs"""
+    hits, opcode_gas, totals = build_model_system(results)
+    if hits is None or baseline not in hits.index:
+        print(f"\nBaseline benchmark {baseline} not found, skipping baseline subtraction")
+        return None
+
+    marginal_mix, marginal_gas = subtract_baseline(hits, opcode_gas, totals, baseline)
+    marginal_mix.round(9).to_csv(MARGINAL_MIX_FILE, index=False)
+    marginal_gas.round(9).to_csv(MARGINAL_GAS_FILE)
+    print(f"\nMarginal costs over {baseline} saved to {MARGINAL_MIX_FILE} and {MARGINAL_GAS_FILE}")
+
+    below_baseline = marginal_mix.loc[marginal_mix['hits'] < 0, 'benchmark'].unique()
+    if len(below_baseline):
+        print(f"Warning: {len(below_baseline)} benchmarks run fewer of some opcodes than {baseline}: "
+              f"{', '.join(below_baseline)}")
+    print("Marginal gas per benchmark (execution + other):")
+    for benchmark, row in marginal_gas.iterrows():
+        print(f"  {benchmark}: {row['marginal_total']:.6f} "
+              f"({row['marginal_execution']:.6f} + {row['marginal_other']:.6f})")
+    return marginal_mix, marginal_gas
+
+def format_scaling_curve(fit):
+    """Format a fitted scaling curve as an equation in its parameter"""
+    parameter = fit['parameter']
+    leading_terms = {'n log n': f'{parameter} log {parameter}', 'quadratic': f'{parameter}^2'}
+    terms = [f"{fit['intercept']:.6f}"]
+    if fit['complexity'] != 'constant':
+        terms.append(f"{fit['linear_coefficient']:.6g} {parameter}")
+    if fit['complexity'] in leading_terms:
+        terms.append(f"{fit['leading_coefficient']:.6g} {leading_terms[fit['complexity']]}")
+    return ' + '.join(terms)
+
+def save_scaling_fits(benchmark_dirs, results, plot=True):
+    """Fit the complexity of every parameter sweep and save the fits, points and curves
+
+    The gas of a report is its transaction total, or its execution gas when
+    the report has no total. Does nothing when no report comes from a sweep.
+    """
+    points = []
+    for benchmark_dir, result in zip(benchmark_dirs, results):
+        record = load_invocation_record(benchmark_dir)
+        if record is None or not record.get('params'):
+            continue
+        gas = result.total_gas
+        if gas is None:
+            gas = sum(opcode_gas for _, opcode_gas in run_opcode_totals(result).values()) or None
+        if gas is not None:
+            points.append({'function': record['function'], 'gas': gas, **record['params']})
+    if not points:
+        return
+
+    try:
+        points = pd.DataFrame(points)
+        fits, curves = fit_scaling(points)
+    except Exception as e:
+        print(f"Error fitting gas scaling: {e}")
+        return
+    points.to_csv(SCALING_POINTS_FILE, index=False)
+    print(f"\nGas of {len(points)} sweep points saved to {SCALING_POINTS_FILE}")
+    if fits.empty:
+        print("No benchmark sweeps more than one value of a parameter")
+        return
+
+    fits.round(9).to_csv(SCALING_FILE, index=False)
+    print(f"Gas scaling fits saved to {SCALING_FILE}")
+    print("\n=== Gas scaling ===")
+    for _, fit in fits.iterrows():
+        fixed = f" ({fit['fixed']})" if fit['fixed'] else ''
+        print(f"  {fit['function']} / {fit['parameter']}{fixed}: {fit['complexity']}, "
+              f"gas = {format_scaling_curve(fit)}, R^2 = {fit['r2']:.6f}")
+
+    if plot:
+        try:
+            plot_scaling_curves(curves, SCALING_PLOT_FILE)
+            print(f"Scaling curves saved to {SCALING_PLOT_FILE}")
+        except Exception as e:
+            print(f"Error creating scaling plot: {e}")
+
+def load_opcode_catalogue(all_opcodes_path=None):
+    """Return the Opcode, Type and bytecode Code columns of all_opcodes.csv, with lower-cased opcodes
 
-    # Print summary
-    print("\n=== Opcode Gas Usage Summary ===")
-    print(f"\nTotal unique opcodes found: {len(opcode_stats)}")
-    if not opcode_stats.empty:
-        print("\nTop 10 most gas-intensive opcodes (by average cost):")
-        print(opcode_stats.sort_values('mean', ascending=False).head(10))
-    
-    # Generate HTML report
-    generate_html_report(df, opcode_stats)
+    The catalogue is read once, by the opcode registry. Returns None when it
+    cannot be found.
+    """
+    all_opcodes_path = find_opcode_catalogue(all_opcodes_path)
+    if not all_opcodes_path.exists():
+        print(f"Error: all_opcodes.csv not found at {all_opcodes_path}")
+        return None
+    return load_opcode_registry(all_opcodes_path).catalogue
 
-def track_opcode_coverage(opcode_stats):
-    """Track which opcodes have been benchmarked and which are still missing"""
+def opcode_type_lookup(catalogue):
+    """Return an opcode -> type Series built from the catalogue, or None if it has no types"""
+    if catalogue is None or 'Type' not in catalogue.columns:
+        return None
+    # The first entry wins for opcodes listed more than once
+    return catalogue.drop_duplicates('Opcode').set_index('Opcode')['Type']
+
+def track_opcode_coverage(opcode_stats, catalogue=None):
+    """Track which opcodes have been benchmarked and which are still missing
+
+    Coverage is computed with a single hashed membership join between the
+    catalogue and the benchmarked opcodes. Returns the coverage DataFrame, or
+    None if the catalogue is unavailable.
+    """
     print("\n=== Opcode Coverage Analysis ===")
     
     try:
-        # Load the all_opcodes.csv file
-        all_opcodes_path = Path('all_opcodes.csv')
-        if not all_opcodes_path.exists():
-            print(f"Error: all_opcodes.csv not found at {all_opcodes_path}")
-            return
-            
-        all_opcodes_df = pd.read_csv(all_opcodes_path)
-        
-        # Convert all opcodes to lowercase for consistent comparison
-        all_opcodes_df['Opcode'] = all_opcodes_df['Opcode'].str.lower()
-        
-        # Get the set of all opcodes from the CSV
-        all_opcodes_set = set(all_opcodes_df['Opcode'].values)
-        
-        # Get the set of benchmarked opcodes (convert to lowercase)
-        benchmarked_opcodes = set(opcode.lower() for opcode in opcode_stats.index)
-        
-        # Calculate the difference to find missing opcodes
-        missing_opcodes = all_opcodes_set - benchmarked_opcodes
-        
+        if catalogue is None:
+            catalogue = load_opcode_catalogue()
+        if catalogue is None:
+            return None
+
+        # Benchmarked opcodes; interned names already match the lower-cased catalogue
+        benchmarked_opcodes = opcode_stats.index.unique()
+
         # Calculate coverage percentage
-        total_opcodes = len(all_opcodes_set)
+        total_opcodes = catalogue['Opcode'].nunique()
         benchmarked_count = len(benchmarked_opcodes)
         coverage_percentage = (benchmarked_count / total_opcodes) * 100 if total_opcodes > 0 else 0
         
@@ -171,47 +1717,43 @@ def track_opcode_coverage(opcode_stats):
         print(f"Total opcodes in spec: {total_opcodes}")
         print(f"Opcodes benchmarked: {benchmarked_count}")
         print(f"Coverage: {coverage_percentage:.2f}%")
-        
+
+        opcode_types = opcode_type_lookup(catalogue)
+        coverage_df = pd.DataFrame({
+            'Opcode': catalogue['Opcode'],
+            'Type': catalogue['Opcode'].map(opcode_types) if opcode_types is not None else 'Unknown',
+            'Status': np.where(catalogue['Opcode'].isin(benchmarked_opcodes), 'Benchmarked', 'Missing')
+        })
+
         # Save coverage data to CSV
-        coverage_data = []
-        
-        for opcode in all_opcodes_df['Opcode']:
-            # Create row with coverage info
-            opcode_type = all_opcodes_df.loc[all_opcodes_df['Opcode'] == opcode, 'Type'].values[0] if 'Type' in all_opcodes_df.columns else 'Unknown'
-            is_benchmarked = opcode.lower() in benchmarked_opcodes
-            status = "Benchmarked" if is_benchmarked else "Missing"
-            
-            coverage_data.append({
-                'Opcode': opcode,
-                'Type': opcode_type,
-                'Status': status
-            })
-        
-        # Create and save coverage DataFrame
-        coverage_df = pd.DataFrame(coverage_data)
         coverage_file = 'opcode_coverage.csv'
         coverage_df.to_csv(coverage_file, index=False)
         print(f"Opcode coverage data saved to {coverage_file}")
         
         # Print missing opcodes by type if available
-        if 'Type' in all_opcodes_df.columns:
+        missing_df = coverage_df[coverage_df['Status'] == 'Missing']
+        if opcode_types is not None:
             print("\nMissing opcodes by type:")
-            missing_df = coverage_df[coverage_df['Status'] == 'Missing']
-            # Sort missing_df by Type first, then by Opcode for consistent display
-            missing_df = missing_df.sort_values(by=['Type', 'Opcode'])
-            for opcode_type in sorted(missing_df['Type'].unique()):
-                type_opcodes = missing_df[missing_df['Type'] == opcode_type]['Opcode'].tolist()
-                if type_opcodes:  # Only print if there are missing opcodes of this type
-                    print(f"  {opcode_type}: {', '.join(type_opcodes)}")
+            # Sort by Type first, then by Opcode for consistent display
+            missing_df = missing_df.assign(Type=missing_df['Type'].fillna('Unknown')).sort_values(by=['Type', 'Opcode'])
+            for opcode_type, type_opcodes in missing_df.groupby('Type', sort=True)['Opcode']:
+                print(f"  {opcode_type}: {', '.join(type_opcodes)}")
         else:
             print("\nMissing opcodes:")
-            print(", ".join(sorted(missing_opcodes)))
+            print(", ".join(sorted(missing_df['Opcode'].unique())))
+
+        return coverage_df
             
     except Exception as e:
         print(f"Error analyzing opcode coverage: {e}")
+        return None
+
+def generate_html_report(df, opcode_stats, raw_file=RAW_OUTPUT_FILES['csv'], opcode_types=None, jobs=1,
+                         timer=None):
+    """Generate an HTML report with tables and visualizations
 
-def generate_html_report(df, opcode_stats):
-    """Generate an HTML report with tables and visualizations"""
+    timer, a StageTimer, gets a plotting lap once the figures are drawn.
+    """
     print("\nGenerating HTML report...")
     
     # Create directory for plots
@@ -219,14 +1761,16 @@ def generate_html_report(df, opcode_stats):
     plots_dir.mkdir(exist_ok=True)
     
     # Create plots and get their base64 encoded strings
-    plot_data = create_visualizations(df, opcode_stats)
+    plot_data = create_visualizations(df, opcode_stats, opcode_types, jobs)
+    if timer is not None:
+        timer.lap('plotting', figures=len(plot_data))
     
     # Add coverage chart if opcode_coverage.csv exists
     coverage_chart = ""
     coverage_path = Path('opcode_coverage.csv')
     if coverage_path.exists():
         try:
-            coverage_df = pd.read_csv(coverage_path)
+            coverage_df = pd.read_csv(coverage_path, usecols=['Status'])
             coverage_data = coverage_df['Status'].value_counts()
             coverage_chart = create_coverage_chart(coverage_data)
         except Exception as e:
@@ -504,6 +2048,21 @@ def generate_html_report(df, opcode_stats):
                 </table>
             </div>
 
+            <h2>Storage &amp; IO</h2>
+            <div class="table-container">
+                <table class="table table-striped table-hover" id="ioTable">
+                    <thead class="table-dark">
+                        <tr>
+                            <th>Benchmark</th>
+                            {''.join(f'<th>{title}</th>' for _, title, _ in IO_REPORT_COLUMNS)}
+                        </tr>
+                    </thead>
+                    <tbody>
+                        {generate_io_rows()}
+                    </tbody>
+                </table>
+            </div>
+
             <h2>Opcode Coverage</h2>
             <div class="table-container">
                 <table class="table table-striped table-hover" id="coverageTable">
@@ -523,9 +2082,10 @@ def generate_html_report(df, opcode_stats):
             <h2>Raw Data</h2>
             <p>The complete dataset is available in CSV format:</p>
             <ul>
-                <li><a href="opcode_gas_units.csv">Raw opcode gas units data</a></li>
+                <li><a href="{raw_file}">Raw opcode gas units data</a></li>
                 <li><a href="opcode_statistics.csv">Opcode statistics</a></li>
                 <li><a href="opcode_coverage.csv">Opcode coverage data</a></li>
+                <li><a href="{IO_STATS_FILE}">Storage and IO statistics</a></li>
             </ul>
         </div>
     """
@@ -540,13 +2100,169 @@ def generate_html_report(df, opcode_stats):
     
     print(f"HTML report generated: {html_file}")
 
+def build_report_payload(df, opcode_stats, opcode_types=None, coverage_df=None):
+    """Build the compact, column-oriented data behind the interactive report
+
+    Opcode types are dictionary-encoded as indices into 'types'. The payload
+    grows with the number of distinct opcodes, not with the number of trace
+    lines.
+    """
+    if opcode_types is None:
+        opcode_types = opcode_type_lookup(load_opcode_catalogue())
+    if coverage_df is None and Path('opcode_coverage.csv').exists():
+        coverage_df = pd.read_csv('opcode_coverage.csv', usecols=['Opcode', 'Type', 'Status'])
+
+    stats = opcode_stats.sort_values('mean', ascending=False)
+    stats_types = stats.index.map(opcode_types) if opcode_types is not None else None
+    stats_types = pd.Series(stats_types, dtype=object).fillna('Unknown') if stats_types is not None \
+        else pd.Series(['Unknown'] * len(stats))
+
+    coverage_types = coverage_df['Type'].fillna('Unknown') if coverage_df is not None else pd.Series([], dtype=object)
+    types = pd.Categorical(pd.concat([stats_types, coverage_types], ignore_index=True)).categories
+    type_index = {name: i for i, name in enumerate(types)}
+
+    payload = {
+        'summary': {
+            'opcodes': len(opcode_stats),
+            'benchmarks': int(df['benchmark'].nunique()),
+            'generated': pd.Timestamp.now().strftime('%Y-%m-%d %H:%M:%S')
+        },
+        'types': list(types),
+        'stats': {
+            'opcode': stats.index.tolist(),
+            'type': [type_index[t] for t in stats_types],
+            'count': stats['count'].astype('int64').tolist(),
+            'mean': stats['mean'].round(6).tolist(),
+            'min': stats['min'].round(6).tolist(),
+            'max': stats['max'].round(6).tolist(),
+            'sum': stats['sum'].round(6).tolist()
+        },
+        'coverage': None,
+        'io': None
+    }
+    if Path(IO_STATS_FILE).exists():
+        io_stats = pd.read_csv(IO_STATS_FILE, index_col='benchmark')
+        payload['io'] = {
+            'columns': [[title, decimals] for _, title, decimals in IO_REPORT_COLUMNS],
+            'benchmark': io_stats.index.tolist(),
+            'values': [[None if pd.isna(v) else round(float(v), 9) for v in io_stats[column]]
+                       for column, _, _ in IO_REPORT_COLUMNS]
+        }
+    if 'variable' in stats.columns:
+        payload['stats']['variable'] = stats['variable'].astype(int).tolist()
+    if coverage_df is not None:
+        payload['coverage'] = {
+            'opcode': coverage_df['Opcode'].tolist(),
+            'type': [type_index[t] for t in coverage_types],
+            'benchmarked': (coverage_df['Status'] == 'Benchmarked').astype(int).tolist()
+        }
+    return payload
+
+def generate_interactive_report(df, opcode_stats, raw_file=RAW_OUTPUT_FILES['csv'], opcode_types=None,
+                                coverage_df=None):
+    """Generate an HTML report whose charts and tables are drawn client-side from a JSON payload"""
+    print("\nGenerating interactive HTML report...")
+
+    payload = build_report_payload(df, opcode_stats, opcode_types, coverage_df)
+    # Escape '</' so the payload cannot close its <script> element
+    payload_json = json.dumps(payload, separators=(',', ':')).replace('</', '<\\/')
+
+    html_content = f"""<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Move Opcode Gas Analysis</title>
+    <link href="https://cdn.jsdelivr.net/npm/bootstrap@5.3.0-alpha1/dist/css/bootstrap.min.css" rel="stylesheet">
+    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
+    <style>
+        body {{ padding: 20px; }}
+        h1, h2, h3 {{ margin-top: 30px; }}
+        .card {{ margin-bottom: 20px; }}
+        .chart-box {{ position: relative; height: 360px; }}
+        .coverage-indicator {{
+            height: 20px;
+            border-radius: 10px;
+            background: linear-gradient(to right, #28a745 var(--coverage-pct), #dc3545 var(--coverage-pct));
+        }}
+        th[data-col] {{ cursor: pointer; }}
+    </style>
+</head>
+<body>
+    <div class="container">
+        <h1 class="text-center mb-4">Move Opcode Gas Analysis Report</h1>
+
+        <div class="card">
+            <div class="card-header"><h2>Summary</h2></div>
+            <div class="card-body" id="summary"></div>
+        </div>
+
+        <h2>Visualizations</h2>
+        <div class="row">
+            <div class="col-md-6"><div class="card"><div class="card-header"><h3>Top Gas-Intensive Opcodes (Average Cost)</h3></div>
+                <div class="card-body chart-box"><canvas id="chartTopGas"></canvas></div></div></div>
+            <div class="col-md-6"><div class="card"><div class="card-header"><h3>Opcode Frequency</h3></div>
+                <div class="card-body chart-box"><canvas id="chartFrequency"></canvas></div></div></div>
+        </div>
+        <div class="card"><div class="card-header"><h3>Gas Range for Top 10 Gas-Intensive Opcodes</h3></div>
+            <div class="card-body chart-box"><canvas id="chartRange"></canvas></div></div>
+
+        <h2>Opcode Group Analysis</h2>
+        <div class="row">
+            <div class="col-md-6"><div class="card"><div class="card-header"><h3>Average Gas by Opcode Type</h3></div>
+                <div class="card-body chart-box"><canvas id="chartGasByType"></canvas></div></div></div>
+            <div class="col-md-6"><div class="card"><div class="card-header"><h3>Frequency by Opcode Type</h3></div>
+                <div class="card-body chart-box"><canvas id="chartCountByType"></canvas></div></div></div>
+        </div>
+        <div class="card"><div class="card-header"><h3>Coverage by Opcode Type</h3></div>
+            <div class="card-body chart-box"><canvas id="chartCoverageByType"></canvas></div></div>
+
+        <h2>Gas Usage by Opcode Type</h2>
+        <div class="card">
+            <div class="card-header"><select class="form-select" id="groupSelect"></select></div>
+            <div class="card-body chart-box"><canvas id="chartGroup"></canvas></div>
+        </div>
+
+        <h2>Opcode Statistics</h2>
+        <div id="statsTable"></div>
+
+        <h2>Storage &amp; IO</h2>
+        <div id="ioTable"></div>
+
+        <h2>Opcode Coverage</h2>
+        <div id="coverageTable"></div>
+
+        <h2>Raw Data</h2>
+        <p>The complete dataset is available in:</p>
+        <ul>
+            <li><a href="{raw_file}">Raw opcode gas units data</a></li>
+            <li><a href="opcode_statistics.csv">Opcode statistics</a></li>
+            <li><a href="opcode_coverage.csv">Opcode coverage data</a></li>
+            <li><a href="{IO_STATS_FILE}">Storage and IO statistics</a></li>
+        </ul>
+    </div>
+    <script type="application/json" id="report-data">{payload_json}</script>
+"""
+
+    full_html = html_content + INTERACTIVE_REPORT_JS + "\n</body>\n</html>\n"
+
+    html_file = 'opcode_gas_analysis.html'
+    with open(html_file, 'w') as f:
+        f.write(full_html)
+
+    print(f"HTML report generated: {html_file}")
+
 def generate_table_rows(opcode_stats):
     """Generate HTML table rows from the opcode statistics DataFrame"""
     rows = []
     # Sort by mean gas units in descending order
     for opcode, row in opcode_stats.sort_values('mean', ascending=False).iterrows():
-        # Check if mean is different from both min and max
-        is_variable = row['mean'] != row['min'] and row['mean'] != row['max']
+        # Use the repeated-run variable-cost test when available, otherwise
+        # check if mean is different from both min and max
+        if 'variable' in row:
+            is_variable = bool(row['variable'])
+        else:
+            is_variable = row['mean'] != row['min'] and row['mean'] != row['max']
         
         # Apply red text class if gas cost is variable
         mean_class = ' class="text-danger fw-bold"' if is_variable else ''
@@ -591,6 +2307,20 @@ def generate_coverage_rows():
         print(f"Error generating coverage rows: {e}")
         return f"<tr><td colspan='3'>Error loading coverage data: {e}</td></tr>"
 
+def generate_io_rows():
+    """Generate HTML table rows for the storage and IO statistics of every benchmark"""
+    io_path = Path(IO_STATS_FILE)
+    if not io_path.exists():
+        return f"<tr><td colspan='{len(IO_REPORT_COLUMNS) + 1}'>Storage and IO data not available</td></tr>"
+
+    io_stats = pd.read_csv(io_path, index_col='benchmark')
+    rows = []
+    for benchmark, row in io_stats.sort_values('total_gas', ascending=False).iterrows():
+        cells = ''.join(f"<td>{row[column]:.{decimals}f}</td>" if pd.notna(row[column]) else '<td>-</td>'
+                        for column, _, decimals in IO_REPORT_COLUMNS)
+        rows.append(f"<tr><td>{benchmark}</td>{cells}</tr>")
+    return '\n'.join(rows)
+
 def create_coverage_chart(coverage_data):
     """Create a visual coverage indicator for the HTML report"""
     total = coverage_data.sum()
@@ -616,208 +2346,227 @@ def create_coverage_chart(coverage_data):
     </div>
     """
 
-def create_visualizations(df, opcode_stats):
-    """Create visualizations and return them as base64 encoded strings"""
-    plot_data = {}
-    
+def import_plotting():
+    """Import matplotlib on the non-interactive Agg backend, and seaborn, when a figure is drawn"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
     # Set the style for all plots
     plt.style.use('ggplot')
-    
-    # 1. Top gas-intensive opcodes (by average)
-    plt.figure(figsize=(10, 6))
-    top_opcodes = opcode_stats.sort_values('mean', ascending=False).head(15)
-    ax = sns.barplot(x=top_opcodes.index, y=top_opcodes['mean'], palette='viridis')
-    plt.title('Top 15 Gas-Intensive Opcodes (Average Cost)')
-    plt.xlabel('Opcode')
-    plt.ylabel('Average Gas Units')
+    return plt, sns
+
+def encode_figure(plt, fig):
+    """Encode a figure as a base64 PNG string and close it"""
+    buffer = BytesIO()
+    fig.savefig(buffer, format='png', dpi=100)
+    plt.close(fig)
+    return base64.b64encode(buffer.getvalue()).decode('utf-8')
+
+def plot_bar_chart(x, y, title, xlabel, ylabel, palette):
+    """Render a vertical bar chart with rotated category labels"""
+    plt, sns = import_plotting()
+    fig = plt.figure(figsize=(10, 6))
+    sns.barplot(x=x, y=y, palette=palette)
+    plt.title(title)
+    plt.xlabel(xlabel)
+    plt.ylabel(ylabel)
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
-    # Convert plot to base64 string
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100)
-    buffer.seek(0)
-    plot_data['top_gas_intensive'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    plt.close()
-    
-    # 2. Opcode frequency
-    plt.figure(figsize=(10, 6))
-    top_frequent = opcode_stats.sort_values('count', ascending=False).head(15)
-    ax = sns.barplot(x=top_frequent.index, y=top_frequent['count'], palette='mako')
-    plt.title('Top 15 Most Frequent Opcodes')
+    return encode_figure(plt, fig)
+
+def plot_gas_distribution(df_filtered):
+    """Render the gas unit distribution of the top gas-intensive opcodes as a boxplot"""
+    plt, sns = import_plotting()
+    fig = plt.figure(figsize=(12, 6))
+    sns.boxplot(x='opcode', y='gas_units', data=df_filtered, palette='Set3')
+    plt.title('Gas Unit Distribution for Top 10 Gas-Intensive Opcodes')
     plt.xlabel('Opcode')
-    plt.ylabel('Count')
+    plt.ylabel('Gas Units')
     plt.xticks(rotation=45, ha='right')
     plt.tight_layout()
-    # Convert plot to base64 string
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100)
-    buffer.seek(0)
-    plot_data['opcode_frequency'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    plt.close()
-    
+    return encode_figure(plt, fig)
+
+def plot_coverage_by_type(type_coverage):
+    """Render the coverage percentage of each opcode type with benchmarked/total labels"""
+    plt, sns = import_plotting()
+    fig = plt.figure(figsize=(10, 6))
+    sns.barplot(x=type_coverage.index, y=type_coverage['Percentage'], palette='RdYlGn')
+    plt.title('Coverage Percentage by Opcode Type')
+    plt.xlabel('Opcode Type')
+    plt.ylabel('Coverage (%)')
+    plt.xticks(rotation=45, ha='right')
+
+    # Add count labels
+    for i, (_, row) in enumerate(type_coverage.iterrows()):
+        plt.text(i, row['Percentage'] + 2,
+                 f"{row['Benchmarked']}/{row['Total']}",
+                 ha='center', va='bottom', fontsize=9)
+
+    plt.ylim(0, 110)  # Give space for labels
+    plt.tight_layout()
+    return encode_figure(plt, fig)
+
+def plot_type_opcodes(type_opcodes_sorted, opcode_type):
+    """Render the average gas of every opcode of one type as a horizontal bar chart"""
+    plt, sns = import_plotting()
+
+    # Adjust figure height based on number of opcodes
+    fig_height = max(6, min(len(type_opcodes_sorted) * 0.4, 12))
+    fig = plt.figure(figsize=(10, fig_height))
+
+    ax = sns.barplot(x='mean', y=type_opcodes_sorted.index,
+                     data=type_opcodes_sorted, palette='viridis', orient='h')
+
+    plt.title(f'Gas Cost for {opcode_type} Opcodes')
+    plt.ylabel('Opcode')
+    plt.xlabel('Average Gas Units')
+    plt.tight_layout()
+
+    # Add gas value labels
+    for i, v in enumerate(type_opcodes_sorted['mean']):
+        ax.text(v + v*0.01, i, f"{v:.6f}", va='center')
+
+    return encode_figure(plt, fig)
+
+def plot_scaling_curves(curves, path, max_curves=SCALING_PLOT_MAX_CURVES):
+    """Draw the measured gas and fitted curve of every sweep slice, one panel each, into a PNG"""
+    plt, _ = import_plotting()
+    curves = curves[:max_curves]
+    columns = min(3, len(curves))
+    rows = (len(curves) + columns - 1) // columns
+    fig, axes = plt.subplots(rows, columns, figsize=(5 * columns, 4 * rows), squeeze=False)
+    for ax, (fit, n, gas) in zip(axes.flat, curves):
+        grid = np.linspace(n.min(), n.max(), 200)
+        ax.scatter(n, gas, color='tab:blue', label='measured')
+        coefficients = (fit['intercept'], fit['linear_coefficient'], fit['leading_coefficient'])
+        ax.plot(grid, complexity_curve(fit['complexity'], coefficients, grid),
+                color='tab:red', label=f"{fit['complexity']} fit")
+        title = f"{fit['function']}\n{fit['fixed']}" if fit['fixed'] else fit['function']
+        ax.set_title(title, fontsize=9)
+        ax.set_xlabel(fit['parameter'])
+        ax.set_ylabel('Gas Units')
+        ax.legend(fontsize=8)
+    for ax in axes.flat[len(curves):]:
+        ax.set_visible(False)
+    fig.tight_layout()
+    fig.savefig(path, dpi=100)
+    plt.close(fig)
+
+def render_figure(task):
+    """Render a (key, plot_function, kwargs) task and return (key, base64 PNG or None)"""
+    key, plot_function, kwargs = task
+    try:
+        return key, plot_function(**kwargs)
+    except Exception as e:
+        print(f"Error creating {key} plot: {e}")
+        return key, None
+
+def render_figures(tasks, jobs=1):
+    """Render figure tasks, in worker processes when jobs > 1, keeping the task order"""
+    if jobs <= 1 or len(tasks) <= 1:
+        rendered = map(render_figure, tasks)
+        return {key: encoded for key, encoded in rendered if encoded is not None}
+
+    with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as executor:
+        rendered = executor.map(render_figure, tasks)
+        return {key: encoded for key, encoded in rendered if encoded is not None}
+
+def create_visualizations(df, opcode_stats, opcode_types=None, jobs=1):
+    """Create visualizations and return them as base64 encoded strings
+
+    The data behind every figure is prepared here; the figures themselves are
+    drawn by render_figures, in parallel when jobs > 1.
+    """
+    tasks = []
+
+    # 1. Top gas-intensive opcodes (by average)
+    top_opcodes = opcode_stats.sort_values('mean', ascending=False).head(15)
+    tasks.append(('top_gas_intensive', plot_bar_chart, dict(
+        x=top_opcodes.index, y=top_opcodes['mean'], palette='viridis',
+        title='Top 15 Gas-Intensive Opcodes (Average Cost)', xlabel='Opcode', ylabel='Average Gas Units')))
+
+    # 2. Opcode frequency
+    top_frequent = opcode_stats.sort_values('count', ascending=False).head(15)
+    tasks.append(('opcode_frequency', plot_bar_chart, dict(
+        x=top_frequent.index, y=top_frequent['count'], palette='mako',
+        title='Top 15 Most Frequent Opcodes', xlabel='Opcode', ylabel='Count')))
+
     # 3. Gas distribution by opcode (boxplot)
-    plt.figure(figsize=(12, 6))
     # Get top 10 opcodes by mean gas for better visualization
     top_gas_opcodes = opcode_stats.sort_values('mean', ascending=False).head(10).index.tolist()
     # Filter dataframe to only include these opcodes
-    df_filtered = df[df['opcode'].isin(top_gas_opcodes)]
-    # Create boxplot
-    ax = sns.boxplot(x='opcode', y='gas_units', data=df_filtered, palette='Set3')
-    plt.title('Gas Unit Distribution for Top 10 Gas-Intensive Opcodes')
-    plt.xlabel('Opcode')
-    plt.ylabel('Gas Units')
-    plt.xticks(rotation=45, ha='right')
-    plt.tight_layout()
-    # Convert plot to base64 string
-    buffer = BytesIO()
-    plt.savefig(buffer, format='png', dpi=100)
-    buffer.seek(0)
-    plot_data['gas_distribution'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-    plt.close()
-    
+    df_filtered = df.loc[df['opcode'].isin(top_gas_opcodes), ['opcode', 'gas_units']].astype({'opcode': str})
+    tasks.append(('gas_distribution', plot_gas_distribution, dict(df_filtered=df_filtered)))
+
     # 4. Group-based visualizations
     try:
-        # Load the opcode types from all_opcodes.csv
-        all_opcodes_path = Path('all_opcodes.csv')
-        if not all_opcodes_path.exists():
-            all_opcodes_path = Path('add/all_opcodes.csv')
-            
-        if all_opcodes_path.exists():
-            # Read the CSV with opcode types
-            opcode_types_df = pd.read_csv(all_opcodes_path)
-            
-            # Ensure the Opcode and Type columns exist
-            if 'Opcode' in opcode_types_df.columns and 'Type' in opcode_types_df.columns:
-                # Convert opcodes to lowercase for consistent comparison
-                opcode_types_df['Opcode'] = opcode_types_df['Opcode'].str.lower()
-                
-                # Create mapping of opcode to type
-                opcode_to_type = dict(zip(opcode_types_df['Opcode'].str.lower(), opcode_types_df['Type']))
-                
-                # Add type to opcode_stats
-                opcode_stats['type'] = opcode_stats.index.map(lambda x: opcode_to_type.get(x.lower(), 'Unknown'))
-                
-                # 4.1 Average gas by opcode type
-                plt.figure(figsize=(10, 6))
-                type_gas = opcode_stats.groupby('type')['mean'].mean().sort_values(ascending=False)
-                ax = sns.barplot(x=type_gas.index, y=type_gas.values, palette='viridis')
-                plt.title('Average Gas Cost by Opcode Type')
-                plt.xlabel('Opcode Type')
-                plt.ylabel('Average Gas Units')
-                plt.xticks(rotation=45, ha='right')
-                plt.tight_layout()
-                buffer = BytesIO()
-                plt.savefig(buffer, format='png', dpi=100)
-                buffer.seek(0)
-                plot_data['gas_by_type'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                plt.close()
-                
-                # 4.2 Count by opcode type
-                plt.figure(figsize=(10, 6))
-                type_count = opcode_stats.groupby('type')['count'].sum().sort_values(ascending=False)
-                ax = sns.barplot(x=type_count.index, y=type_count.values, palette='mako')
-                plt.title('Frequency of Opcodes by Type')
-                plt.xlabel('Opcode Type')
-                plt.ylabel('Count')
-                plt.xticks(rotation=45, ha='right')
-                plt.tight_layout()
-                buffer = BytesIO()
-                plt.savefig(buffer, format='png', dpi=100)
-                buffer.seek(0)
-                plot_data['count_by_type'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                plt.close()
-                
-                # 4.3 Coverage by opcode type
-                plt.figure(figsize=(10, 6))
-                
-                # Load coverage data if available
-                coverage_path = Path('opcode_coverage.csv')
-                if coverage_path.exists():
-                    coverage_df = pd.read_csv(coverage_path)
-                    coverage_df['Opcode'] = coverage_df['Opcode'].str.lower()
-                    
-                    # Merge with type information
-                    coverage_df['Type'] = coverage_df['Opcode'].map(opcode_to_type)
-                    
-                    # Group by type and status
-                    type_coverage = coverage_df.groupby(['Type', 'Status']).size().unstack(fill_value=0)
-                    
-                    if 'Benchmarked' in type_coverage.columns and 'Missing' in type_coverage.columns:
-                        # Calculate coverage percentage
-                        type_coverage['Total'] = type_coverage['Benchmarked'] + type_coverage['Missing']
-                        type_coverage['Percentage'] = (type_coverage['Benchmarked'] / type_coverage['Total']) * 100
-                        
-                        # Sort by percentage
-                        type_coverage = type_coverage.sort_values('Percentage', ascending=False)
-                        
-                        # Plot
-                        ax = sns.barplot(x=type_coverage.index, y=type_coverage['Percentage'], palette='RdYlGn')
-                        plt.title('Coverage Percentage by Opcode Type')
-                        plt.xlabel('Opcode Type')
-                        plt.ylabel('Coverage (%)')
-                        plt.xticks(rotation=45, ha='right')
-                        
-                        # Add count labels
-                        for i, (_, row) in enumerate(type_coverage.iterrows()):
-                            plt.text(i, row['Percentage'] + 2, 
-                                    f"{row['Benchmarked']}/{row['Total']}", 
-                                    ha='center', va='bottom', fontsize=9)
-                        
-                        plt.ylim(0, 110)  # Give space for labels
-                        plt.tight_layout()
-                        buffer = BytesIO()
-                        plt.savefig(buffer, format='png', dpi=100)
-                        buffer.seek(0)
-                        plot_data['coverage_by_type'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                        plt.close()
-                
-                # 4.4 Gas usage for opcodes within each group
-                # Get a list of opcode types that have at least one benchmarked opcode
-                types_with_benchmarks = opcode_stats[~opcode_stats['type'].isnull() & 
-                                              (opcode_stats['type'] != 'Unknown')]['type'].unique()
-                
-                # For each type, create a graph showing gas usage for its opcodes
-                for opcode_type in types_with_benchmarks:
-                    # Get opcodes for this type
-                    type_opcodes = opcode_stats[opcode_stats['type'] == opcode_type]
-                    
-                    # Skip if there are no or too few opcodes
-                    if len(type_opcodes) < 2:
-                        continue
-                    
-                    # Sort by mean gas
-                    type_opcodes_sorted = type_opcodes.sort_values('mean', ascending=False)
-                    
-                    # Create visualization (limit to top 15 for readability if needed)
-                    plt.figure(figsize=(12, 6))
-                    
-                    # Adjust figure height based on number of opcodes 
-                    fig_height = max(6, min(len(type_opcodes_sorted) * 0.4, 12))
-                    plt.figure(figsize=(10, fig_height))
-                    
-                    # Plot
-                    ax = sns.barplot(x='mean', y=type_opcodes_sorted.index, 
-                                data=type_opcodes_sorted, palette='viridis', orient='h')
-                    
-                    plt.title(f'Gas Cost for {opcode_type} Opcodes')
-                    plt.ylabel('Opcode')
-                    plt.xlabel('Average Gas Units')
-                    plt.tight_layout()
-                    
-                    # Add gas value labels 
-                    for i, v in enumerate(type_opcodes_sorted['mean']):
-                        ax.text(v + v*0.01, i, f"{v:.6f}", va='center')
-                    
-                    # Save
-                    buffer = BytesIO()
-                    plt.savefig(buffer, format='png', dpi=100)
-                    buffer.seek(0)
-                    plot_data[f'gas_by_{opcode_type.replace(" & ", "_").replace(" ", "_").lower()}'] = base64.b64encode(buffer.getvalue()).decode('utf-8')
-                    plt.close()
+        # Opcode -> type lookup, loaded from all_opcodes.csv unless already provided
+        if opcode_types is None:
+            opcode_types = opcode_type_lookup(load_opcode_catalogue())
+
+        if opcode_types is not None:
+            opcode_to_type = opcode_types.to_dict()
+
+            # Add type to opcode_stats
+            opcode_stats['type'] = opcode_stats.index.map(lambda x: opcode_to_type.get(x, 'Unknown'))
+
+            # 4.1 Average gas by opcode type
+            type_gas = opcode_stats.groupby('type')['mean'].mean().sort_values(ascending=False)
+            tasks.append(('gas_by_type', plot_bar_chart, dict(
+                x=type_gas.index, y=type_gas.values, palette='viridis',
+                title='Average Gas Cost by Opcode Type', xlabel='Opcode Type', ylabel='Average Gas Units')))
+
+            # 4.2 Count by opcode type
+            type_count = opcode_stats.groupby('type')['count'].sum().sort_values(ascending=False)
+            tasks.append(('count_by_type', plot_bar_chart, dict(
+                x=type_count.index, y=type_count.values, palette='mako',
+                title='Frequency of Opcodes by Type', xlabel='Opcode Type', ylabel='Count')))
+
+            # 4.3 Coverage by opcode type, if coverage data is available
+            coverage_path = Path('opcode_coverage.csv')
+            if coverage_path.exists():
+                coverage_df = pd.read_csv(coverage_path, usecols=['Opcode', 'Status'])
+
+                # Merge with type information
+                coverage_df['Type'] = coverage_df['Opcode'].map(opcode_types)
+
+                # Group by type and status
+                type_coverage = coverage_df.groupby(['Type', 'Status']).size().unstack(fill_value=0)
+
+                if 'Benchmarked' in type_coverage.columns and 'Missing' in type_coverage.columns:
+                    # Calculate coverage percentage
+                    type_coverage['Total'] = type_coverage['Benchmarked'] + type_coverage['Missing']
+                    type_coverage['Percentage'] = (type_coverage['Benchmarked'] / type_coverage['Total']) * 100
+
+                    # Sort by percentage
+                    type_coverage = type_coverage.sort_values('Percentage', ascending=False)
+                    tasks.append(('coverage_by_type', plot_coverage_by_type, dict(type_coverage=type_coverage)))
+
+            # 4.4 Gas usage for opcodes within each group
+            # Get a list of opcode types that have at least one benchmarked opcode
+            types_with_benchmarks = opcode_stats[~opcode_stats['type'].isnull() &
+                                                 (opcode_stats['type'] != 'Unknown')]['type'].unique()
+
+            # For each type, create a graph showing gas usage for its opcodes
+            for opcode_type in types_with_benchmarks:
+                # Get opcodes for this type
+                type_opcodes = opcode_stats[opcode_stats['type'] == opcode_type]
+
+                # Skip if there are no or too few opcodes
+                if len(type_opcodes) < 2:
+                    continue
+
+                # Sort by mean gas
+                type_opcodes_sorted = type_opcodes[['mean']].sort_values('mean', ascending=False)
+                key = f'gas_by_{opcode_type.replace(" & ", "_").replace(" ", "_").lower()}'
+                tasks.append((key, plot_type_opcodes, dict(
+                    type_opcodes_sorted=type_opcodes_sorted, opcode_type=opcode_type)))
     except Exception as e:
         print(f"Error creating group-based visualizations: {e}")
-    
-    return plot_data
+
+    return render_figures(tasks, jobs)
 
 def generate_opcode_group_tabs(plot_data):
     """Generate HTML tabs for opcode groups"""
@@ -875,5 +2624,634 @@ def generate_opcode_group_content(plot_data):
     
     return '\n'.join(contents)
 
+# Client-side rendering of the interactive report; reads the JSON payload written
+# by generate_interactive_report and only ever puts one page of rows in the DOM
+INTERACTIVE_REPORT_JS = """
+<script>
+document.addEventListener('DOMContentLoaded', function() {
+    const data = JSON.parse(document.getElementById('report-data').textContent);
+    const stats = data.stats;
+    const coverage = data.coverage;
+    const io = data.io;
+    const types = data.types;
+    const PAGE_SIZE = 50;
+
+    function range(n) {
+        return Array.from({length: n}, (_, i) => i);
+    }
+
+    function topBy(values, n) {
+        return range(values.length).sort((a, b) => values[b] - values[a]).slice(0, n);
+    }
+
+    function barChart(canvasId, labels, values, label, horizontal) {
+        return new Chart(document.getElementById(canvasId), {
+            type: 'bar',
+            data: {labels: labels, datasets: [{label: label, data: values}]},
+            options: {
+                maintainAspectRatio: false,
+                indexAxis: horizontal ? 'y' : 'x',
+                plugins: {legend: {display: false}}
+            }
+        });
+    }
+
+    // Summary and coverage indicator
+    const summary = document.getElementById('summary');
+    let summaryHtml = `
+        <p><strong>Total unique opcodes analyzed:</strong> ${data.summary.opcodes}</p>
+        <p><strong>Total benchmarks processed:</strong> ${data.summary.benchmarks}</p>
+        <p><strong>Analysis generated:</strong> ${data.summary.generated}</p>`;
+    if (coverage) {
+        const benchmarked = coverage.benchmarked.reduce((a, b) => a + b, 0);
+        const total = coverage.benchmarked.length;
+        const pct = total ? benchmarked / total * 100 : 0;
+        summaryHtml += `
+            <h4>Opcode Coverage: ${pct.toFixed(1)}%</h4>
+            <div class="coverage-indicator" style="--coverage-pct: ${pct}%;"></div>
+            <div class="d-flex justify-content-between mt-2">
+                <span class="badge bg-success">Benchmarked: ${benchmarked}</span>
+                <span class="badge bg-danger">Missing: ${total - benchmarked}</span>
+            </div>`;
+    }
+    summary.innerHTML = summaryHtml;
+
+    // Opcode charts
+    const topGas = topBy(stats.mean, 15);
+    barChart('chartTopGas', topGas.map(i => stats.opcode[i]), topGas.map(i => stats.mean[i]), 'Average Gas Units');
+    const topCount = topBy(stats.count, 15);
+    barChart('chartFrequency', topCount.map(i => stats.opcode[i]), topCount.map(i => stats.count[i]), 'Count');
+
+    const topRange = topBy(stats.mean, 10);
+    new Chart(document.getElementById('chartRange'), {
+        type: 'bar',
+        data: {
+            labels: topRange.map(i => stats.opcode[i]),
+            datasets: [
+                {type: 'bar', label: 'Min - Max', data: topRange.map(i => [stats.min[i], stats.max[i]])},
+                {type: 'line', label: 'Mean', data: topRange.map(i => stats.mean[i]), showLine: false, pointRadius: 5}
+            ]
+        },
+        options: {maintainAspectRatio: false}
+    });
+
+    // Opcode type charts
+    const typeMeanSum = new Array(types.length).fill(0);
+    const typeOpcodes = new Array(types.length).fill(0);
+    const typeCount = new Array(types.length).fill(0);
+    stats.type.forEach((t, i) => {
+        typeMeanSum[t] += stats.mean[i];
+        typeOpcodes[t] += 1;
+        typeCount[t] += stats.count[i];
+    });
+    const usedTypes = range(types.length).filter(t => typeOpcodes[t] > 0);
+    const byGas = usedTypes.slice().sort((a, b) => typeMeanSum[b] / typeOpcodes[b] - typeMeanSum[a] / typeOpcodes[a]);
+    barChart('chartGasByType', byGas.map(t => types[t]), byGas.map(t => typeMeanSum[t] / typeOpcodes[t]), 'Average Gas Units');
+    const byCount = usedTypes.slice().sort((a, b) => typeCount[b] - typeCount[a]);
+    barChart('chartCountByType', byCount.map(t => types[t]), byCount.map(t => typeCount[t]), 'Count');
+
+    if (coverage) {
+        const covered = new Array(types.length).fill(0);
+        const total = new Array(types.length).fill(0);
+        coverage.type.forEach((t, i) => {
+            covered[t] += coverage.benchmarked[i];
+            total[t] += 1;
+        });
+        const coverageTypes = range(types.length).filter(t => total[t] > 0)
+            .sort((a, b) => covered[b] / total[b] - covered[a] / total[a]);
+        barChart('chartCoverageByType', coverageTypes.map(t => `${types[t]} (${covered[t]}/${total[t]})`),
+                 coverageTypes.map(t => covered[t] / total[t] * 100), 'Coverage (%)');
+    }
+
+    // Per-type opcode chart, redrawn when another group is selected
+    const groupSelect = document.getElementById('groupSelect');
+    let groupChart = null;
+    usedTypes.filter(t => typeOpcodes[t] >= 2 && types[t] !== 'Unknown').forEach(t => {
+        groupSelect.add(new Option(types[t], t));
+    });
+    function drawGroup() {
+        if (groupChart) {
+            groupChart.destroy();
+        }
+        const t = Number(groupSelect.value);
+        const members = range(stats.opcode.length).filter(i => stats.type[i] === t)
+            .sort((a, b) => stats.mean[b] - stats.mean[a]);
+        groupChart = barChart('chartGroup', members.map(i => stats.opcode[i]), members.map(i => stats.mean[i]),
+                              'Average Gas Units', true);
+    }
+    groupSelect.addEventListener('change', drawGroup);
+    if (groupSelect.options.length) {
+        drawGroup();
+    }
+
+    // Paginated, sortable, searchable table over column arrays
+    function pagedTable(containerId, columns, rowCount, extraFilter) {
+        const container = document.getElementById(containerId);
+        const search = document.createElement('input');
+        search.type = 'text';
+        search.placeholder = 'Search...';
+        search.className = 'form-control mb-3';
+        const table = document.createElement('table');
+        table.className = 'table table-striped table-hover';
+        table.innerHTML = '<thead class="table-dark"><tr>' +
+            columns.map((c, j) => `<th data-col="${j}">${c.title} <span>&#8597;</span></th>`).join('') +
+            '</tr></thead><tbody></tbody>';
+        const tbody = table.querySelector('tbody');
+        const pager = document.createElement('div');
+        pager.className = 'd-flex align-items-center gap-2 mb-3';
+        pager.innerHTML = '<button class="btn btn-outline-secondary btn-sm" data-step="-1">Previous</button>' +
+            '<span></span><button class="btn btn-outline-secondary btn-sm" data-step="1">Next</button>';
+        const label = pager.querySelector('span');
+        container.append(search, table, pager);
+
+        let view = range(rowCount);
+        let page = 0;
+        let sortColumn = -1;
+        let sortDirection = 1;
+        let filter = () => true;
+
+        function render() {
+            const pages = Math.max(1, Math.ceil(view.length / PAGE_SIZE));
+            page = Math.min(Math.max(page, 0), pages - 1);
+            const fragment = document.createDocumentFragment();
+            view.slice(page * PAGE_SIZE, (page + 1) * PAGE_SIZE).forEach(i => {
+                const tr = document.createElement('tr');
+                columns.forEach(c => {
+                    const td = document.createElement('td');
+                    td.textContent = c.format ? c.format(c.value(i)) : c.value(i);
+                    if (c.className) {
+                        td.className = c.className(i);
+                    }
+                    tr.appendChild(td);
+                });
+                fragment.appendChild(tr);
+            });
+            tbody.replaceChildren(fragment);
+            label.textContent = `Page ${page + 1} of ${pages} (${view.length} rows)`;
+        }
+
+        function update() {
+            const text = search.value.toLowerCase();
+            view = range(rowCount).filter(i => filter(i) &&
+                (!text || columns.some(c => String(c.value(i)).toLowerCase().includes(text))));
+            if (sortColumn >= 0) {
+                const value = columns[sortColumn].value;
+                view.sort((a, b) => {
+                    const x = value(a), y = value(b);
+                    return (typeof x === 'number' ? x - y : String(x).localeCompare(String(y))) * sortDirection;
+                });
+            }
+            page = 0;
+            render();
+        }
+
+        search.addEventListener('input', update);
+        pager.addEventListener('click', e => {
+            if (e.target.dataset.step) {
+                page += Number(e.target.dataset.step);
+                render();
+            }
+        });
+        table.querySelectorAll('th').forEach(th => th.addEventListener('click', () => {
+            const j = Number(th.dataset.col);
+            sortDirection = sortColumn === j ? -sortDirection : 1;
+            sortColumn = j;
+            table.querySelectorAll('th span').forEach(s => s.innerHTML = '&#8597;');
+            th.querySelector('span').innerHTML = sortDirection === 1 ? '&#8593;' : '&#8595;';
+            update();
+        }));
+
+        if (extraFilter) {
+            extraFilter(container, search, f => { filter = f; update(); });
+        }
+        update();
+    }
+
+    const fixed = v => v.toFixed(6);
+    pagedTable('statsTable', [
+        {title: 'Opcode', value: i => stats.opcode[i]},
+        {title: 'Count', value: i => stats.count[i]},
+        // Mean shown in red when the opcode has a variable cost, from the repeated-run test when available
+        {title: 'Mean Gas', value: i => stats.mean[i], format: fixed,
+         className: i => (stats.variable ? stats.variable[i]
+                          : stats.mean[i] !== stats.min[i] && stats.mean[i] !== stats.max[i]) ? 'text-danger fw-bold' : ''},
+        {title: 'Min Gas', value: i => stats.min[i], format: fixed},
+        {title: 'Max Gas', value: i => stats.max[i], format: fixed},
+        {title: 'Total Gas', value: i => stats.sum[i], format: fixed}
+    ], stats.opcode.length);
+
+    if (io) {
+        pagedTable('ioTable', [{title: 'Benchmark', value: i => io.benchmark[i]}].concat(
+            io.columns.map(([title, decimals], j) => ({
+                title: title,
+                value: i => io.values[j][i] === null ? -Infinity : io.values[j][i],
+                format: v => v === -Infinity ? '-' : v.toFixed(decimals)
+            }))
+        ), io.benchmark.length);
+    } else {
+        document.getElementById('ioTable').textContent = 'Storage and IO data not available';
+    }
+
+    if (coverage) {
+        const status = i => coverage.benchmarked[i] ? 'Benchmarked' : 'Missing';
+        pagedTable('coverageTable', [
+            {title: 'Opcode', value: i => coverage.opcode[i]},
+            {title: 'Type', value: i => types[coverage.type[i]]},
+            {title: 'Status', value: status,
+             className: i => coverage.benchmarked[i] ? 'text-success' : 'text-danger'}
+        ], coverage.opcode.length, (container, search, setFilter) => {
+            const buttons = document.createElement('div');
+            buttons.className = 'btn-group mb-3';
+            buttons.innerHTML = ['all', 'Benchmarked', 'Missing'].map((f, k) =>
+                `<button type="button" class="btn btn-outline-primary${k ? '' : ' active'}" data-filter="${f}">${f === 'all' ? 'All' : f}</button>`).join('');
+            buttons.addEventListener('click', e => {
+                const f = e.target.dataset.filter;
+                if (!f) {
+                    return;
+                }
+                buttons.querySelectorAll('button').forEach(b => b.classList.toggle('active', b === e.target));
+                setFilter(i => f === 'all' || status(i) === f);
+            });
+            container.insertBefore(buttons, search.nextSibling);
+        });
+    } else {
+        document.getElementById('coverageTable').textContent = 'Coverage data not available';
+    }
+});
+</script>
+"""
+
+def parse_shard(value):
+    """Parse an INDEX/COUNT shard argument into an (index, count) pair"""
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected INDEX/COUNT, e.g. 0/4, got {value!r}")
+    if count < 1 or not 0 <= index < count:
+        raise argparse.ArgumentTypeError(f"shard index must be in [0, {count}), got {value!r}")
+    return index, count
+
+def parse_args():
+    """Parse command line arguments"""
+    arg_parser = argparse.ArgumentParser(description='Analyze Aptos gas profiling reports')
+    arg_parser.add_argument('--parser', choices=['stream', 'soup'], default='stream',
+                            help='Trace extractor to use (default: stream, with BeautifulSoup fallback)')
+    arg_parser.add_argument('--verify-parser', action='store_true',
+                            help='Run both trace extractors and report reports where their rows differ')
+    arg_parser.add_argument('--jobs', '-j', type=int, default=1,
+                            help='Number of worker processes used to parse reports and render plots')
+    arg_parser.add_argument('--cache-file', default=TRACE_CACHE_FILE,
+                            help=f'Cache of parsed reports (default: {TRACE_CACHE_FILE})')
+    arg_parser.add_argument('--no-cache', action='store_true',
+                            help='Parse every report, without reading or writing the cache')
+    arg_parser.add_argument('--cache-max-entries', type=int, default=TRACE_CACHE_MAX_ENTRIES,
+                            help=f'Maximum number of reports kept in the cache (default: {TRACE_CACHE_MAX_ENTRIES})')
+    arg_parser.add_argument('--ingest', choices=['trace', 'table'], default='trace',
+                            help='Parse the Full Execution Trace line by line, or only the aggregated '
+                                 'Execution table of each report (default: trace)')
+    arg_parser.add_argument('--cross-check', action='store_true',
+                            help='Flag reports whose Execution table disagrees with their trace')
+    arg_parser.add_argument('--no-report', action='store_true',
+                            help='Only write the data files, without plots or the HTML report')
+    arg_parser.add_argument('--report-mode', choices=['static', 'interactive'], default='static',
+                            help='Embed matplotlib PNGs (static) or a JSON payload drawn client-side with '
+                                 'Chart.js and paginated tables (interactive)')
+    arg_parser.add_argument('--aggregate', choices=['frame', 'stream'], default='frame',
+                            help='Build a DataFrame of every trace line (frame), or fold lines into '
+                                 'per-opcode online statistics in constant memory (stream)')
+    arg_parser.add_argument('--write-raw', action='store_true',
+                            help='With --aggregate stream, also write the raw per-line CSV')
+    arg_parser.add_argument('--raw-format', choices=sorted(RAW_OUTPUT_FILES), default='csv',
+                            help='Format of the raw per-trace-line output (default: csv)')
+    arg_parser.add_argument('--repeat-stats', action='store_true',
+                            help='Treat reports of the same benchmark as repeated runs and report medians, '
+                                 'confidence intervals, CVs and variable-cost opcodes across them')
+    arg_parser.add_argument('--confidence', type=float, default=0.95,
+                            help='Confidence level of the repeated-run intervals (default: 0.95)')
+    arg_parser.add_argument('--variable-cv', type=float, default=1e-3,
+                            help='Coefficient of variation the unit cost of an opcode across repeated runs '
+                                 'of a benchmark must significantly exceed to be marked variable (default: 0.001)')
+    arg_parser.add_argument('--fit-model', action='store_true',
+                            help='Fit per-opcode unit costs and a per-transaction overhead to all '
+                                 'benchmarks by non-negative least squares')
+    arg_parser.add_argument('--baseline', nargs='?', const=DEFAULT_BASELINE, default=None, metavar='BENCHMARK',
+                            help='Subtract the opcode hits and gas of a baseline benchmark from every other '
+                                 f'benchmark to report marginal costs (default: {DEFAULT_BASELINE})')
+    arg_parser.add_argument('--store', action='store_true',
+                            help='Append the per-(benchmark, opcode) aggregates of this run to the results database')
+    arg_parser.add_argument('--store-raw', action='store_true',
+                            help='With --store, also store every trace line')
+    arg_parser.add_argument('--run-label', default=None,
+                            help='Label of the stored run, e.g. the framework version')
+    arg_parser.add_argument('--db', default=RESULTS_DB_FILE,
+                            help=f'Results database used by --store and history (default: {RESULTS_DB_FILE})')
+    arg_parser.add_argument('--flamegraphs', action='store_true',
+                            help=f'Convert the flamegraph SVGs of every report to folded stacks in {FLAMEGRAPH_DIR}/')
+    arg_parser.add_argument('--profile', nargs='?', const=ANALYSIS_PROFILE_FILE, default=None, metavar='FILE',
+                            help='Write the wall time, CPU time, peak RSS and item counts of every stage and the '
+                                 f'parse time of every report as JSON (default: {ANALYSIS_PROFILE_FILE})')
+    arg_parser.add_argument('--cprofile', nargs='?', const=CPROFILE_FILE, default=None, metavar='FILE',
+                            help='Dump cProfile statistics of the analysis, readable with pstats or snakeviz '
+                                 f'(default: {CPROFILE_FILE})')
+
+    arg_parser.add_argument('--reports', nargs='+', default=[GAS_PROFILING_DIR], metavar='DIR',
+                            help='Directories holding the txn-* reports to analyze, e.g. one per module or '
+                                 f'machine (default: {GAS_PROFILING_DIR})')
+    arg_parser.add_argument('--shard', type=parse_shard, default=None, metavar='INDEX/COUNT',
+                            help='Only analyze the reports of one shard, e.g. 0/4; reports are assigned to '
+                                 'shards by a hash of their directory name')
+
+    subparsers = arg_parser.add_subparsers(dest='command')
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks with the aptos CLI, concurrently')
+    run_parser.add_argument('--parallel', type=int, default=4,
+                            help='Maximum number of aptos invocations running at once (default: 4)')
+    run_parser.add_argument('--aptos', default=None,
+                            help='aptos executable, e.g. a local stand-in (default: $APTOS_BIN or aptos)')
+    run_parser.add_argument('--module', default='opcode_benchmark',
+                            help='Module holding the benchmark entry functions (default: opcode_benchmark)')
+    run_parser.add_argument('--timeout', type=float, default=None,
+                            help='Seconds after which a single invocation is killed')
+    run_parser.add_argument('--repeat', type=int, default=1,
+                            help='Number of runs of every benchmark; with --analyze, more than one '
+                                 'enables --repeat-stats (default: 1)')
+    run_parser.add_argument('--manifest', default=MANIFEST_FILE,
+                            help=f'Benchmark manifest listing the benchmarks and parameter sweeps to run '
+                                 f'(default: {MANIFEST_FILE})')
+    run_parser.add_argument('--analyze', action='store_true',
+                            help='Analyze gas-profiling once all benchmarks have finished')
+
+    compare_parser = subparsers.add_parser(
+        'compare', help='Compare two runs and exit with status 1 on gas regressions')
+    compare_parser.add_argument('base', help='Baseline: a gas-profiling directory, or a stored run id, '
+                                             'latest or latest~N')
+    compare_parser.add_argument('head', help='Run to check against the baseline, in the same forms')
+    compare_parser.add_argument('--cost-threshold', type=float, default=DEFAULT_COST_THRESHOLD,
+                                help='Relative unit cost increase of an opcode counted as a regression '
+                                     f'(default: {DEFAULT_COST_THRESHOLD})')
+    compare_parser.add_argument('--gas-threshold', type=float, default=DEFAULT_GAS_THRESHOLD,
+                                help='Relative gas increase of a benchmark counted as a regression '
+                                     f'(default: {DEFAULT_GAS_THRESHOLD})')
+    compare_parser.add_argument('--hits-threshold', type=float, default=None,
+                                help='Relative hit count increase of an opcode counted as a regression '
+                                     '(default: hit counts are reported but not gated)')
+    compare_parser.add_argument('--limit', type=int, default=40,
+                                help='Maximum number of changed opcode rows to print (default: 40)')
+
+    flamediff_parser = subparsers.add_parser(
+        'flamediff', help='Differential flamegraph of one benchmark between two runs')
+    flamediff_parser.add_argument('base', help='Baseline: a gas-profiling directory (with --benchmark), a report '
+                                               'directory, a flamegraph SVG or a folded stacks file')
+    flamediff_parser.add_argument('head', help='Run to compare against the baseline, in the same forms')
+    flamediff_parser.add_argument('--benchmark', default=None,
+                                  help='Benchmark to pick from gas-profiling directories; repeated reports '
+                                       'are averaged')
+    flamediff_parser.add_argument('--kind', choices=FLAMEGRAPH_KINDS, default='exec_io',
+                                  help='Flamegraph of the report directories to compare (default: exec_io)')
+    flamediff_parser.add_argument('--output', default=FLAMEGRAPH_DIFF_FILE,
+                                  help=f'Differential flamegraph SVG to write (default: {FLAMEGRAPH_DIFF_FILE})')
+    flamediff_parser.add_argument('--limit', type=int, default=10,
+                                  help='Number of grown and shrunk stacks to print (default: 10)')
+
+    estimate_parser = subparsers.add_parser(
+        'estimate', help='Estimate the execution gas of Move functions from their disassembly')
+    estimate_parser.add_argument('paths', nargs='+',
+                                 help='Disassembly files, or directories searched for .asm/.mvasm files')
+    estimate_parser.add_argument('--stats', default='opcode_statistics.csv',
+                                 help='Opcode statistics whose mean gas is the unit cost of every opcode '
+                                      '(default: opcode_statistics.csv)')
+    estimate_parser.add_argument('--cost-model', default=None,
+                                 help=f'Use the unit costs and transaction overhead of a fitted cost model, '
+                                      f'e.g. {COST_MODEL_FILE}, instead of --stats')
+    estimate_parser.add_argument('--loop-bounds', default=None,
+                                 help='JSON file mapping module::function or module::function@B<n> to loop '
+                                      'iterations')
+    estimate_parser.add_argument('--loop-iterations', type=int, default=DEFAULT_LOOP_ITERATIONS,
+                                 help='Iterations assumed for loops whose bound is neither annotated nor '
+                                      f'a constant in the loop test (default: {DEFAULT_LOOP_ITERATIONS})')
+    estimate_parser.add_argument('--output', default=STATIC_ESTIMATE_FILE,
+                                 help=f'CSV the estimates are written to (default: {STATIC_ESTIMATE_FILE})')
+
+    watch_parser = subparsers.add_parser(
+        'watch', help='Update the statistics incrementally as reports land in gas-profiling/')
+    watch_parser.add_argument('--interval', type=float, default=WATCH_WRITE_INTERVAL,
+                              help='Minimum seconds between rewrites of the outputs '
+                                   f'(default: {WATCH_WRITE_INTERVAL:g})')
+    watch_parser.add_argument('--settle', type=float, default=WATCH_SETTLE_SECONDS,
+                              help='Seconds a new report directory must stay unchanged before it is parsed '
+                                   f'(default: {WATCH_SETTLE_SECONDS:g})')
+    watch_parser.add_argument('--polling', action='store_true',
+                              help='Poll the directory listing instead of using inotify')
+    watch_parser.add_argument('--idle-exit', type=float, default=None, metavar='SECONDS',
+                              help='Stop after this many seconds without a new report (default: run until Ctrl-C)')
+
+    partial_parser = subparsers.add_parser(
+        'partial', help='Save the mergeable partial aggregates of the reports, or of one --shard of them')
+    partial_parser.add_argument('output', help='Partial aggregate CSV to write, e.g. partial-0.csv')
+
+    merge_parser = subparsers.add_parser(
+        'merge', help='Merge partial aggregate files into the global statistics, coverage and report')
+    merge_parser.add_argument('partials', nargs='+', help='Partial aggregate CSVs written by partial or merge')
+    merge_parser.add_argument('--output', default=None,
+                              help='Also save the merged partial aggregates, to merge them again later')
+
+    history_parser = subparsers.add_parser('history', help='Show the stored cost of an opcode over the last runs')
+    history_parser.add_argument('opcode', nargs='?', default=None,
+                                help='Opcode to look up; lists the stored runs when omitted')
+    history_parser.add_argument('--last', type=int, default=10,
+                                help='Number of most recent runs to show (default: 10)')
+    history_parser.add_argument('--benchmark', default=None,
+                                help='Only count hits in this benchmark')
+    return arg_parser.parse_args()
+
+def analyze_from_args(args):
+    """Run the analysis with the options given on the command line, profiling it when asked to"""
+    timer = StageTimer() if args.profile else None
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler is not None:
+        profiler.enable()
+    try:
+        run_analysis_from_args(args, timer)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f"\ncProfile statistics of the main process saved to {args.cprofile}")
+
+    if timer is not None:
+        timer.print_summary()
+        try:
+            timer.write_json(args.profile, argv=sys.argv[1:], jobs=args.jobs)
+            print(f"\nStage profile saved to {args.profile}")
+        except Exception as e:
+            print(f"Error writing stage profile to {args.profile}: {e}")
+
+def run_analysis_from_args(args, timer=None):
+    """Run the analysis with the options given on the command line"""
+    store = StoreOptions(args.db, args.run_label, args.store_raw) if args.store or args.store_raw else None
+    analyze_gas_profiling(parser=args.parser, verify_parser=args.verify_parser, jobs=args.jobs,
+                          cache_file=None if args.no_cache else args.cache_file,
+                          cache_max_entries=args.cache_max_entries, raw_format=args.raw_format,
+                          ingest=args.ingest, cross_check=args.cross_check, report=not args.no_report,
+                          report_mode=args.report_mode, aggregate=args.aggregate, write_raw=args.write_raw,
+                          repeat_stats=args.repeat_stats or getattr(args, 'repeat', 1) > 1,
+                          confidence=args.confidence, variable_cv=args.variable_cv, fit_model=args.fit_model,
+                          baseline=args.baseline, store=store, flamegraphs=args.flamegraphs,
+                          timer=timer, report_dirs=args.reports, shard=args.shard)
+
+def load_comparison_side(spec, args):
+    """Load one side of a comparison from a gas-profiling directory or the results database"""
+    if Path(spec).is_dir():
+        benchmark_dirs = sorted(Path(spec).glob('txn-*'), key=lambda d: (benchmark_name_from_dir(d.name), d.name))
+        cache_file = None if args.no_cache else args.cache_file
+        cache_entries = load_trace_cache(cache_file) if cache_file else None
+        options = ParseOptions(args.parser, ingest=args.ingest, aggregate='stream', keep_rows=False)
+        results = ingest_with_cache(benchmark_dirs, options, args.jobs, cache_entries)
+        if cache_file:
+            save_trace_cache(cache_file, cache_entries, args.cache_max_entries)
+        aggregates = aggregates_frame(*aggregate_results(results))
+        return aggregates if not aggregates.empty else None
+
+    if not Path(args.db).exists():
+        print(f"{spec} is not a directory and the results database {args.db} does not exist")
+        return None
+    with closing(open_results_db(args.db)) as conn:
+        run_id = resolve_run_id(conn, spec)
+        aggregates = load_run_aggregates(conn, run_id) if run_id is not None else None
+    if aggregates is None:
+        print(f"No stored run {spec} in {args.db}")
+    return aggregates
+
+def compare_from_args(args):
+    """Compare the two runs given on the command line and return the number of regressions
+
+    Returns None when either run could not be loaded.
+    """
+    base = load_comparison_side(args.base, args)
+    head = load_comparison_side(args.head, args)
+    if base is None or head is None:
+        return None
+
+    opcode_diff = compare_opcodes(base, head, args.cost_threshold, args.hits_threshold)
+    benchmark_diff = compare_benchmarks(base, head, args.gas_threshold)
+    opcode_diff.round(9).to_csv(COMPARISON_FILE, index=False)
+    benchmark_diff.round(9).to_csv(BENCHMARK_COMPARISON_FILE)
+
+    print_comparison(opcode_diff, benchmark_diff, args.limit)
+    regressions = count_regressions(opcode_diff, benchmark_diff)
+    print(f"\nComparison saved to {COMPARISON_FILE} and {BENCHMARK_COMPARISON_FILE}")
+    print(f"{regressions} regressions found" if regressions else "No regressions found")
+    return regressions
+
+def load_flamediff_side(spec, benchmark, kind):
+    """Load the folded stacks of one side of a flamediff
+
+    spec is a flamegraph SVG or folded stacks file, a report directory, or a
+    gas-profiling directory whose reports of benchmark are averaged.
+    """
+    path = Path(spec)
+    if path.is_file():
+        return load_profile(path)
+    if not path.is_dir():
+        print(f"{spec} is neither a file nor a directory")
+        return None
+
+    if (path / 'assets').is_dir():
+        report_dirs = [path]
+    elif benchmark is None:
+        print(f"{spec} is a gas-profiling directory, pick a benchmark with --benchmark")
+        return None
+    else:
+        report_dirs = [d for d in sorted(path.glob('txn-*')) if benchmark_label(d) == benchmark]
+
+    svg_files = [d / 'assets' / f'{kind}.svg' for d in report_dirs if (d / 'assets' / f'{kind}.svg').exists()]
+    if not svg_files:
+        print(f"No {kind} flamegraph found in {spec}" + (f" for {benchmark}" if benchmark else ''))
+        return None
+    try:
+        return average_profiles(load_profile(svg_file) for svg_file in svg_files)
+    except Exception as e:
+        print(f"Error reading flamegraphs from {spec}: {e}")
+        return None
+
+def flamediff_from_args(args):
+    """Write the differential flamegraph of the two runs given on the command line
+
+    Returns False when either side could not be loaded.
+    """
+    base = load_flamediff_side(args.base, args.benchmark, args.kind)
+    head = load_flamediff_side(args.head, args.benchmark, args.kind)
+    if base is None or head is None:
+        return False
+
+    # Folded files carry no units; take them from whichever side came from an SVG
+    unit, scale = (base.unit, base.scale) if base.unit else (head.unit, head.scale)
+    diff = diff_profiles(base, head)
+    print_profile_diff(diff, unit, scale, args.limit)
+
+    title = f"{args.benchmark or args.kind}: {args.base} -> {args.head}"
+    render_diff_flamegraph(diff, args.output, title, unit, scale)
+    write_diff_folded(diff, FLAMEGRAPH_DIFF_FOLDED_FILE)
+    print(f"\nDifferential flamegraph saved to {args.output} and {FLAMEGRAPH_DIFF_FOLDED_FILE}")
+    return True
+
+def estimate_from_args(args):
+    """Estimate the gas of the disassembled functions given on the command line
+
+    Returns False when nothing could be estimated.
+    """
+    estimates = estimate_gas(args.paths, args.stats, args.cost_model, args.loop_bounds, args.loop_iterations,
+                             args.jobs)
+    if estimates is None:
+        return False
+    estimates.round(9).to_csv(args.output, index=False)
+    print_estimates(estimates)
+    print(f"\nEstimates saved to {args.output}")
+    return True
+
+def show_history(args):
+    """Print the stored runs, or the cost of an opcode over the last runs"""
+    if not Path(args.db).exists():
+        print(f"Results database not found at: {args.db}")
+        return
+    with closing(open_results_db(args.db)) as conn:
+        if args.opcode is None:
+            history = list_runs(conn, args.last)
+        else:
+            history = opcode_history(conn, args.opcode, args.last, args.benchmark)
+    if history.empty:
+        print("No stored results found.")
+    else:
+        print(history.to_string(index=False))
+
 if __name__ == "__main__":
-    analyze_gas_profiling() 
\ No newline at end of file
+    args = parse_args()
+    if args.command == 'run':
+        runs = run_benchmarks(jobs=args.parallel, aptos=args.aptos, module=args.module, timeout=args.timeout,
+                              repeat=args.repeat, manifest=args.manifest)
+        if runs is None:
+            sys.exit(1)
+        if args.analyze:
+            analyze_from_args(args)
+        # Failed runs fail the command, after the completed ones were analyzed
+        sys.exit(1 if any(run.output_dir is None for run in runs) else 0)
+    elif args.command == 'history':
+        show_history(args)
+    elif args.command == 'flamediff':
+        sys.exit(0 if flamediff_from_args(args) else 2)
+    elif args.command == 'watch':
+        watch_gas_profiling(args.interval, args.settle, args.polling, not args.no_report, args.jobs, args.parser,
+                            None if args.no_cache else args.cache_file, args.idle_exit, args.cache_max_entries)
+    elif args.command == 'partial':
+        written = write_partial_aggregates(args.output, args.reports, args.shard, args.jobs, args.parser, args.ingest,
+                                           None if args.no_cache else args.cache_file, args.cache_max_entries)
+        sys.exit(0 if written else 2)
+    elif args.command == 'merge':
+        sys.exit(0 if merge_partial_aggregates(args.partials, not args.no_report, args.jobs, args.output) else 2)
+    elif args.command == 'estimate':
+        sys.exit(0 if estimate_from_args(args) else 2)
+    elif args.command == 'compare':
+        regressions = compare_from_args(args)
+        # 2 when a run could not be loaded, 1 on regressions
+        sys.exit(2 if regressions is None else 1 if regressions else 0)
+    else:
+        analyze_from_args(args)
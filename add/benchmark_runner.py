@@ -0,0 +1,211 @@
+import asyncio
+import itertools
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from pathlib import Path
+
+# Declarative list of the benchmarks to run, with their arguments and parameter sweeps
+MANIFEST_FILE = 'benchmarks.json'
+
+# Record written into every report directory, mapping it back to the invocation that produced it
+INVOCATION_RECORD_FILE = 'invocation.json'
+
+# One `aptos move run --profile-gas` call; args are "type:value" strings and params the
+# (name, value) pairs of the sweep point it runs, empty for a fixed benchmark
+BenchmarkInvocation = namedtuple('BenchmarkInvocation', ['function', 'args', 'params'], defaults=((),))
+
+# Outcome of an invocation; output_dir is the gas-profiling/txn-* directory it produced
+BenchmarkRun = namedtuple('BenchmarkRun', ['invocation', 'returncode', 'output_dir', 'output'])
+
+def parse_benchmark_config(config):
+    """Parse a "function|type:value|..." benchmark config into a BenchmarkInvocation"""
+    parts = config.split('|')
+    return BenchmarkInvocation(parts[0], tuple(part for part in parts[1:] if part))
+
+def sweep_values(spec):
+    """Expand the values of one swept parameter
+
+    spec is a list of values, {"range": [start, stop, step]} with stop
+    excluded, or {"geometric": [start, stop, factor]} with stop included.
+    """
+    if isinstance(spec, list):
+        return spec
+    if isinstance(spec, dict) and 'range' in spec:
+        return list(range(*spec['range']))
+    if isinstance(spec, dict) and 'geometric' in spec:
+        start, stop, factor = spec['geometric']
+        if start <= 0 or factor <= 1:
+            raise ValueError(f"geometric sweep needs start > 0 and factor > 1: {spec}")
+        values = []
+        while start <= stop:
+            values.append(start)
+            start *= factor
+        return values
+    raise ValueError(f"unsupported sweep: {spec}")
+
+def expand_manifest_entry(entry):
+    """Expand one manifest entry into its BenchmarkInvocations
+
+    An entry is a "function|type:value|..." string, or an object with a
+    function, args in which {name} placeholders stand for swept parameters,
+    and a sweep mapping every parameter to its values. Several swept
+    parameters run as a grid over all their combinations.
+    """
+    if isinstance(entry, str):
+        return [parse_benchmark_config(entry)]
+
+    function = entry['function']
+    args = entry.get('args', [])
+    sweep = entry.get('sweep', {})
+    names = list(sweep)
+    invocations = []
+    for values in itertools.product(*(sweep_values(sweep[name]) for name in names)):
+        params = dict(zip(names, values))
+        try:
+            formatted = tuple(arg.format(**params) for arg in args)
+        except KeyError as e:
+            raise ValueError(f"{function} uses parameter {e} which is not swept") from None
+        invocations.append(BenchmarkInvocation(function, formatted, tuple(params.items())))
+    return invocations
+
+def load_manifest(path=MANIFEST_FILE):
+    """Load a benchmark manifest and return the BenchmarkInvocations it expands to"""
+    with open(path) as f:
+        manifest = json.load(f)
+    entries = manifest['benchmarks'] if isinstance(manifest, dict) else manifest
+    return [invocation for entry in entries for invocation in expand_manifest_entry(entry)]
+
+def invocation_label(invocation):
+    """Return the benchmark name of an invocation, with its sweep point when it has one"""
+    if not invocation.params:
+        return invocation.function
+    return f"{invocation.function}[{','.join(f'{name}={value}' for name, value in invocation.params)}]"
+
+def write_invocation_record(report_dir, invocation):
+    """Record the invocation that produced a report in its directory"""
+    record = {'function': invocation.function, 'args': list(invocation.args),
+              'params': dict(invocation.params), 'label': invocation_label(invocation)}
+    with open(Path(report_dir) / INVOCATION_RECORD_FILE, 'w') as f:
+        json.dump(record, f, indent=2)
+
+def load_invocation_record(report_dir):
+    """Return the invocation record of a report directory, or None if it has none"""
+    record_file = Path(report_dir) / INVOCATION_RECORD_FILE
+    if not record_file.exists():
+        return None
+    try:
+        with open(record_file) as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"Ignoring unreadable invocation record {record_file}: {e}")
+        return None
+
+def build_command(aptos, module, invocation):
+    """Return the argv of the aptos CLI call profiling one benchmark"""
+    command = [aptos, 'move', 'run', '--function-id', f'default::{module}::{invocation.function}']
+    for arg in invocation.args:
+        command += ['--args', arg]
+    command.append('--profile-gas')
+    return command
+
+async def run_invocation(invocation, index, aptos, module, project_dir, workspace, output_dir,
+                         semaphore, timeout=None):
+    """Run one benchmark in its own working directory and move its report to output_dir
+
+    The aptos CLI writes reports to gas-profiling/ under its working directory,
+    so giving every invocation a private directory (sharing the project's
+    .aptos profile) maps it to exactly the report it produced.
+    """
+    async with semaphore:
+        run_dir = Path(workspace) / f'{index:04d}-{invocation.function}'
+        run_dir.mkdir(parents=True)
+        aptos_config = Path(project_dir) / '.aptos'
+        if aptos_config.exists():
+            (run_dir / '.aptos').symlink_to(aptos_config.resolve(), target_is_directory=True)
+
+        command = build_command(aptos, module, invocation)
+        print(f"Running benchmark: {invocation_label(invocation)}")
+        process = await asyncio.create_subprocess_exec(
+            *command, cwd=run_dir,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT
+        )
+        try:
+            output, _ = await asyncio.wait_for(process.communicate(), timeout)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            print(f"Error: benchmark {invocation_label(invocation)} timed out after {timeout}s")
+            return BenchmarkRun(invocation, None, None, '')
+        output = output.decode('utf-8', errors='replace')
+
+        if process.returncode != 0:
+            print(f"Error: failed to run benchmark {invocation_label(invocation)} (exit code {process.returncode})")
+            return BenchmarkRun(invocation, process.returncode, None, output)
+
+        produced = sorted((run_dir / 'gas-profiling').glob('txn-*'))
+        if len(produced) != 1:
+            print(f"Warning: benchmark {invocation_label(invocation)} produced {len(produced)} output directories")
+            return BenchmarkRun(invocation, process.returncode, None, output)
+
+        target = Path(output_dir) / produced[0].name
+        suffix = 1
+        while target.exists():
+            target = Path(output_dir) / f'{produced[0].name}-{suffix}'
+            suffix += 1
+        shutil.move(str(produced[0]), str(target))
+        write_invocation_record(target, invocation)
+
+        if not (target / 'index.html').exists():
+            print(f"Warning: index.html not found for benchmark {invocation_label(invocation)}")
+        print(f"Output directory created: {target}")
+        return BenchmarkRun(invocation, process.returncode, target, output)
+
+async def run_benchmarks_async(invocations, jobs=4, aptos='aptos', module='opcode_benchmark',
+                               project_dir='.', output_dir='gas-profiling', timeout=None):
+    """Run benchmark invocations concurrently, at most jobs at a time
+
+    Returns one BenchmarkRun per invocation, in the order of invocations.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    semaphore = asyncio.Semaphore(max(1, jobs))
+
+    workspace = tempfile.mkdtemp(prefix='.benchmark-runs-', dir=project_dir)
+    try:
+        return await asyncio.gather(*(
+            run_invocation(invocation, index, aptos, module, project_dir, workspace, output_dir,
+                           semaphore, timeout)
+            for index, invocation in enumerate(invocations)
+        ))
+    finally:
+        shutil.rmtree(workspace, ignore_errors=True)
+
+def run_benchmarks(configs=None, jobs=4, aptos=None, module='opcode_benchmark', project_dir='.',
+                   output_dir='gas-profiling', timeout=None, repeat=1, manifest=MANIFEST_FILE):
+    """Run benchmark configs concurrently and return their BenchmarkRuns
+
+    configs default to the invocations of the manifest. Every config runs
+    repeat times, each run producing its own report. The aptos executable
+    defaults to $APTOS_BIN, then `aptos` on the PATH, so a local stand-in CLI
+    can be substituted. Returns None when the manifest cannot be read.
+    """
+    if configs is None:
+        try:
+            configs = load_manifest(manifest)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error reading benchmark manifest {manifest}: {e}")
+            return None
+    invocations = [config if isinstance(config, BenchmarkInvocation) else parse_benchmark_config(config)
+                   for config in configs for _ in range(max(1, repeat))]
+    aptos = aptos or os.environ.get('APTOS_BIN', 'aptos')
+
+    runs = asyncio.run(run_benchmarks_async(invocations, jobs, aptos, module, project_dir, output_dir, timeout))
+
+    failed = [invocation_label(run.invocation) for run in runs if run.output_dir is None]
+    print(f"\n{len(runs) - len(failed)} of {len(runs)} benchmarks completed. Results are in {output_dir}")
+    if failed:
+        print(f"Failed benchmarks: {', '.join(failed)}")
+    return runs
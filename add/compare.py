@@ -0,0 +1,118 @@
+import numpy as np
+import pandas as pd
+
+# Default relative increases above which a change counts as a regression
+DEFAULT_COST_THRESHOLD = 0.01
+DEFAULT_GAS_THRESHOLD = 0.01
+
+# Absolute changes below this are rounding noise in the reports
+MIN_GAS_DELTA = 1e-9
+
+def relative_change(base, head):
+    """Return (head - base) / base, inf for growth from zero and 0 where both are zero"""
+    base = np.asarray(base, dtype='float64')
+    head = np.asarray(head, dtype='float64')
+    delta = head - base
+    with np.errstate(divide='ignore', invalid='ignore'):
+        change = np.where(base != 0, delta / np.where(base != 0, base, 1.0), np.sign(delta) * np.inf)
+    return np.where(np.abs(delta) < MIN_GAS_DELTA, 0.0, change)
+
+def compare_opcodes(base, head, cost_threshold=DEFAULT_COST_THRESHOLD, hits_threshold=None):
+    """Align two runs per (benchmark, opcode) and classify every pair
+
+    base and head have the layout of load_run_aggregates. Alignment is a
+    single hashed join on (benchmark, opcode). A pair regresses when its unit
+    cost grows by more than cost_threshold, or its hit count by more than
+    hits_threshold when one is given; both thresholds are relative.
+    """
+    columns = ['benchmark', 'opcode', 'count', 'mean']
+    diff = base[columns].merge(head[columns], on=['benchmark', 'opcode'], how='outer',
+                               suffixes=('_base', '_head'), indicator=True)
+    diff = diff.rename(columns={'count_base': 'hits_base', 'count_head': 'hits_head',
+                                'mean_base': 'cost_base', 'mean_head': 'cost_head'})
+    diff[['hits_base', 'hits_head']] = diff[['hits_base', 'hits_head']].fillna(0)
+
+    diff['hits_delta'] = diff['hits_head'] - diff['hits_base']
+    diff['hits_change'] = relative_change(diff['hits_base'], diff['hits_head'])
+    diff['cost_delta'] = diff['cost_head'] - diff['cost_base']
+    diff['cost_change'] = relative_change(diff['cost_base'], diff['cost_head'])
+
+    cost_up = diff['cost_change'] > cost_threshold
+    cost_down = diff['cost_change'] < -cost_threshold
+    hits_up = diff['hits_change'] > hits_threshold if hits_threshold is not None else False
+    diff['status'] = np.select(
+        [diff['_merge'] == 'right_only', diff['_merge'] == 'left_only', cost_up | hits_up, cost_down,
+         diff['hits_delta'] != 0],
+        ['added', 'removed', 'regressed', 'improved', 'changed'],
+        default='unchanged')
+    return diff.drop(columns='_merge')
+
+def compare_benchmarks(base, head, gas_threshold=DEFAULT_GAS_THRESHOLD):
+    """Align two runs per benchmark and classify every benchmark by its gas
+
+    The transaction total is compared when both runs have it, the execution
+    gas (sum over opcodes) otherwise. A benchmark missing from head counts as
+    a regression.
+    """
+    def per_benchmark(frame):
+        grouped = frame.groupby('benchmark')
+        return pd.DataFrame({'execution_gas': grouped['sum'].sum(), 'total_gas': grouped['total_gas'].first()})
+
+    diff = per_benchmark(base).join(per_benchmark(head), how='outer', lsuffix='_base', rsuffix='_head')
+    # A benchmark present on one side only counts as having a total on the other
+    use_total = ((diff['total_gas_base'].notna() | diff['execution_gas_base'].isna())
+                 & (diff['total_gas_head'].notna() | diff['execution_gas_head'].isna()))
+    diff['gas_base'] = diff['total_gas_base'].where(use_total, diff['execution_gas_base'])
+    diff['gas_head'] = diff['total_gas_head'].where(use_total, diff['execution_gas_head'])
+    diff['gas_delta'] = diff['gas_head'] - diff['gas_base']
+    diff['gas_change'] = relative_change(diff['gas_base'], diff['gas_head'])
+
+    diff['status'] = np.select(
+        [diff['gas_head'].isna(), diff['gas_base'].isna(),
+         diff['gas_change'] > gas_threshold, diff['gas_change'] < -gas_threshold],
+        ['missing', 'new', 'regressed', 'improved'],
+        default='unchanged')
+    diff.index.name = 'benchmark'
+    return diff[['gas_base', 'gas_head', 'gas_delta', 'gas_change', 'status']]
+
+def format_change(change):
+    """Format a relative change as a signed percentage"""
+    if np.isnan(change):
+        return ''
+    if np.isinf(change):
+        return 'new' if change > 0 else 'gone'
+    return f'{change:+.2%}'
+
+def print_comparison(opcode_diff, benchmark_diff, limit=40):
+    """Print a compact diff: changed benchmarks, then the changed (benchmark, opcode) pairs"""
+    changed_benchmarks = benchmark_diff[benchmark_diff['status'] != 'unchanged']
+    print(f"\n=== Benchmarks: {len(changed_benchmarks)} of {len(benchmark_diff)} changed ===")
+    for benchmark, row in changed_benchmarks.sort_values('gas_change', ascending=False).iterrows():
+        if row['status'] in ('missing', 'new'):
+            print(f"  {row['status']:<9} {benchmark}")
+        else:
+            print(f"  {row['status']:<9} {benchmark}: {row['gas_base']:.6f} -> {row['gas_head']:.6f} "
+                  f"({format_change(row['gas_change'])})")
+
+    changed = opcode_diff[opcode_diff['status'] != 'unchanged']
+    severity = changed['status'].map({'regressed': 0, 'removed': 1, 'added': 2, 'changed': 3, 'improved': 4})
+    changed = changed.assign(severity=severity).sort_values(['severity', 'cost_change'], ascending=[True, False])
+    print(f"\n=== Opcodes: {len(changed)} of {len(opcode_diff)} (benchmark, opcode) pairs changed ===")
+    if changed.empty:
+        return
+    table = pd.DataFrame({
+        'status': changed['status'],
+        'benchmark': changed['benchmark'],
+        'opcode': changed['opcode'],
+        'hits': [f"{base:g} -> {head:g}" for base, head in zip(changed['hits_base'], changed['hits_head'])],
+        'unit cost': [f"{base:.6f} -> {head:.6f}" for base, head in zip(changed['cost_base'], changed['cost_head'])],
+        'change': [format_change(change) for change in changed['cost_change']]
+    })
+    print(table.head(limit).to_string(index=False))
+    if len(table) > limit:
+        print(f"... {len(table) - limit} more in the comparison CSV")
+
+def count_regressions(opcode_diff, benchmark_diff):
+    """Return the number of regressed pairs plus regressed or missing benchmarks"""
+    return int((opcode_diff['status'] == 'regressed').sum()
+               + benchmark_diff['status'].isin(['regressed', 'missing']).sum())
@@ -0,0 +1,186 @@
+import numpy as np
+import pandas as pd
+
+from run_statistics import run_opcode_totals
+
+# Name of the fixed per-transaction term in the cost model table
+OVERHEAD_TERM = 'transaction_overhead'
+
+def nnls(A, b, max_iter=None):
+    """Solve min ||Ax - b|| subject to x >= 0 with the Lawson-Hanson active set method"""
+    A = np.asarray(A, dtype='float64')
+    b = np.asarray(b, dtype='float64')
+    n = A.shape[1]
+    max_iter = max_iter or 3 * n
+    tol = 10 * max(A.shape) * np.finfo(float).eps * max(np.abs(A).sum(axis=0).max(), 1.0)
+
+    x = np.zeros(n)
+    passive = np.zeros(n, dtype=bool)
+    gradient = A.T @ b
+    for _ in range(max_iter):
+        if passive.all() or gradient[~passive].max() <= tol:
+            break
+        passive[np.argmax(np.where(passive, -np.inf, gradient))] = True
+
+        while True:
+            z = np.zeros(n)
+            z[passive] = np.linalg.lstsq(A[:, passive], b, rcond=None)[0]
+            if (z[passive] > 0).all():
+                x = z
+                break
+            # Step back towards x until the first passive variable reaches zero
+            blocking = passive & (z <= 0)
+            alpha = np.min(x[blocking] / (x[blocking] - z[blocking]))
+            x = x + alpha * (z - x)
+            passive &= x > tol
+            x[~passive] = 0.0
+
+        gradient = A.T @ (b - A @ x)
+    return x
+
+def build_model_system(results):
+    """Build the benchmark x opcode hit matrix and the measured costs of every benchmark
+
+    Reports of the same benchmark are averaged. Returns (hits, opcode_gas,
+    totals) where hits and opcode_gas are benchmark x opcode DataFrames of hit
+    counts and execution costs, and totals is the execution & IO total of each
+    benchmark, which also includes intrinsic, dependency and storage costs.
+    All are None when no report carries a total.
+    """
+    rows = []
+    reports = []
+    for result in results:
+        if result.total_gas is None:
+            continue
+        reports.append((result.operation_name, result.total_gas))
+        rows.extend((result.operation_name, opcode, hits, gas)
+                    for opcode, (hits, gas) in run_opcode_totals(result).items())
+    if not rows:
+        return None, None, None
+
+    reports = pd.DataFrame(reports, columns=['benchmark', 'total'])
+    report_count = reports.groupby('benchmark').size()
+    frame = pd.DataFrame(rows, columns=['benchmark', 'opcode', 'hits', 'gas'])
+
+    # Opcodes absent from a report count as zero hits in the average
+    hits = frame.pivot_table(index='benchmark', columns='opcode', values='hits', aggfunc='sum', fill_value=0)
+    opcode_gas = frame.pivot_table(index='benchmark', columns='opcode', values='gas', aggfunc='sum', fill_value=0)
+    hits = hits.div(report_count.reindex(hits.index), axis=0)
+    opcode_gas = opcode_gas.div(report_count.reindex(opcode_gas.index), axis=0)
+    totals = reports.groupby('benchmark')['total'].mean().reindex(hits.index)
+    return hits, opcode_gas, totals
+
+def fit_cost_model(hits, opcode_gas, totals):
+    """Fit a non-negative unit cost per opcode plus a fixed per-transaction overhead
+
+    Two kinds of equations are stacked: hits * unit_cost = cost for every
+    (benchmark, opcode) pair of the Execution data, and sum(hits * unit_cost)
+    + overhead = total for every benchmark. The per-pair equations pin down
+    opcodes that always occur together, which the totals alone cannot
+    separate; the totals determine the overhead. Rows are weighted by the
+    inverse of their target so both kinds count in relative terms.
+
+    Returns (unit_costs, overhead, residuals) where residuals has the
+    measured and predicted total of every benchmark.
+    """
+    hit_matrix = hits.to_numpy(dtype='float64')
+    n_benchmarks, n_opcodes = hit_matrix.shape
+
+    pair_benchmarks, pair_opcodes = np.nonzero(hit_matrix)
+    pair_rows = np.zeros((len(pair_benchmarks), n_opcodes + 1))
+    pair_rows[np.arange(len(pair_benchmarks)), pair_opcodes] = hit_matrix[pair_benchmarks, pair_opcodes]
+    pair_targets = opcode_gas.to_numpy(dtype='float64')[pair_benchmarks, pair_opcodes]
+
+    total_rows = np.hstack([hit_matrix, np.ones((n_benchmarks, 1))])
+    total_targets = totals.to_numpy(dtype='float64')
+
+    A = np.vstack([pair_rows, total_rows])
+    y = np.concatenate([pair_targets, total_targets])
+    positive = y[y > 0]
+    weights = 1.0 / np.maximum(y, positive.min() if len(positive) else 1.0)
+    solution = nnls(A * weights[:, np.newaxis], y * weights)
+
+    unit_costs = pd.Series(solution[:-1], index=hits.columns, name='unit_cost')
+    overhead = float(solution[-1])
+    predicted = total_rows @ solution
+    residuals = pd.DataFrame({
+        'measured': total_targets,
+        'predicted': predicted,
+        'residual': total_targets - predicted,
+        'relative_residual': np.divide(total_targets - predicted, total_targets,
+                                       out=np.zeros(n_benchmarks), where=total_targets != 0)
+    }, index=hits.index)
+    return unit_costs, overhead, residuals
+
+def cost_model_table(unit_costs, overhead, hits, opcode_gas):
+    """Return the cost model as a DataFrame indexed by term, overhead first
+
+    measured_mean is the plain average cost per hit, for comparison.
+    """
+    total_hits = hits.sum()
+    table = pd.DataFrame({
+        'unit_cost': unit_costs,
+        'measured_mean': opcode_gas.sum() / total_hits.where(total_hits > 0),
+        'hits': total_hits,
+        'benchmarks': (hits > 0).sum()
+    })
+    overhead_row = pd.DataFrame({'unit_cost': [overhead], 'measured_mean': [np.nan],
+                                 'hits': [len(hits)], 'benchmarks': [len(hits)]}, index=[OVERHEAD_TERM])
+    table = pd.concat([overhead_row, table])
+    table.index.name = 'term'
+    return table
+
+def load_cost_model(path):
+    """Load a saved cost model as (unit_costs, overhead)"""
+    table = pd.read_csv(path, index_col='term')
+    overhead = float(table.loc[OVERHEAD_TERM, 'unit_cost']) if OVERHEAD_TERM in table.index else 0.0
+    return table['unit_cost'].drop(OVERHEAD_TERM, errors='ignore'), overhead
+
+def predict_gas(unit_costs, overhead, hits):
+    """Predict the execution & IO gas of a transaction from its opcode hit counts
+
+    hits maps opcodes to hit counts. Returns (gas, unknown) where unknown
+    lists the opcodes the model has no cost for; they contribute nothing.
+    """
+    hits = pd.Series(hits, dtype='float64')
+    known = hits.index.isin(unit_costs.index)
+    gas = overhead + float((hits[known] * unit_costs.reindex(hits.index[known])).sum())
+    return gas, sorted(hits.index[~known])
+
+def subtract_baseline(hits, opcode_gas, totals, baseline='benchmark_nop'):
+    """Subtract the opcode hits and costs of a baseline benchmark from every other benchmark
+
+    The baseline carries the fixed intrinsic cost and the setup every
+    transaction pays, so what remains is the marginal opcode mix and gas of
+    each benchmark. Negative entries mean a benchmark runs fewer of an opcode
+    than the baseline and are kept as is.
+
+    Returns (marginal_mix, marginal_gas): marginal_mix has one row per
+    (benchmark, opcode) with non-zero marginal hits or gas; marginal_gas has
+    the total, marginal total, and its execution and remaining parts per
+    benchmark. Raises KeyError if the baseline has no report.
+    """
+    if baseline not in hits.index:
+        raise KeyError(baseline)
+
+    others = hits.index != baseline
+    marginal_hits = hits[others] - hits.loc[baseline]
+    marginal_opcode_gas = opcode_gas[others] - opcode_gas.loc[baseline]
+
+    marginal_mix = pd.DataFrame({
+        'hits': marginal_hits.stack(),
+        'gas': marginal_opcode_gas.stack()
+    })
+    marginal_mix = marginal_mix[(marginal_mix['hits'] != 0) | ~np.isclose(marginal_mix['gas'], 0)]
+    marginal_mix.index.names = ['benchmark', 'opcode']
+
+    marginal_total = totals[others] - totals[baseline]
+    marginal_execution = marginal_opcode_gas.sum(axis=1)
+    marginal_gas = pd.DataFrame({
+        'total': totals[others],
+        'marginal_total': marginal_total,
+        'marginal_execution': marginal_execution,
+        # Intrinsic, dependency and storage costs left after removing the baseline
+        'marginal_other': marginal_total - marginal_execution
+    })
+    return marginal_mix.reset_index(), marginal_gas
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+from synthetic_reports import generate_trace, render_report
+
+# Opcodes in the trace of a benchmark before its u64 arguments are added, and the most
+# the arguments add, so large literal arguments such as u64:10000000 stay cheap
+BASE_TRACE_LENGTH = 40
+MAX_ARGUMENT_LENGTH = 2000
+
+# Comma-separated functions that fail, and the maximum random delay of every call in seconds
+FAIL_ENV = 'FAKE_APTOS_FAIL'
+DELAY_ENV = 'FAKE_APTOS_MAX_DELAY'
+DEFAULT_MAX_DELAY = 0.2
+
+def trace_length(args):
+    """Return the trace length of a call, growing with its u64 arguments so parameter sweeps scale"""
+    sizes = [int(arg.split(':', 1)[1]) for arg in args if arg.startswith('u64:')]
+    return BASE_TRACE_LENGTH + min(sum(sizes), MAX_ARGUMENT_LENGTH)
+
+def move_run(function_id, args):
+    """Write the gas report of one `move run --profile-gas` call under ./gas-profiling, like the aptos CLI"""
+    _, module, function = function_id.split('::')
+    if function in filter(None, os.environ.get(FAIL_ENV, '').split(',')):
+        print(f"Error: simulated failure of {function_id}", file=sys.stderr)
+        return 1
+    time.sleep(random.uniform(0, float(os.environ.get(DELAY_ENV, DEFAULT_MAX_DELAY))))
+
+    # Seeded by the function alone: repeated runs produce identical reports, and
+    # the trace of a larger sweep point extends that of a smaller one
+    rng = random.Random(function_id)
+    reads, writes = rng.randint(0, 2), rng.randint(0, 1)
+    report = render_report(function, generate_trace(rng, trace_length(args)), reads, writes, module=module)
+    transaction_hash = f'{random.getrandbits(32):08x}'
+    report_dir = Path('gas-profiling') / f'txn-{transaction_hash}-0xc3c2-{module}-{function}'
+    report_dir.mkdir(parents=True)
+    (report_dir / 'index.html').write_text(report)
+    print(json.dumps({'Result': {'transaction_hash': f'0x{transaction_hash}', 'success': True,
+                                 'vm_status': 'Executed successfully'}}, indent=2))
+    return 0
+
+def parse_args(argv=None):
+    """Parse the subset of the aptos command line used by run_benchmarks.sh and benchmark_runner.py"""
+    arg_parser = argparse.ArgumentParser(
+        prog='aptos', description='Stand-in for the aptos CLI writing synthetic gas reports, for testing the '
+                                  'benchmark runner without a network, e.g. APTOS_BIN=./fake_aptos.py')
+    commands = arg_parser.add_subparsers(dest='group', required=True)
+    move_parser = commands.add_parser('move').add_subparsers(dest='command', required=True)
+    run_parser = move_parser.add_parser('run', help='Write a synthetic gas report of a function')
+    run_parser.add_argument('--function-id', required=True, help='address::module::function')
+    run_parser.add_argument('--args', action='append', default=[], help='Argument as type:value')
+    run_parser.add_argument('--profile-gas', action='store_true', help='Required; reports are always written')
+    for command in ('clean', 'compile', 'publish'):
+        # Accepted with any options and ignored, so the whole script can run against the stand-in
+        move_parser.add_parser(command)
+    args, unknown = arg_parser.parse_known_args(argv)
+    if unknown and args.command == 'run':
+        arg_parser.error(f"unrecognized arguments: {' '.join(unknown)}")
+    return args
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command != 'run':
+        sys.exit(0)
+    if not args.profile_gas:
+        print("Error: only move run --profile-gas is supported", file=sys.stderr)
+        sys.exit(2)
+    sys.exit(move_run(args.function_id, args.args))
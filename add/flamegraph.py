@@ -0,0 +1,291 @@
+import html
+import mmap
+import os
+import re
+from collections import namedtuple
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Flamegraphs shipped in the assets/ directory of every report
+FLAMEGRAPH_KINDS = ('exec_io', 'storage')
+
+# A frame of an inferno SVG: <g><title>name (cost, pct)</title><rect ... y=".." fg:x=".." fg:w=".."/>
+FRAME_RE = re.compile(rb'<g><title>([^<]*)</title><rect\b([^>]*)>')
+FRAME_ATTR_RE = re.compile(rb'\s(y|fg:x|fg:w)="([^"]*)"')
+
+# Root frame title such as "all (3.455287 gas units, 100%)"
+ROOT_TITLE_RE = re.compile(r'^\s*(\d+(?:\.\d+)?) ([^,]+),')
+
+# Folded stacks of one flamegraph: {stack: self weight}, the unit of the costs, and weights per unit
+FoldedProfile = namedtuple('FoldedProfile', ['stacks', 'unit', 'scale'])
+
+# Geometry of the differential flamegraph SVG
+FRAME_HEIGHT = 16
+SVG_WIDTH = 1200
+SVG_PAD = 10
+
+def iter_flamegraph_frames(svg_file):
+    """Yield (title, y, x, width) for every frame of an inferno flamegraph SVG
+
+    The file is scanned through a memory map with a regular expression, so
+    only one frame is decoded at a time whatever the size of the graph.
+    """
+    with open(svg_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            inverted = mm.find(b'var inverted = true') != -1
+            for match in FRAME_RE.finditer(mm):
+                attrs = dict(FRAME_ATTR_RE.findall(match.group(2)))
+                if b'fg:w' not in attrs or b'fg:x' not in attrs:
+                    continue
+                y = float(attrs[b'y'])
+                yield (html.unescape(match.group(1).decode('utf-8')), -y if inverted else y,
+                       int(attrs[b'fg:x']), int(attrs[b'fg:w']))
+
+def split_title(title):
+    """Split a frame title "name (cost unit, pct)" into the name and the details"""
+    name, separator, details = title.rpartition(' (')
+    if not separator:
+        return title, ''
+    return name, details.rstrip(')')
+
+def fold_flamegraph(svg_file):
+    """Convert an inferno flamegraph SVG to folded stacks
+
+    Depth comes from the vertical position of a frame and its parent is the
+    frame one level down whose span contains it. Self weights are the frame
+    weight minus that of its children, in the integer fg:w units of the
+    SVG. The implicit root frame ('all') is left out of the stacks.
+
+    Returns a FoldedProfile, or None when the SVG has no frames.
+    """
+    names = []
+    name_index = {}
+    name_ids = []
+    ys = []
+    xs = []
+    widths = []
+    root = None
+    for title, y, x, width in iter_flamegraph_frames(svg_file):
+        name, details = split_title(title)
+        # ';' separates frames in the folded format
+        name = name.replace(';', ':')
+        if name not in name_index:
+            name_index[name] = len(names)
+            names.append(name)
+        name_ids.append(name_index[name])
+        ys.append(y)
+        xs.append(x)
+        widths.append(width)
+        if name == 'all' and (root is None or width > root[1]):
+            root = (details, width)
+    if not name_ids:
+        return None
+
+    name_ids = np.asarray(name_ids)
+    xs = np.asarray(xs, dtype=np.int64)
+    widths = np.asarray(widths, dtype=np.int64)
+    # The bottom row (largest y) is depth 0
+    levels, depth = np.unique(-np.asarray(ys), return_inverse=True)
+
+    parent = np.full(len(xs), -1)
+    for level in range(1, len(levels)):
+        children = np.flatnonzero(depth == level)
+        parents = np.flatnonzero(depth == level - 1)
+        parents = parents[np.argsort(xs[parents], kind='stable')]
+        position = np.searchsorted(xs[parents], xs[children], side='right') - 1
+        valid = position >= 0
+        candidates = parents[np.maximum(position, 0)]
+        contained = valid & (xs[children] < xs[candidates] + widths[candidates])
+        parent[children[contained]] = candidates[contained]
+
+    has_parent = parent >= 0
+    child_weight = np.bincount(parent[has_parent], weights=widths[has_parent], minlength=len(xs))
+    self_weight = widths - child_weight.astype(np.int64)
+
+    paths = [None] * len(xs)
+    stacks = {}
+    for i in np.lexsort((xs, depth)):
+        name = names[name_ids[i]]
+        if parent[i] < 0:
+            paths[i] = '' if name == 'all' else name
+        else:
+            prefix = paths[parent[i]]
+            paths[i] = f'{prefix};{name}' if prefix else name
+        if self_weight[i] > 0 and paths[i]:
+            stacks[paths[i]] = stacks.get(paths[i], 0) + int(self_weight[i])
+
+    unit, scale = None, 1.0
+    if root is not None:
+        match = ROOT_TITLE_RE.match(root[0])
+        if match and float(match.group(1)) > 0:
+            unit = match.group(2)
+            scale = root[1] / float(match.group(1))
+    return FoldedProfile(stacks, unit, scale)
+
+def write_folded(profile, path):
+    """Write folded stacks, one "frame;frame;frame weight" line per stack, sorted by stack"""
+    with open(path, 'w') as f:
+        f.writelines(f'{stack} {weight}\n' for stack, weight in sorted(profile.stacks.items()))
+
+def read_folded(path):
+    """Read a folded stacks file into a FoldedProfile with unknown units"""
+    stacks = {}
+    with open(path) as f:
+        for line in f:
+            stack, _, weight = line.rstrip('\n').rpartition(' ')
+            if stack:
+                stacks[stack] = stacks.get(stack, 0) + int(float(weight))
+    return FoldedProfile(stacks, None, 1.0)
+
+def load_profile(path):
+    """Load a FoldedProfile from a flamegraph SVG or a folded stacks file"""
+    path = Path(path)
+    if path.suffix == '.svg':
+        return fold_flamegraph(path)
+    return read_folded(path)
+
+def average_profiles(profiles):
+    """Average the folded stacks of repeated reports of one benchmark, stack by stack"""
+    profiles = [profile for profile in profiles if profile is not None]
+    if not profiles:
+        return None
+    stacks = {}
+    for profile in profiles:
+        for stack, weight in profile.stacks.items():
+            stacks[stack] = stacks.get(stack, 0) + weight
+    return FoldedProfile({stack: weight / len(profiles) for stack, weight in stacks.items()},
+                         profiles[0].unit, profiles[0].scale)
+
+def export_flamegraphs(benchmark_dirs, output_dir='flamegraphs'):
+    """Fold the flamegraphs of every report into output_dir/<report>.<kind>.folded
+
+    Returns the number of files written.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(exist_ok=True)
+    written = 0
+    for benchmark_dir in benchmark_dirs:
+        for kind in FLAMEGRAPH_KINDS:
+            svg_file = benchmark_dir / 'assets' / f'{kind}.svg'
+            if not svg_file.exists():
+                continue
+            try:
+                profile = fold_flamegraph(svg_file)
+            except Exception as e:
+                print(f"Error folding flamegraph {svg_file}: {e}")
+                continue
+            if profile is not None:
+                write_folded(profile, output_dir / f'{benchmark_dir.name}.{kind}.folded')
+                written += 1
+    return written
+
+def diff_profiles(base, head):
+    """Align two folded profiles on their stacks
+
+    Returns a DataFrame with the base and head self weights, their
+    difference and relative change of every stack, largest changes first.
+    """
+    diff = pd.DataFrame({'base': pd.Series(base.stacks, dtype='float64'),
+                         'head': pd.Series(head.stacks, dtype='float64')}).fillna(0.0)
+    diff.index.name = 'stack'
+    diff['delta'] = diff['head'] - diff['base']
+    diff['change'] = diff['delta'] / diff['base'].where(diff['base'] != 0)
+    return diff.reindex(diff['delta'].abs().sort_values(ascending=False, kind='stable').index)
+
+def write_diff_folded(diff, path):
+    """Write the two-column folded format ("stack base head") read by difffolded-style tools"""
+    with open(path, 'w') as f:
+        f.writelines(f'{stack} {int(base)} {int(head)}\n'
+                     for stack, base, head in zip(diff.index, diff['base'], diff['head']))
+
+def print_profile_diff(diff, unit=None, scale=1.0, limit=10):
+    """Print the totals of both profiles and the stacks that grew or shrank the most"""
+    label = unit or 'samples'
+    base_total = diff['base'].sum() / scale
+    head_total = diff['head'].sum() / scale
+    change = f" ({(head_total - base_total) / base_total:+.2%})" if base_total else ''
+    print(f"\nTotal: {base_total:.6g} -> {head_total:.6g} {label}{change}")
+    for title, rows in (('grew', diff[diff['delta'] > 0]), ('shrank', diff[diff['delta'] < 0])):
+        print(f"\n=== {len(rows)} stacks {title} ===")
+        for stack, row in rows.head(limit).iterrows():
+            print(f"  {row['delta'] / scale:+.6g} {label}  {stack}")
+        if len(rows) > limit:
+            print(f"  ... {len(rows) - limit} more")
+
+def build_diff_tree(diff):
+    """Fold per-stack self weights into a tree of {name: [base, head, children]} with inclusive weights"""
+    tree = {}
+    for stack, base, head in zip(diff.index, diff['base'], diff['head']):
+        level = tree
+        for frame in stack.split(';'):
+            node = level.get(frame)
+            if node is None:
+                node = level[frame] = [0.0, 0.0, {}]
+            node[0] += base
+            node[1] += head
+            level = node[2]
+    return tree
+
+def tree_depth(tree):
+    """Return the number of levels of a diff tree"""
+    return 1 + max((tree_depth(node[2]) for node in tree.values()), default=0) if tree else 0
+
+def diff_color(base, head, max_delta):
+    """Red for stacks that grew and blue for stacks that shrank, saturating at the largest change"""
+    if max_delta == 0 or base == head:
+        return 'rgb(230,230,230)'
+    strength = int(200 * min(abs(head - base) / max_delta, 1.0))
+    if head > base:
+        return f'rgb(255,{220 - strength},{220 - strength})'
+    return f'rgb({220 - strength},{220 - strength},255)'
+
+def render_diff_flamegraph(diff, path, title='Differential flamegraph', unit=None, scale=1.0):
+    """Write an SVG flamegraph of the union of both profiles coloured by change
+
+    Frame widths are the larger of the base and head weights so stacks that
+    disappeared stay visible; red frames grew and blue frames shrank.
+    """
+    tree = build_diff_tree(diff)
+    depth = tree_depth(tree)
+    total = sum(max(node[0], node[1]) for node in tree.values())
+    max_delta = float(diff['delta'].abs().max()) if len(diff) else 0.0
+    height = (depth + 2) * FRAME_HEIGHT + 3 * SVG_PAD
+    width = SVG_WIDTH - 2 * SVG_PAD
+    label = unit or 'samples'
+
+    def fmt(value):
+        return f'{value / scale:.6g}'
+
+    frames = []
+
+    def layout(level, x, row):
+        for name, (base, head, children) in sorted(level.items()):
+            span = max(base, head)
+            if total <= 0 or span <= 0:
+                continue
+            frame_width = span / total * width
+            y = height - SVG_PAD - (row + 1) * FRAME_HEIGHT
+            change = f', {(head - base) / base:+.2%}' if base else ''
+            tooltip = html.escape(f'{name} ({fmt(base)} -> {fmt(head)} {label}{change})')
+            text = html.escape(name[:int(frame_width / 7)]) if frame_width > 21 else ''
+            frames.append(
+                f'<g><title>{tooltip}</title>'
+                f'<rect x="{SVG_PAD + x:.2f}" y="{y}" width="{frame_width:.2f}" height="{FRAME_HEIGHT - 1}" '
+                f'fill="{diff_color(base, head, max_delta)}"/>'
+                f'<text x="{SVG_PAD + x + 3:.2f}" y="{y + FRAME_HEIGHT - 4}">{text}</text></g>')
+            layout(children, x, row + 1)
+            x += frame_width
+
+    layout(tree, 0.0, 0)
+    with open(path, 'w') as f:
+        f.write(f'<?xml version="1.0" standalone="no"?>\n'
+                f'<svg version="1.1" width="{SVG_WIDTH}" height="{height}" xmlns="http://www.w3.org/2000/svg">'
+                f'<style>text {{ font-family:monospace; font-size:12px }}</style>'
+                f'<text x="{SVG_WIDTH / 2}" y="{2 * SVG_PAD}" text-anchor="middle" font-size="17">'
+                f'{html.escape(title)}</text>')
+        f.write(''.join(frames))
+        f.write('</svg>\n')
@@ -0,0 +1,155 @@
+import re
+from array import array
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Opcode catalogue listing every Move opcode, its bytecode value and its type
+OPCODE_CATALOGUE_FILE = 'all_opcodes.csv'
+
+# Bytecode value and name of an opcode, e.g. "0x45 => Ok(Opcodes::VEC_POP_BACK),"
+BYTECODE_RE = re.compile(r'0x([0-9A-Fa-f]{1,2})\s*=>\s*Ok\(Opcodes::(\w+)\)')
+
+# IDs from here up are handed out to names that are not in the catalogue
+DYNAMIC_ID_START = 0x100
+
+def find_opcode_catalogue(path=None):
+    """Return the path of all_opcodes.csv: the given one, else in ., add/ or next to this module"""
+    if path is not None:
+        return Path(path)
+    for candidate in (Path(OPCODE_CATALOGUE_FILE), Path('add') / OPCODE_CATALOGUE_FILE,
+                      Path(__file__).with_name(OPCODE_CATALOGUE_FILE)):
+        if candidate.exists():
+            return candidate
+    return Path(OPCODE_CATALOGUE_FILE)
+
+def read_opcode_catalogue(path):
+    """Read all_opcodes.csv into Opcode (lower-cased), Type and Code columns
+
+    Code is the bytecode value of the opcode, -1 where the catalogue has
+    none. The bytecode column of the file has the first opcode's mapping as
+    its header, so values are taken from the raw lines.
+    """
+    catalogue = pd.read_csv(path, usecols=lambda c: c in ('Opcode', 'Type'))
+    catalogue['Opcode'] = catalogue['Opcode'].str.lower()
+    with open(path, 'r', encoding='utf-8-sig') as f:
+        bytecodes = {name.lower(): int(value, 16) for value, name in BYTECODE_RE.findall(f.read())}
+    catalogue['Code'] = catalogue['Opcode'].map(bytecodes).fillna(-1).astype('int16')
+    return catalogue
+
+class OpcodeRegistry:
+    """Interns opcode names to small integer IDs
+
+    Move opcodes get their bytecode value from the catalogue, so their IDs
+    are the same in every process and fit a uint8. Any other name (an opcode
+    the catalogue lacks, a native or a 0x.. frame) gets the next ID from
+    DYNAMIC_ID_START up in the order this process first sees it; results
+    carry those names along so another process can remap them.
+    """
+
+    def __init__(self, catalogue=None):
+        self.catalogue = catalogue
+        self.ids = {}
+        self.names = [None] * DYNAMIC_ID_START
+        self._table = None
+        if catalogue is not None:
+            for name, code in zip(catalogue['Opcode'], catalogue['Code']):
+                if code >= 0 and name not in self.ids:
+                    self.ids[name] = int(code)
+                    self.names[code] = name
+
+    def intern(self, name):
+        """Return the ID of name, assigning the next dynamic ID to a new name"""
+        code = self.ids.get(name)
+        if code is None:
+            # Catalogued opcodes match whatever their case
+            code = self.ids.get(name.lower())
+            if code is None or code >= DYNAMIC_ID_START:
+                code = len(self.names)
+                self.names.append(name)
+                self._table = None
+            self.ids[name] = code
+        return code
+
+    @property
+    def dynamic_names(self):
+        """Names of the dynamic IDs, in ID order"""
+        return tuple(self.names[DYNAMIC_ID_START:])
+
+    def name(self, code):
+        """Return the name of an ID"""
+        return self.names[code]
+
+    def decode(self, codes):
+        """Return the names of an array of IDs as an object array"""
+        if self._table is None:
+            self._table = np.asarray(self.names, dtype=object)
+        return self._table[np.asarray(codes)]
+
+    def categorical(self, codes):
+        """Return an array of IDs as a pandas Categorical over the names that occur in it
+
+        Categories are sorted by name, so grouping orders rows as it would
+        on the names themselves.
+        """
+        used, inverse = np.unique(np.asarray(codes), return_inverse=True)
+        names = np.asarray([self.names[code] for code in used], dtype=object)
+        order = np.argsort(names, kind='stable')
+        rank = np.empty(len(order), dtype=np.int32)
+        rank[order] = np.arange(len(order), dtype=np.int32)
+        return pd.Categorical.from_codes(rank[inverse.reshape(-1)], names[order])
+
+    def totals(self, codes, gas):
+        """Return {name: (hits, total gas)} of parallel arrays of IDs and gas units"""
+        used, inverse = np.unique(np.asarray(codes), return_inverse=True)
+        inverse = inverse.reshape(-1)
+        hits = np.bincount(inverse, minlength=len(used))
+        gas_totals = np.bincount(inverse, weights=np.asarray(gas, dtype=np.float64), minlength=len(used))
+        return {self.names[code]: (int(count), float(total)) for code, count, total in zip(used, hits, gas_totals)}
+
+    def remap(self, codes, dynamic_names=()):
+        """Translate IDs interned by another process into IDs of this registry
+
+        dynamic_names are that process's dynamic names; catalogued IDs are
+        shared and left as they are. Returns a numpy array, without copying
+        when nothing needs translating.
+        """
+        codes = np.asarray(codes)
+        if tuple(dynamic_names) == tuple(self.names[DYNAMIC_ID_START:DYNAMIC_ID_START + len(dynamic_names)]):
+            return codes
+        table = np.arange(DYNAMIC_ID_START + len(dynamic_names), dtype=np.uint16)
+        table[DYNAMIC_ID_START:] = [self.intern(name) for name in dynamic_names]
+        return table[codes]
+
+    def code_dtype(self):
+        """Smallest unsigned integer type holding every ID handed out so far"""
+        return np.uint8 if len(self.names) <= DYNAMIC_ID_START else np.uint16
+
+def code_array(codes=()):
+    """Return an array('B') of IDs, widened to array('H') by append_code when a dynamic ID arrives"""
+    return array('B', codes)
+
+def append_code(codes, code):
+    """Append an ID to a code_array, returning the array to keep using"""
+    if code >= DYNAMIC_ID_START and codes.typecode == 'B':
+        codes = array('H', codes)
+    codes.append(code)
+    return codes
+
+@lru_cache(maxsize=None)
+def _load_opcode_registry(path):
+    try:
+        catalogue = read_opcode_catalogue(path) if path.exists() else None
+    except Exception as e:
+        print(f"Error reading opcode catalogue {path}: {e}")
+        catalogue = None
+    return OpcodeRegistry(catalogue)
+
+def load_opcode_registry(path=None):
+    """Return the process-wide OpcodeRegistry of the catalogue, built on first use
+
+    Without a catalogue every name gets a dynamic ID.
+    """
+    return _load_opcode_registry(find_opcode_catalogue(path).resolve())
@@ -0,0 +1,118 @@
+import json
+import sys
+import time
+from datetime import datetime, timezone
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def rss_mb(peak):
+    """Convert an ru_maxrss value to MB; it is in bytes on macOS and in kilobytes elsewhere"""
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+def peak_rss_mb():
+    """Return the peak resident set size of this process in MB, None where it cannot be measured"""
+    if resource is None:
+        return None
+    return rss_mb(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def child_usage():
+    """Return (CPU seconds, peak RSS in MB) of the finished child processes, (0.0, None) where unavailable
+
+    Worker processes are only accounted for once they have exited.
+    """
+    if resource is None:
+        return 0.0, None
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime, rss_mb(usage.ru_maxrss) if usage.ru_maxrss else None
+
+class StageTimer:
+    """Wall-clock time, CPU time, peak RSS and item counts of consecutive stages of an analysis
+
+    Each lap closes the stage running since the previous lap (or since the
+    timer was created) under the given name; laps with the same name add
+    up. CPU time is split between this process and the worker processes
+    that exited during the stage. Per-report parse timings can be recorded
+    alongside with add_report.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.reports = []
+        self.started_at = datetime.now(timezone.utc).isoformat(timespec='seconds')
+        self._last = time.perf_counter()
+        self._last_cpu = time.process_time()
+        self._last_child_cpu = child_usage()[0]
+
+    def lap(self, name, **counts):
+        """Close the running stage as name, adding counts of the items it processed"""
+        now = time.perf_counter()
+        cpu = time.process_time()
+        child_cpu, child_peak = child_usage()
+        rss = peak_rss_mb()
+
+        stage = self.stages.setdefault(name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'child_cpu_seconds': 0.0,
+                                              'peak_rss_mb': None, 'child_peak_rss_mb': None, 'counts': {}})
+        stage['wall_seconds'] += now - self._last
+        stage['cpu_seconds'] += cpu - self._last_cpu
+        stage['child_cpu_seconds'] += child_cpu - self._last_child_cpu
+        if rss is not None:
+            stage['peak_rss_mb'] = max(stage['peak_rss_mb'] or 0.0, rss)
+        if child_peak is not None:
+            stage['child_peak_rss_mb'] = max(stage['child_peak_rss_mb'] or 0.0, child_peak)
+        for key, value in counts.items():
+            stage['counts'][key] = stage['counts'].get(key, 0) + value
+
+        self._last = now
+        self._last_cpu = cpu
+        self._last_child_cpu = child_cpu
+
+    def add_report(self, report, **fields):
+        """Record the parse of one report, e.g. its wall and CPU seconds and trace lines"""
+        self.reports.append({'report': str(report), **fields})
+
+    def total(self):
+        """Return the sums over all stages, with the overall peak RSS"""
+        stages = self.stages.values()
+        peaks = [stage['peak_rss_mb'] for stage in stages if stage['peak_rss_mb'] is not None]
+        child_peaks = [stage['child_peak_rss_mb'] for stage in stages if stage['child_peak_rss_mb'] is not None]
+        return {
+            'wall_seconds': sum(stage['wall_seconds'] for stage in stages),
+            'cpu_seconds': sum(stage['cpu_seconds'] for stage in stages),
+            'child_cpu_seconds': sum(stage['child_cpu_seconds'] for stage in stages),
+            'peak_rss_mb': max(peaks) if peaks else None,
+            'child_peak_rss_mb': max(child_peaks) if child_peaks else None,
+        }
+
+    def summary(self, **metadata):
+        """Return the stages, their total and the reports, slowest first, as a JSON-serializable dict"""
+        return {
+            'started_at': self.started_at,
+            **metadata,
+            'total': self.total(),
+            'stages': [{'stage': name, **stage} for name, stage in self.stages.items()],
+            'reports': sorted(self.reports, key=lambda report: report.get('wall_seconds', 0.0), reverse=True),
+        }
+
+    def write_json(self, path, **metadata):
+        """Write the summary to a JSON file"""
+        with open(path, 'w') as f:
+            json.dump(self.summary(**metadata), f, indent=2)
+
+    def print_summary(self, slowest=5):
+        """Print a table of the stages and the slowest reports"""
+        print(f"\n{'Stage':<14}{'Wall (s)':>10}{'CPU (s)':>10}{'Workers (s)':>13}{'Peak RSS':>11}  Items")
+        for name, stage in list(self.stages.items()) + [('total', {**self.total(), 'counts': {}})]:
+            peak = f"{stage['peak_rss_mb']:.0f} MB" if stage['peak_rss_mb'] is not None else '-'
+            counts = ', '.join(f"{value} {key.replace('_', ' ')}" for key, value in stage['counts'].items())
+            print(f"{name:<14}{stage['wall_seconds']:>10.3f}{stage['cpu_seconds']:>10.3f}"
+                  f"{stage['child_cpu_seconds']:>13.3f}{peak:>11}  {counts}")
+
+        parsed = [report for report in self.reports if not report.get('cached')]
+        if parsed:
+            print(f"\nSlowest of {len(parsed)} parsed reports:")
+            for report in sorted(parsed, key=lambda report: report.get('wall_seconds', 0.0), reverse=True)[:slowest]:
+                print(f"  {report['report']}: {report.get('wall_seconds', 0.0):.3f}s wall, "
+                      f"{report.get('cpu_seconds', 0.0):.3f}s CPU, {report.get('trace_lines', 0)} trace lines")
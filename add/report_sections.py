@@ -0,0 +1,205 @@
+import html
+import mmap
+import os
+import re
+from collections import namedtuple
+
+import pandas as pd
+
+# A module the transaction loaded, with its size and loading cost
+Dependency = namedtuple('Dependency', ['name', 'size_bytes', 'gas'])
+
+# A row of the State Reads, Events or State Write Ops tables
+StateAccess = namedtuple('StateAccess', ['resource', 'hits', 'gas'])
+
+# A row of the Storage States or Events tables, in APT; refund_apt is 0 when there is none
+StorageFee = namedtuple('StorageFee', ['path', 'cost_apt', 'refund_apt'])
+
+# A load<...>, create<...>, modify<...> or delete<...> line of the Full Execution Trace
+TraceAccess = namedtuple('TraceAccess', ['kind', 'resource', 'gas'])
+
+# Typed contents of the non-opcode sections of a report
+ReportSections = namedtuple(
+    'ReportSections',
+    ['intrinsic_gas', 'dependencies', 'state_reads', 'transaction_write_gas', 'event_writes', 'state_writes',
+     'storage_transaction_apt', 'storage_states', 'storage_events', 'trace_accesses']
+)
+
+# Section headings in the order they appear in a report; each section runs to the next heading found
+SECTION_MARKERS = [
+    ('intrinsic', b'<h4>Intrinsic Cost</h4>'),
+    ('dependencies', b'<h4>Dependencies</h4>'),
+    ('execution', b'<h4>Execution</h4>'),
+    ('state_reads', b'<h4>State Reads</h4>'),
+    ('ledger_transaction', b'<h5>Transaction Itself</h5>'),
+    ('ledger_events', b'<h5>Events</h5>'),
+    ('state_writes', b'<h5>State Write Ops</h5>'),
+    ('storage', b'<h3>Storage</h3>'),
+    ('storage_transaction', b'<h4>Transaction</h4>'),
+    ('storage_states', b'<h4>States</h4>'),
+    ('storage_events', b'<h4>Events</h4>'),
+    ('trace', b'<h2>Full Execution Trace</h2>'),
+]
+
+ROW_RE = re.compile(rb'<tr>(.*?)</tr>', re.DOTALL)
+CELL_RE = re.compile(rb'<t([dh])[^>]*>(.*?)</t[dh]>', re.DOTALL)
+TAG_RE = re.compile(r'<[^>]+>')
+GAS_UNITS_RE = re.compile(rb'(\d+(?:\.\d+)?) gas units')
+APT_RE = re.compile(rb'(\d+(?:\.\d+)?) APT')
+
+# Storage accesses in the unescaped trace text, e.g. "load<0x1::account::Account>    0.302385    6.48%"
+TRACE_ACCESS_RE = re.compile(r'^\s*(load|create|modify|delete)<(.*)>\s+(\d+(?:\.\d+)?)\s', re.MULTILINE)
+
+def split_sections(data):
+    """Return {section: bytes} for the sections of a report found in data"""
+    found = []
+    position = 0
+    for name, marker in SECTION_MARKERS:
+        start = data.find(marker, position)
+        if start != -1:
+            found.append((name, start, start + len(marker)))
+            position = start + len(marker)
+    return {name: data[body:found[i + 1][1] if i + 1 < len(found) else len(data)]
+            for i, (name, _, body) in enumerate(found)}
+
+def parse_number(text):
+    """Parse a numeric table cell, None for '/' or empty cells"""
+    text = text.strip().rstrip('%')
+    try:
+        return float(text)
+    except ValueError:
+        return None
+
+def table_rows(section):
+    """Return the data rows of the first table of a section as lists of cell texts
+
+    Header rows (th cells or bold labels) are skipped.
+    """
+    rows = []
+    for row in ROW_RE.findall(section or b''):
+        cells = CELL_RE.findall(row)
+        if not cells or any(kind == b'h' or b'<b>' in cell for kind, cell in cells):
+            continue
+        rows.append([html.unescape(TAG_RE.sub('', cell.decode('utf-8'))).strip() for _, cell in cells])
+    return rows
+
+def state_accesses(section):
+    """Parse a (resource, hits, gas, percentage) table"""
+    return tuple(StateAccess(row[0], int(parse_number(row[1]) or 0), parse_number(row[2]) or 0.0)
+                 for row in table_rows(section) if len(row) >= 3)
+
+def storage_fees(section):
+    """Parse a (path, cost, percentage[, refund, percentage]) storage table"""
+    return tuple(StorageFee(row[0], parse_number(row[1]) or 0.0,
+                            (parse_number(row[3]) or 0.0) if len(row) >= 4 else 0.0)
+                 for row in table_rows(section) if len(row) >= 2)
+
+def first_number(pattern, section):
+    """Return the first number pattern matches in section, or None"""
+    match = pattern.search(section or b'')
+    return float(match.group(1)) if match else None
+
+def extract_report_sections(html_file, trace_text=None):
+    """Parse the Dependencies, State Reads, Ledger Writes and Storage sections of a report
+
+    The trace text, when given, adds its storage access lines. Returns None
+    for an empty file.
+    """
+    with open(html_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            marker = mm.find(SECTION_MARKERS[-1][1])
+            sections = split_sections(mm[:marker if marker != -1 else len(mm)])
+
+    transaction_write = table_rows(sections.get('ledger_transaction'))
+    return ReportSections(
+        intrinsic_gas=first_number(GAS_UNITS_RE, sections.get('intrinsic')),
+        dependencies=tuple(Dependency(row[0], int(parse_number(row[1]) or 0), parse_number(row[2]) or 0.0)
+                           for row in table_rows(sections.get('dependencies')) if len(row) >= 3),
+        state_reads=state_accesses(sections.get('state_reads')),
+        transaction_write_gas=parse_number(transaction_write[0][0]) if transaction_write else None,
+        event_writes=state_accesses(sections.get('ledger_events')),
+        state_writes=state_accesses(sections.get('state_writes')),
+        storage_transaction_apt=first_number(APT_RE, sections.get('storage_transaction')),
+        storage_states=storage_fees(sections.get('storage_states')),
+        storage_events=storage_fees(sections.get('storage_events')),
+        trace_accesses=tuple(TraceAccess(kind, resource, float(gas))
+                             for kind, resource, gas in TRACE_ACCESS_RE.findall(trace_text or ''))
+    )
+
+def ratio(numerator, denominator):
+    """Return numerator / denominator, or None when the denominator is zero"""
+    return numerator / denominator if denominator else None
+
+def section_metrics(sections, total_gas=None):
+    """Derive per-report storage and IO metrics from its ReportSections"""
+    dependency_bytes = sum(dependency.size_bytes for dependency in sections.dependencies)
+    dependency_gas = sum(dependency.gas for dependency in sections.dependencies)
+    state_reads = sum(access.hits for access in sections.state_reads)
+    state_read_gas = sum(access.gas for access in sections.state_reads)
+    state_writes = sum(access.hits for access in sections.state_writes)
+    state_write_gas = sum(access.gas for access in sections.state_writes)
+    event_write_gas = sum(access.gas for access in sections.event_writes)
+    transaction_write_gas = sections.transaction_write_gas or 0.0
+    storage_fee = ((sections.storage_transaction_apt or 0.0)
+                   + sum(fee.cost_apt for fee in sections.storage_states + sections.storage_events))
+    loads = [access.gas for access in sections.trace_accesses if access.kind == 'load']
+    io_gas = dependency_gas + state_read_gas + state_write_gas + event_write_gas + transaction_write_gas
+
+    return {
+        'total_gas': total_gas,
+        'intrinsic_gas': sections.intrinsic_gas,
+        'dependencies': len(sections.dependencies),
+        'dependency_bytes': dependency_bytes,
+        'dependency_gas': dependency_gas,
+        'gas_per_dependency_byte': ratio(dependency_gas, dependency_bytes),
+        'state_reads': state_reads,
+        'state_read_gas': state_read_gas,
+        'gas_per_state_read': ratio(state_read_gas, state_reads),
+        'state_writes': state_writes,
+        'state_write_gas': state_write_gas,
+        'gas_per_state_write': ratio(state_write_gas, state_writes),
+        'transaction_write_gas': transaction_write_gas,
+        'event_write_gas': event_write_gas,
+        'trace_loads': len(loads),
+        'trace_load_gas': sum(loads),
+        'storage_fee_apt': storage_fee,
+        'storage_refund_apt': sum(fee.refund_apt for fee in sections.storage_states + sections.storage_events),
+        'storage_apt_per_state_write': ratio(storage_fee, state_writes),
+        'io_gas': io_gas,
+        'io_share': ratio(io_gas, total_gas)
+    }
+
+def section_records(benchmark, sections):
+    """Flatten the per-resource rows of a report into (benchmark, section, name, hits, gas, apt) records"""
+    records = [(benchmark, 'dependency', dependency.name, 1, dependency.gas, None)
+               for dependency in sections.dependencies]
+    for section, accesses in (('state_read', sections.state_reads), ('event_write', sections.event_writes),
+                              ('state_write', sections.state_writes)):
+        records.extend((benchmark, section, access.resource, access.hits, access.gas, None) for access in accesses)
+    for section, fees in (('storage_state', sections.storage_states), ('storage_event', sections.storage_events)):
+        records.extend((benchmark, section, fee.path, 1, None, fee.cost_apt - fee.refund_apt) for fee in fees)
+    records.extend((benchmark, f'trace_{access.kind}', access.resource, 1, access.gas, None)
+                   for access in sections.trace_accesses)
+    return records
+
+def summarize_sections(results):
+    """Return (io_stats, records) DataFrames over all reports carrying sections
+
+    io_stats has the metrics of section_metrics averaged over the reports of
+    each benchmark; records has one row per resource of every section.
+    """
+    metrics = []
+    records = []
+    for result in results:
+        if result.sections is None:
+            continue
+        metrics.append({'benchmark': result.operation_name, **section_metrics(result.sections, result.total_gas)})
+        records.extend(section_records(result.operation_name, result.sections))
+    if not metrics:
+        return None, None
+
+    io_stats = pd.DataFrame(metrics).set_index('benchmark').astype('float64').groupby('benchmark').mean()
+    records = pd.DataFrame(records, columns=['benchmark', 'section', 'name', 'hits', 'gas', 'apt'])
+    return io_stats, records
@@ -0,0 +1,236 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from opcodes import load_opcode_registry
+
+# Default location of the results database
+RESULTS_DB_FILE = 'gas_results.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    label TEXT,
+    source TEXT
+);
+CREATE TABLE IF NOT EXISTS benchmarks (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS opcodes (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS benchmark_runs (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    benchmark_id INTEGER NOT NULL REFERENCES benchmarks(id),
+    reports INTEGER NOT NULL,
+    total_gas REAL,
+    PRIMARY KEY (run_id, benchmark_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS opcode_aggregates (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    benchmark_id INTEGER NOT NULL REFERENCES benchmarks(id),
+    opcode_id INTEGER NOT NULL REFERENCES opcodes(id),
+    count INTEGER NOT NULL,
+    sum REAL NOT NULL,
+    min REAL,
+    max REAL,
+    PRIMARY KEY (run_id, benchmark_id, opcode_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS opcode_aggregates_opcode_run ON opcode_aggregates (opcode_id, run_id);
+CREATE INDEX IF NOT EXISTS opcode_aggregates_benchmark_run ON opcode_aggregates (benchmark_id, run_id);
+CREATE TABLE IF NOT EXISTS trace_rows (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    benchmark_id INTEGER NOT NULL REFERENCES benchmarks(id),
+    opcode_id INTEGER NOT NULL REFERENCES opcodes(id),
+    gas REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trace_rows_opcode_run ON trace_rows (opcode_id, run_id);
+CREATE INDEX IF NOT EXISTS trace_rows_benchmark_run ON trace_rows (benchmark_id, run_id);
+"""
+
+def open_results_db(path=RESULTS_DB_FILE):
+    """Open (creating if needed) the results database"""
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA foreign_keys=ON')
+    conn.executescript(SCHEMA)
+    return conn
+
+def name_ids(conn, table, names):
+    """Return {name: id} for names in the benchmarks or opcodes table, inserting missing ones"""
+    names = sorted(set(names))
+    conn.executemany(f'INSERT OR IGNORE INTO {table} (name) VALUES (?)', ((name,) for name in names))
+    ids = {}
+    # Look names up in chunks to stay below SQLite's bound parameter limit
+    for start in range(0, len(names), 500):
+        chunk = names[start:start + 500]
+        ids.update(conn.execute(f'SELECT name, id FROM {table} WHERE name IN ({",".join("?" * len(chunk))})',
+                                chunk))
+    return ids
+
+def report_aggregates(result):
+    """Return [(opcode, count, sum, min, max)] for one parsed report
+
+    Without per-line data (Execution table only), min and max are the
+    average cost per hit.
+    """
+    if result.opcode_accumulators is not None:
+        return [(opcode, acc.count, acc.total, acc.min, acc.max)
+                for opcode, acc in result.opcode_accumulators.items()]
+
+    if result.opcode_codes is not None:
+        registry = load_opcode_registry()
+        frame = pd.DataFrame({'code': registry.remap(result.opcode_codes, result.opcode_names),
+                              'gas': np.frombuffer(result.gas_units, dtype=np.float64)})
+        grouped = frame.groupby('code')['gas'].agg(['count', 'sum', 'min', 'max'])
+        return [(registry.name(code), int(row['count']), row['sum'], row['min'], row['max'])
+                for code, row in grouped.iterrows()]
+
+    if result.execution_table is not None:
+        names, hits, gas = result.execution_table
+        return [(name, row_hits, row_gas, row_gas / row_hits, row_gas / row_hits)
+                for name, row_hits, row_gas in zip(names, hits, gas) if row_hits]
+
+    return []
+
+def aggregate_results(results):
+    """Merge parsed reports into per-(benchmark, opcode) and per-benchmark aggregates
+
+    Reports of the same benchmark are merged. Returns (aggregates,
+    benchmark_totals): aggregates maps (benchmark, opcode) to (count, sum,
+    min, max); benchmark_totals maps benchmarks to (reports, mean total gas),
+    the total being None when no report carries one.
+    """
+    aggregates = {}
+    benchmark_totals = {}
+    for result in results:
+        rows = report_aggregates(result)
+        if not rows:
+            continue
+        reports, total = benchmark_totals.get(result.operation_name, (0, None))
+        if result.total_gas is not None:
+            total = (total or 0.0) + result.total_gas
+        benchmark_totals[result.operation_name] = (reports + 1, total)
+        for opcode, count, total_gas, low, high in rows:
+            key = (result.operation_name, opcode)
+            previous = aggregates.get(key)
+            if previous is not None:
+                count += previous[0]
+                total_gas += previous[1]
+                low = min(low, previous[2])
+                high = max(high, previous[3])
+            aggregates[key] = (count, total_gas, low, high)
+
+    benchmark_totals = {benchmark: (reports, total / reports if total is not None else None)
+                        for benchmark, (reports, total) in benchmark_totals.items()}
+    return aggregates, benchmark_totals
+
+def aggregates_frame(aggregates, benchmark_totals):
+    """Return the output of aggregate_results in the layout of load_run_aggregates"""
+    frame = pd.DataFrame(
+        [(benchmark, opcode, int(count), total_gas, total_gas / count if count else np.nan, low, high)
+         for (benchmark, opcode), (count, total_gas, low, high) in sorted(aggregates.items())],
+        columns=['benchmark', 'opcode', 'count', 'sum', 'mean', 'min', 'max'])
+    frame['total_gas'] = frame['benchmark'].map({benchmark: total for benchmark, (_, total)
+                                                 in benchmark_totals.items()})
+    return frame
+
+def store_run(conn, results, label=None, source=None, raw=False):
+    """Append one analysis run to the database in a single transaction and return its id
+
+    Reports of the same benchmark are merged into one aggregate per
+    (benchmark, opcode). With raw, the per-line trace rows are stored too
+    when the results carry them.
+    """
+    aggregates, benchmark_totals = aggregate_results(results)
+
+    with conn:
+        run_id = conn.execute('INSERT INTO runs (created_at, label, source) VALUES (?, ?, ?)',
+                              (datetime.now(timezone.utc).isoformat(timespec='seconds'), label, source)).lastrowid
+        benchmark_ids = name_ids(conn, 'benchmarks', benchmark_totals)
+        opcode_ids = name_ids(conn, 'opcodes', (opcode for _, opcode in aggregates))
+
+        conn.executemany(
+            'INSERT INTO benchmark_runs (run_id, benchmark_id, reports, total_gas) VALUES (?, ?, ?, ?)',
+            ((run_id, benchmark_ids[benchmark], reports, total)
+             for benchmark, (reports, total) in benchmark_totals.items()))
+        conn.executemany(
+            'INSERT INTO opcode_aggregates (run_id, benchmark_id, opcode_id, count, sum, min, max) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            ((run_id, benchmark_ids[benchmark], opcode_ids[opcode], int(count), float(total_gas), low, high)
+             for (benchmark, opcode), (count, total_gas, low, high) in aggregates.items()))
+
+        if raw:
+            registry = load_opcode_registry()
+            for result in results:
+                if result.opcode_codes is None or result.operation_name not in benchmark_ids:
+                    continue
+                benchmark_id = benchmark_ids[result.operation_name]
+                names = registry.decode(registry.remap(result.opcode_codes, result.opcode_names))
+                conn.executemany(
+                    'INSERT INTO trace_rows (run_id, benchmark_id, opcode_id, gas) VALUES (?, ?, ?, ?)',
+                    ((run_id, benchmark_id, opcode_ids[name], gas)
+                     for name, gas in zip(names, result.gas_units)))
+    return run_id
+
+def list_runs(conn, last=10):
+    """Return the last runs, newest first"""
+    return pd.read_sql_query(
+        'SELECT r.id AS run, r.created_at, r.label, r.source, '
+        '(SELECT COUNT(*) FROM benchmark_runs b WHERE b.run_id = r.id) AS benchmarks '
+        'FROM runs r ORDER BY r.id DESC LIMIT ?', conn, params=(last,))
+
+def opcode_history(conn, opcode, last=10, benchmark=None):
+    """Return the cost of an opcode in each of the last runs, newest first
+
+    Costs are aggregated over all benchmarks unless one is given. The
+    (opcode, run) index makes this a range scan whatever the size of the
+    history.
+    """
+    query = ('SELECT a.run_id AS run, r.created_at, r.label, SUM(a.count) AS count, '
+             'SUM(a.sum) / SUM(a.count) AS mean, MIN(a.min) AS min, MAX(a.max) AS max, SUM(a.sum) AS sum '
+             'FROM opcode_aggregates a JOIN runs r ON r.id = a.run_id '
+             'WHERE a.opcode_id = (SELECT id FROM opcodes WHERE name = ?) '
+             'AND a.run_id IN (SELECT id FROM runs ORDER BY id DESC LIMIT ?)')
+    params = [opcode, last]
+    if benchmark is not None:
+        query += ' AND a.benchmark_id = (SELECT id FROM benchmarks WHERE name = ?)'
+        params.append(benchmark)
+    query += ' GROUP BY a.run_id ORDER BY a.run_id DESC'
+    return pd.read_sql_query(query, conn, params=params)
+
+def load_run_aggregates(conn, run_id=None):
+    """Return the (benchmark, opcode) aggregates of a run, the latest one by default
+
+    total_gas is the transaction total of the benchmark. Returns None if the
+    run does not exist.
+    """
+    if run_id is None:
+        run_id = conn.execute('SELECT MAX(id) FROM runs').fetchone()[0]
+    if run_id is None or conn.execute('SELECT 1 FROM runs WHERE id = ?', (run_id,)).fetchone() is None:
+        return None
+    return pd.read_sql_query(
+        'SELECT b.name AS benchmark, o.name AS opcode, a.count, a.sum, a.sum / a.count AS mean, a.min, a.max, '
+        'r.total_gas '
+        'FROM opcode_aggregates a JOIN benchmarks b ON b.id = a.benchmark_id JOIN opcodes o ON o.id = a.opcode_id '
+        'LEFT JOIN benchmark_runs r ON r.run_id = a.run_id AND r.benchmark_id = a.benchmark_id '
+        'WHERE a.run_id = ? ORDER BY b.name, o.name', conn, params=(run_id,))
+
+def resolve_run_id(conn, spec):
+    """Resolve a run id, 'latest' or 'latest~N' (the Nth run before the latest) to a run id
+
+    Returns None if there is no such run.
+    """
+    if str(spec).isdigit():
+        return int(spec)
+    name, _, back = str(spec).partition('~')
+    if name != 'latest' or (back and not back.isdigit()):
+        return None
+    row = conn.execute('SELECT id FROM runs ORDER BY id DESC LIMIT 1 OFFSET ?', (int(back or 0),)).fetchone()
+    return row[0] if row else None
@@ -5,11 +5,42 @@ set -e
 
 # Default settings
 SKIP_COMPILE=false
+JOBS=4
+REPEAT=1
+STORE_ARGS=()
+MANIFEST=benchmarks.json
+WATCH=false
+APTOS="${APTOS_BIN:-aptos}"
+
+usage() {
+    cat <<EOF
+Usage: $0 [--benchmark-only] [--jobs N] [--repeat K] [--store] [--manifest FILE] [--watch]
+
+  --benchmark-only  Skip cleaning, compiling and publishing the module
+  --jobs N          Run at most N benchmarks at once (default: 4)
+  --repeat K        Run every benchmark K times and report statistics across runs (default: 1)
+  --store           Append the results to the results database
+  --manifest FILE   Benchmark manifest (default: benchmarks.json)
+  --watch           Update the statistics while the reports land
+
+The benchmarks run through \$APTOS_BIN (default: aptos). To try the runner
+without a network, use the stand-in CLI, which writes synthetic reports and
+fails the functions listed in \$FAKE_APTOS_FAIL:
+
+  APTOS_BIN=\$PWD/fake_aptos.py $0 --benchmark-only
+EOF
+}
 
 # Parse command line arguments
 while [[ "$#" -gt 0 ]]; do
     case $1 in
         --benchmark-only) SKIP_COMPILE=true ;;
+        --jobs) JOBS="$2"; shift ;;
+        --repeat) REPEAT="$2"; shift ;;
+        --store) STORE_ARGS=(--store) ;;
+        --manifest) MANIFEST="$2"; shift ;;
+        --watch) WATCH=true ;;
+        -h|--help) usage; exit 0 ;;
         *) echo "Unknown parameter: $1"; exit 1 ;;
     esac
     shift
@@ -25,15 +56,15 @@ check_status() {
 
 if [ "$SKIP_COMPILE" = false ]; then
     echo "Cleaning previous builds..."
-    aptos move clean
+    "$APTOS" move clean
     check_status "Failed to clean previous builds"
 
     echo "Compiling Move module..."
-    aptos move compile --named-addresses address_move=default
+    "$APTOS" move compile --named-addresses address_move=default
     check_status "Failed to compile module"
 
     echo "Publishing module..."
-    aptos move publish --named-addresses address_move=default --assume-yes
+    "$APTOS" move publish --named-addresses address_move=default --assume-yes
     check_status "Failed to publish module"
 else
     echo "Skipping compilation and publishing, running benchmarks only..."
@@ -41,84 +72,35 @@ fi
 
 echo "Running benchmarks..."
 
-# Define benchmarks with their arguments
-# Format: "function_name|arg1_type:arg1_value|arg2_type:arg2_value|..."
-# Use empty string for no arguments
-declare -a BENCHMARK_CONFIGS=(
-    "initialize"
-    "benchmark_vector_ops"
-    "benchmark_vec_unpack"
-    "benchmark_vec_swap"
-    "benchmark_vec_mut_borrow"
-    "benchmark_storage_ops"
-    "benchmark_control_flow"
-    "benchmark_arithmetic|u64:3|u64:4"
-    "benchmark_conditional_logic|u64:10|u64:5|u8:255|u8:127|bool:true|bool:false"
-    "benchmark_bit_shift|u8:10|u8:3"
-    "benchmark_casting|u8:10|u16:1000|u32:100000|u64:10000000|u128:10000000000|u256:1000000000000"
-    "benchmark_unpack_ref_global"
-    "benchmark_exists"
-    "benchmark_move_to"
-    "benchmark_move_from"
-    "benchmark_imm_borrow_field_generic"
-    "benchmark_mut_borrow_field_generic"
-    "benchmark_imm_borrow_global_generic"
-    "benchmark_mut_borrow_global_generic"
-    "benchmark_pack_generic"
-    "benchmark_unpack"
-    "benchmark_unpack_generic"
-)
-
 # Clear previous gas profiling results
 rm -rf gas-profiling/*
 mkdir -p gas-profiling
 
-# Run each benchmark
-for config in "${BENCHMARK_CONFIGS[@]}"; do
-    # Split the config string by pipe symbol
-    IFS='|' read -r -a config_parts <<< "$config"
-    
-    # Get the function name (first part)
-    benchmark="${config_parts[0]}"
-    
-    echo "Running benchmark: $benchmark"
-    
-    # Start constructing the command
-    cmd="aptos move run --function-id \"default::opcode_benchmark::$benchmark\""
-    
-    # Add arguments if they exist (from second part onwards)
-    for ((i=1; i<${#config_parts[@]}; i++)); do
-        cmd+=" --args '${config_parts[i]}'"
-    done
-    
-    # Add profile-gas flag
-    cmd+=" --profile-gas"
-    
-    # Execute the command
-    echo "Executing: $cmd"
-    eval $cmd
-    check_status "Failed to run benchmark: $benchmark"
-    
-    # Wait a bit between benchmarks
-    sleep 2
-    
-    # Verify that files were created
-    latest_dir=$(ls -t gas-profiling | head -n1)
-    if [ -z "$latest_dir" ]; then
-        echo "Warning: No output directory created for benchmark $benchmark"
-    else
-        echo "Output directory created: gas-profiling/$latest_dir"
-        
-        # Check for required files
-        if [ ! -f "gas-profiling/$latest_dir/result.json" ]; then
-            echo "Warning: result.json not found for benchmark $benchmark"
-        fi
-        if [ ! -f "gas-profiling/$latest_dir/trace.json" ]; then
-            echo "Warning: trace.json not found for benchmark $benchmark"
-        fi
-    fi
-done
+# Run every benchmark concurrently; each invocation is mapped to the exact
+# report directory it produced, then the analysis runs once all have finished.
+# With --repeat K every benchmark runs K times and is summarized across runs.
+# With --store the results are also appended to the results database, which
+# keeps the history that clearing gas-profiling/ would otherwise lose.
+# The benchmarks and their parameter sweeps are listed in the manifest; the
+# gas of every sweep is fitted against its parameters during the analysis
+if [ "$WATCH" = true ]; then
+    # Keep live statistics up to date while the reports land, then stop the
+    # watcher (it flushes its outputs) before the full analysis rewrites them
+    python3 analyze_benchmarks.py --no-report watch &
+    WATCH_PID=$!
+    trap 'kill "$WATCH_PID" 2>/dev/null || true' EXIT
+
+    python3 analyze_benchmarks.py run --manifest "$MANIFEST" --parallel "$JOBS" --repeat "$REPEAT"
+    check_status "Failed to run benchmarks"
+    kill "$WATCH_PID" && wait "$WATCH_PID" || true
 
-echo "All benchmarks completed. Results are in gas-profiling directory."
-echo "Running Python analysis script..."
-python3 analyze_benchmarks.py 
\ No newline at end of file
+    REPEAT_ARGS=()
+    if [ "$REPEAT" -gt 1 ]; then
+        REPEAT_ARGS=(--repeat-stats)
+    fi
+    python3 analyze_benchmarks.py "${STORE_ARGS[@]}" "${REPEAT_ARGS[@]}"
+    check_status "Failed to analyze benchmarks"
+else
+    python3 analyze_benchmarks.py "${STORE_ARGS[@]}" run --manifest "$MANIFEST" --parallel "$JOBS" --repeat "$REPEAT" --analyze
+    check_status "Failed to run benchmarks"
+fi
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+from opcodes import load_opcode_registry
+
+# Modified z-score above which a repeated measurement is rejected (Iglewicz and Hoaglin)
+OUTLIER_THRESHOLD = 3.5
+
+# Bootstrap settings; the seed keeps reports reproducible
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_MAX_SAMPLE = 5000
+BOOTSTRAP_SEED = 0
+
+def outlier_mask(values, threshold=OUTLIER_THRESHOLD):
+    """Return a mask of the values kept after rejecting outliers by modified z-score
+
+    Gas is deterministic, so when most runs agree exactly (MAD of zero) any
+    run that differs from the median is rejected.
+    """
+    values = np.asarray(values, dtype='float64')
+    if len(values) < 3:
+        return np.ones(len(values), dtype=bool)
+
+    median = np.median(values)
+    mad = np.median(np.abs(values - median))
+    if mad == 0:
+        return np.isclose(values, median, rtol=1e-9, atol=0.0)
+    return np.abs(0.6745 * (values - median) / mad) <= threshold
+
+def coefficient_of_variation(values, axis=None):
+    """Return the population coefficient of variation (std / mean)"""
+    values = np.asarray(values, dtype='float64')
+    mean = values.mean(axis=axis)
+    std = values.std(axis=axis)
+    return np.divide(std, mean, out=np.zeros_like(np.asarray(std, dtype='float64')), where=mean != 0)
+
+def bootstrap_ci(values, statistic, confidence=0.95, resamples=BOOTSTRAP_RESAMPLES, seed=BOOTSTRAP_SEED):
+    """Return a percentile bootstrap confidence interval of statistic(values, axis=1)
+
+    Large samples are subsampled to BOOTSTRAP_MAX_SAMPLE values first, which
+    keeps the resampling matrix small while barely widening the interval.
+    """
+    values = np.asarray(values, dtype='float64')
+    if len(values) == 0:
+        return np.nan, np.nan
+    if len(values) == 1:
+        point = float(statistic(values[np.newaxis, :], axis=1)[0])
+        return point, point
+
+    rng = np.random.default_rng(seed)
+    if len(values) > BOOTSTRAP_MAX_SAMPLE:
+        values = rng.choice(values, BOOTSTRAP_MAX_SAMPLE, replace=False)
+    samples = values[rng.integers(0, len(values), size=(resamples, len(values)))]
+    estimates = statistic(samples, axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(estimates, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+def summarize_repeats(values, confidence=0.95, threshold=OUTLIER_THRESHOLD):
+    """Summarize repeated measurements after outlier rejection
+
+    Returns (runs, rejected, median, ci_low, ci_high, cv) where the confidence
+    interval is that of the median.
+    """
+    values = np.asarray(values, dtype='float64')
+    kept = values[outlier_mask(values, threshold)]
+    ci_low, ci_high = bootstrap_ci(kept, np.median, confidence)
+    return (len(values), len(values) - len(kept), float(np.median(kept)), ci_low, ci_high,
+            float(coefficient_of_variation(kept)))
+
+def is_variable_cost(unit_costs, confidence=0.95, variable_cv=1e-3):
+    """Decide whether the unit cost of an opcode varies across repeated runs
+
+    unit_costs are the per-run average costs of one (benchmark, opcode) pair,
+    after outlier rejection. The cost is variable when the lower bound of the
+    bootstrap confidence interval of their coefficient of variation exceeds
+    variable_cv, i.e. the spread is significantly larger than the tolerance
+    rather than a single differing value.
+
+    Returns (cv, cv_ci_low, is_variable).
+    """
+    unit_costs = np.asarray(unit_costs, dtype='float64')
+    cv = float(coefficient_of_variation(unit_costs)) if len(unit_costs) else 0.0
+    cv_ci_low, _ = bootstrap_ci(unit_costs, coefficient_of_variation, confidence)
+    return cv, cv_ci_low, bool(cv_ci_low > variable_cv)
+
+def run_opcode_totals(result):
+    """Return {opcode: (hits, total_gas)} for one parsed report, whatever it was parsed into"""
+    if result.opcode_accumulators is not None:
+        return {opcode: (acc.count, acc.total) for opcode, acc in result.opcode_accumulators.items()}
+
+    if result.opcode_codes is not None:
+        registry = load_opcode_registry()
+        return registry.totals(registry.remap(result.opcode_codes, result.opcode_names), result.gas_units)
+
+    if result.execution_table is not None:
+        names, hits, gas = result.execution_table
+        return {name: (row_hits, row_gas) for name, row_hits, row_gas in zip(names, hits, gas)}
+
+    return {}
+
+def repeated_run_statistics(results, confidence=0.95, variable_cv=1e-3, threshold=OUTLIER_THRESHOLD):
+    """Aggregate repeated runs of every benchmark
+
+    Every report is one run of its benchmark. Outliers are rejected among the
+    runs of the same benchmark (and benchmark/opcode pair), never across
+    benchmarks, since costs legitimately differ between contexts. For the
+    same reason the variable-cost test runs on the kept runs of every pair,
+    and an opcode is variable when any of its pairs is.
+
+    Returns (benchmark_df, benchmark_opcode_df, opcode_df).
+    """
+    run_totals = {}
+    pair_samples = {}
+    for result in results:
+        totals = run_opcode_totals(result)
+        if not totals:
+            continue
+        benchmark = result.operation_name
+        run_totals.setdefault(benchmark, []).append(sum(total for _, total in totals.values()))
+        for opcode, (hits, total) in totals.items():
+            pair_samples.setdefault((benchmark, opcode), []).append((hits, total / hits if hits else 0.0))
+
+    columns = ['runs', 'rejected', 'median', 'ci_low', 'ci_high', 'cv']
+    benchmark_df = pd.DataFrame(
+        [(benchmark, *summarize_repeats(totals, confidence, threshold))
+         for benchmark, totals in sorted(run_totals.items())],
+        columns=['benchmark'] + columns
+    ).set_index('benchmark')
+
+    pair_rows = []
+    accepted_costs = {}
+    # Highest CV lower bound over the pairs of every opcode, and whether any pair is variable
+    opcode_variability = {}
+    for (benchmark, opcode), samples in sorted(pair_samples.items()):
+        hits = np.array([sample[0] for sample in samples], dtype='float64')
+        unit_costs = np.array([sample[1] for sample in samples])
+        kept = outlier_mask(unit_costs, threshold) & outlier_mask(hits, threshold)
+        accepted_costs.setdefault(opcode, []).extend(unit_costs[kept])
+        ci_low, ci_high = bootstrap_ci(unit_costs[kept], np.median, confidence)
+        cv, cv_ci_low, is_variable = is_variable_cost(unit_costs[kept], confidence, variable_cv)
+        pair_rows.append((benchmark, opcode, len(samples), int((~kept).sum()),
+                          float(np.median(hits[kept])), float(np.median(unit_costs[kept])),
+                          ci_low, ci_high, cv, cv_ci_low, is_variable))
+        highest_ci_low, any_variable = opcode_variability.get(opcode, (float('-inf'), False))
+        opcode_variability[opcode] = (max(highest_ci_low, cv_ci_low), any_variable or is_variable)
+    benchmark_opcode_df = pd.DataFrame(
+        pair_rows,
+        columns=['benchmark', 'opcode', 'runs', 'rejected', 'median_hits', 'median', 'ci_low', 'ci_high', 'cv',
+                 'cv_ci_low', 'variable']
+    )
+
+    opcode_rows = []
+    for opcode, costs in sorted(accepted_costs.items()):
+        costs = np.asarray(costs)
+        ci_low, ci_high = bootstrap_ci(costs, np.median, confidence)
+        cv_ci_low, is_variable = opcode_variability[opcode]
+        opcode_rows.append((opcode, len(costs), float(np.median(costs)), ci_low, ci_high,
+                            float(coefficient_of_variation(costs)), cv_ci_low, is_variable))
+    opcode_df = pd.DataFrame(
+        opcode_rows,
+        columns=['opcode', 'samples', 'median', 'ci_low', 'ci_high', 'cv', 'cv_ci_low', 'variable']
+    ).set_index('opcode')
+
+    return benchmark_df.round(6), benchmark_opcode_df.round(6), opcode_df.round(6)
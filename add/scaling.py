@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+from cost_model import nnls
+
+# Candidate complexity classes: the leading term of the swept parameter n, None for none.
+# Every class above constant also keeps a linear term, so classes are nested models
+COMPLEXITY_CLASSES = {
+    'constant': None,
+    'linear': lambda n: n,
+    'n log n': lambda n: n * np.log2(np.maximum(n, 1.0)),
+    'quadratic': lambda n: n ** 2,
+}
+
+# Residuals below this fraction of the gas are rounding in the reports, not misfit
+RESIDUAL_FLOOR = 1e-12
+
+def complexity_columns(complexity, n):
+    """Return the design columns of a complexity class: intercept, linear term and leading term"""
+    columns = [np.ones(len(n))]
+    if complexity != 'constant':
+        columns.append(n)
+    if complexity not in ('constant', 'linear'):
+        columns.append(COMPLEXITY_CLASSES[complexity](n))
+    return columns
+
+def complexity_curve(complexity, coefficients, n):
+    """Evaluate a fitted curve given its (intercept, linear, leading term) coefficients"""
+    columns = np.column_stack(complexity_columns(complexity, np.asarray(n, dtype='float64')))
+    return columns @ np.asarray(coefficients, dtype='float64')[:columns.shape[1]]
+
+def fit_complexity(n, gas):
+    """Fit gas against n for every complexity class and pick the best by BIC
+
+    Each class is fitted by non-negative least squares as intercept +
+    linear * n + leading * term(n), the constant class without the n terms
+    and the linear class without a separate leading term. A class is only
+    tried with more distinct values of n than it has coefficients, except
+    that the constant is always tried and two values still get a linear fit. The lowest BIC wins, so a term
+    has to explain enough of the gas to pay for its coefficient.
+
+    Returns (complexity, (intercept, linear, leading), r2, bic_margin) where
+    the leading coefficient is 0 for the constant and linear classes and
+    bic_margin is how much worse the runner-up fits.
+    """
+    n = np.asarray(n, dtype='float64')
+    gas = np.asarray(gas, dtype='float64')
+    observations = len(gas)
+    distinct = len(np.unique(n))
+    floor = max(RESIDUAL_FLOOR * float(np.sum(gas ** 2)), np.finfo(float).tiny)
+    total_sum_squares = float(np.sum((gas - gas.mean()) ** 2))
+
+    fits = []
+    for complexity in COMPLEXITY_CLASSES:
+        columns = np.column_stack(complexity_columns(complexity, n))
+        if complexity != 'constant' and distinct <= columns.shape[1] and not (complexity == 'linear'
+                                                                              and distinct == 2):
+            continue
+        # Scale every column to a maximum of one so large n^2 terms keep the solve well conditioned
+        scales = np.maximum(np.abs(columns).max(axis=0), 1e-300)
+        solution = nnls(columns / scales, gas) / scales
+        residual_sum_squares = float(np.sum((columns @ solution - gas) ** 2))
+        bic = (observations * np.log(max(residual_sum_squares, floor) / observations)
+               + columns.shape[1] * np.log(observations))
+        fits.append((bic, complexity, solution, residual_sum_squares))
+
+    fits.sort(key=lambda fit: fit[0])
+    bic, complexity, solution, residual_sum_squares = fits[0]
+    r2 = 1.0 - residual_sum_squares / total_sum_squares if total_sum_squares > floor else 1.0
+    margin = fits[1][0] - bic if len(fits) > 1 else np.nan
+    coefficients = tuple(float(value) for value in np.pad(solution, (0, 3 - len(solution))))
+    return complexity, coefficients, r2, float(margin)
+
+def fit_scaling(points):
+    """Fit the gas of every swept benchmark against each of its swept parameters
+
+    points has one row per report with function, gas and one column per
+    parameter (NaN where a function does not take it). A parameter is swept
+    when it takes several values for a function; with several swept
+    parameters, every combination of the others is fitted separately.
+
+    Returns (fits, curves): fits is a DataFrame with one row per (function,
+    parameter, fixed values) slice; curves lists (fit row, n, gas) for
+    plotting.
+    """
+    parameters = [column for column in points.columns if column not in ('function', 'gas')]
+    rows = []
+    curves = []
+    for function, group in points.groupby('function', sort=True):
+        swept = [parameter for parameter in parameters
+                 if group[parameter].notna().all() and group[parameter].nunique() > 1]
+        for parameter in swept:
+            others = [other for other in swept if other != parameter]
+            slices = group.groupby(others, sort=True) if others else [((), group)]
+            for fixed, members in slices:
+                fixed = fixed if isinstance(fixed, tuple) else (fixed,)
+                members = members.sort_values(parameter)
+                n = members[parameter].to_numpy(dtype='float64')
+                gas = members['gas'].to_numpy(dtype='float64')
+                complexity, (intercept, linear, leading), r2, margin = fit_complexity(n, gas)
+                row = {
+                    'function': function,
+                    'parameter': parameter,
+                    'fixed': ', '.join(f'{other}={value:g}' for other, value in zip(others, fixed)),
+                    'points': len(members),
+                    'values': int(members[parameter].nunique()),
+                    'complexity': complexity,
+                    'intercept': intercept,
+                    'linear_coefficient': linear,
+                    'leading_coefficient': leading,
+                    'r2': r2,
+                    'bic_margin': margin
+                }
+                rows.append(row)
+                curves.append((row, n, gas))
+    return pd.DataFrame(rows), curves
@@ -0,0 +1,166 @@
+import argparse
+import contextlib
+import multiprocessing
+import os
+import shutil
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from compare import relative_change
+from synthetic_reports import write_synthetic_reports
+
+# Report counts the analyzer is timed at
+DEFAULT_SIZES = (10, 100, 1000, 10000, 100000)
+
+# Output of the suite, one row per (reports, stage) plus a total per size
+SELF_BENCHMARK_FILE = 'self_benchmark.csv'
+
+# Stages of analyze_gas_profiling in the order they run
+STAGES = ['discovery', 'parsing', 'aggregation', 'analyses', 'coverage', 'plotting', 'html']
+
+# Default relative slowdown or memory growth of a stage counted as a regression, and the
+# absolute slowdown below which timings are too short to compare
+DEFAULT_REGRESSION_THRESHOLD = 0.2
+MIN_REGRESSION_SECONDS = 0.05
+
+def run_analysis(workdir, options):
+    """Run the analyzer in workdir and return its StageTimer stages, plus their total
+
+    Meant to run in a fresh worker process, so the peak RSS is that of a
+    single analysis. The analyzer's own output is discarded.
+    """
+    from analyze_benchmarks import analyze_gas_profiling
+    from profiling import StageTimer
+
+    os.chdir(workdir)
+    timer = StageTimer()
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull), warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        analyze_gas_profiling(jobs=options['jobs'], cache_file=None, aggregate=options['aggregate'],
+                              report=options['report'], timer=timer)
+    return {**timer.stages, 'total': timer.total()}
+
+def prepare_workdir(root, size, report_dirs):
+    """Create root/reports-<size>/gas-profiling holding links to the first size reports"""
+    workdir = Path(root) / f'reports-{size}'
+    gas_profiling_dir = workdir / 'gas-profiling'
+    shutil.rmtree(workdir, ignore_errors=True)
+    gas_profiling_dir.mkdir(parents=True)
+    for report_dir in report_dirs[:size]:
+        (gas_profiling_dir / report_dir.name).symlink_to(report_dir.resolve(), target_is_directory=True)
+    # The coverage stage looks the opcode catalogue up next to the reports
+    catalogue = Path(__file__).with_name('all_opcodes.csv')
+    if catalogue.exists():
+        shutil.copy(catalogue, workdir)
+    return workdir
+
+def run_suite(sizes=DEFAULT_SIZES, root='.self-benchmark', trace_length=60, benchmarks=20, jobs=1,
+              aggregate='frame', report=True, seed=0):
+    """Time every stage of the analyzer at every report count
+
+    The largest set of synthetic reports is generated once and the smaller
+    sizes link to a prefix of it. Every size runs in its own process.
+    Returns a DataFrame of (reports, stage, seconds, reports_per_second,
+    peak_rss_mb) rows, a 'total' stage closing every size.
+    """
+    sizes = sorted(set(sizes))
+    root = Path(root)
+    start = time.perf_counter()
+    report_dirs = write_synthetic_reports(root / 'reports', sizes[-1], benchmarks, trace_length, seed)
+    print(f"Generated {len(report_dirs)} synthetic reports in {time.perf_counter() - start:.1f}s")
+
+    options = {'jobs': jobs, 'aggregate': aggregate, 'report': report}
+    rows = []
+    for size in sizes:
+        workdir = prepare_workdir(root, size, report_dirs)
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('spawn')) as executor:
+            try:
+                stages = executor.submit(run_analysis, workdir.resolve(), options).result()
+            except Exception as e:
+                print(f"Error analyzing {size} reports: {e}")
+                continue
+
+        order = {stage: i for i, stage in enumerate(STAGES + ['total'])}
+        for stage in sorted(stages, key=lambda stage: order.get(stage, len(STAGES) - 1)):
+            seconds, peak = stages[stage]['wall_seconds'], stages[stage]['peak_rss_mb']
+            rows.append({'reports': size, 'stage': stage, 'seconds': seconds,
+                         'reports_per_second': size / seconds if seconds > 0 else None, 'peak_rss_mb': peak})
+        seconds, peak = stages['total']['wall_seconds'], stages['total']['peak_rss_mb']
+        print(f"{size} reports: {seconds:.2f}s, {size / seconds:.0f} reports/s, "
+              f"peak RSS {peak if peak is not None else float('nan'):.0f} MB")
+    return pd.DataFrame(rows, columns=['reports', 'stage', 'seconds', 'reports_per_second', 'peak_rss_mb'])
+
+def find_regressions(timings, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """Compare timings with a previous run of the suite
+
+    A (reports, stage) regresses when it got slower by more than threshold
+    and MIN_REGRESSION_SECONDS, or its peak RSS grew by more than threshold.
+    Returns the joined rows with a regressed flag.
+    """
+    diff = baseline.merge(timings, on=['reports', 'stage'], suffixes=('_base', '_head'))
+    diff['time_change'] = relative_change(diff['seconds_base'], diff['seconds_head'])
+    diff['rss_change'] = relative_change(diff['peak_rss_mb_base'].fillna(0), diff['peak_rss_mb_head'].fillna(0))
+    slower = ((diff['time_change'] > threshold)
+              & (diff['seconds_head'] - diff['seconds_base'] > MIN_REGRESSION_SECONDS))
+    diff['regressed'] = slower | (diff['rss_change'] > threshold)
+    return diff
+
+def parse_args():
+    """Parse command line arguments"""
+    arg_parser = argparse.ArgumentParser(
+        description='Time every stage of analyze_benchmarks.py on synthetic reports')
+    arg_parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES),
+                            help=f'Report counts to time (default: {" ".join(map(str, DEFAULT_SIZES))})')
+    arg_parser.add_argument('--trace-length', type=int, default=60,
+                            help='Average number of opcodes per synthetic trace (default: 60)')
+    arg_parser.add_argument('--benchmarks', type=int, default=20,
+                            help='Number of distinct synthetic benchmarks (default: 20)')
+    arg_parser.add_argument('--jobs', '-j', type=int, default=1,
+                            help='Worker processes given to the analyzer (default: 1)')
+    arg_parser.add_argument('--aggregate', choices=['frame', 'stream'], default='frame',
+                            help='Aggregation mode of the analyzer (default: frame)')
+    arg_parser.add_argument('--no-report', action='store_true',
+                            help='Skip the plotting and HTML stages')
+    arg_parser.add_argument('--workdir', default='.self-benchmark',
+                            help='Directory for the synthetic reports and analyzer outputs '
+                                 '(default: .self-benchmark)')
+    arg_parser.add_argument('--keep', action='store_true',
+                            help='Keep the work directory afterwards')
+    arg_parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the synthetic report generator (default: 0)')
+    arg_parser.add_argument('--output', default=SELF_BENCHMARK_FILE,
+                            help=f'CSV the timings are written to (default: {SELF_BENCHMARK_FILE})')
+    arg_parser.add_argument('--baseline', default=None,
+                            help='Timings CSV of a previous run; exit with status 1 on regressions against it')
+    arg_parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                            help='Relative slowdown or memory growth counted as a regression '
+                                 f'(default: {DEFAULT_REGRESSION_THRESHOLD})')
+    return arg_parser.parse_args()
+
+if __name__ == "__main__":
+    args = parse_args()
+    try:
+        timings = run_suite(args.sizes, args.workdir, args.trace_length, args.benchmarks, args.jobs,
+                            args.aggregate, not args.no_report, args.seed)
+    finally:
+        if not args.keep:
+            shutil.rmtree(args.workdir, ignore_errors=True)
+
+    timings.round(6).to_csv(args.output, index=False)
+    print(f"\n{timings.to_string(index=False)}\n\nTimings saved to {args.output}")
+
+    if args.baseline:
+        diff = find_regressions(timings, pd.read_csv(args.baseline), args.threshold)
+        regressed = diff[diff['regressed']]
+        for _, row in regressed.iterrows():
+            print(f"  regressed {row['stage']} at {row['reports']} reports: "
+                  f"{row['seconds_base']:.3f}s -> {row['seconds_head']:.3f}s, "
+                  f"{row['peak_rss_mb_base']:.0f} -> {row['peak_rss_mb_head']:.0f} MB")
+        print(f"{len(regressed)} regressions against {args.baseline}" if len(regressed)
+              else f"No regressions against {args.baseline}")
+        sys.exit(1 if len(regressed) else 0)
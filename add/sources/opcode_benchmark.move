@@ -104,6 +104,30 @@ module address_move::opcode_benchmark {
         let _elem = vector::borrow(&vec, 0);
     }
 
+    // Sized Vector Operations Benchmark: push n elements, borrow `reads` of them, then pop them all
+    public entry fun benchmark_vector_ops_sized(_account: &signer, n: u64, reads: u64) {
+        let vec = vector::empty<u64>();
+
+        // Push
+        let i = 0;
+        while (i < n) {
+            vector::push_back(&mut vec, i);
+            i = i + 1;
+        };
+
+        // Borrow
+        let i = 0;
+        while (n > 0 && i < reads) {
+            let _elem = vector::borrow(&vec, i % n);
+            i = i + 1;
+        };
+
+        // Pop
+        while (!vector::is_empty(&vec)) {
+            let _val = vector::pop_back(&mut vec);
+        };
+    }
+
     // Vector Unpack Benchmark
     public entry fun benchmark_vec_unpack(_account: &signer) {
         // Create a vector
@@ -128,6 +152,22 @@ module address_move::opcode_benchmark {
         vector::destroy_empty(rest);
     }
     
+    // Sized Vector Unpack Benchmark: pop n elements from the front, each pop copying the rest
+    public entry fun benchmark_vec_unpack_sized(_account: &signer, n: u64) {
+        let vec = vector::empty<u64>();
+        let i = 0;
+        while (i < n) {
+            vector::push_back(&mut vec, i);
+            i = i + 1;
+        };
+
+        while (!vector::is_empty(&vec)) {
+            let (_front, rest) = vector_pop_front(vec);
+            vec = rest;
+        };
+        vector::destroy_empty(vec);
+    }
+
     // Helper function to simulate popping from the front of a vector (for vec_unpack benchmark)
     fun vector_pop_front<T: copy + drop>(vec: vector<T>): (T, vector<T>) {
         let len = vector::length(&vec);
@@ -0,0 +1,436 @@
+import json
+import re
+import time
+from bisect import bisect_right
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import pandas as pd
+
+from cost_model import load_cost_model
+
+# Suffixes of Move disassembly files picked up when a directory is given
+DISASSEMBLY_SUFFIXES = ('.asm', '.mvasm')
+
+# Iterations assumed for a loop whose bound is neither annotated nor inferred from its header
+DEFAULT_LOOP_ITERATIONS = 10
+
+# Output of the estimator, one row per function
+STATIC_ESTIMATE_FILE = 'static_gas_estimates.csv'
+
+# Disassembler lines: module header, function header and numbered instruction
+MODULE_RE = re.compile(r'^module\s+(?:\S+?(?:\.|::))?(\w+)\s*\{')
+FUNCTION_RE = re.compile(r'^((?:(?:entry|native|public(?:\(\w+\))?|friend|fun)\s+)*)(\w+)\s*(?:<[^(]*>)?\(')
+INSTRUCTION_RE = re.compile(r'^\s+(\d+):\s+([A-Z]\w*)(.*)$')
+
+# Operands: call target (new `Call m::f<T>(..)` and old `Call[3](f(..))` forms), branch offset
+# and loaded integer constant (`LdU64(100)`, `LdConst[0](u64: 100)`)
+CALL_TARGET_RE = re.compile(r'^(?:\[\d+\]\()?\s*(?:(\w+)::)?(\w+)\s*(<)?')
+BRANCH_TARGET_RE = re.compile(r'^\((\d+)\)')
+CONSTANT_RE = re.compile(r'^(?:\[\d+\])?\((?:u\d+:\s*)?(\d+)\)$')
+CAMEL_CASE_RE = re.compile(r'(?<=[a-z0-9])(?=[A-Z])')
+
+# Opcodes ending a basic block
+BRANCH_OPCODES = {'br_true', 'br_false', 'branch'}
+EXIT_OPCODES = {'ret', 'abort'}
+
+# Opcodes loading an integer constant, and loop header comparisons with the
+# iterations they give against a constant N when the counter starts at 0
+CONSTANT_OPCODES = {'ld_u8', 'ld_u16', 'ld_u32', 'ld_u64', 'ld_u128', 'ld_u256', 'ld_const'}
+BOUND_COMPARISONS = {'lt': 0, 'le': 1}
+
+# A function of a disassembled module; instructions are (offset, opcode, operand) where
+# operand is the branch target, (module, function) of a call, a loaded constant or None
+MoveFunction = namedtuple('MoveFunction', ['module', 'name', 'entry', 'native', 'instructions'])
+
+# Static estimate of one function along its most expensive path
+FunctionEstimate = namedtuple('FunctionEstimate', ['hits', 'gas', 'blocks', 'loops', 'assumed_loops',
+                                                   'unresolved'])
+
+def opcode_name(token):
+    """Convert a disassembler instruction name (BrFalse, LdU64) to a report opcode (br_false, ld_u64)"""
+    return CAMEL_CASE_RE.sub('_', token).lower()
+
+def parse_instruction(token, operand):
+    """Return the (opcode, operand) of one disassembled instruction"""
+    opcode = opcode_name(token)
+    operand = operand.strip()
+    if opcode in ('call', 'call_generic'):
+        match = CALL_TARGET_RE.match(operand)
+        if match is None:
+            return opcode, None
+        module, name, generic = match.groups()
+        return 'call_generic' if generic else opcode, (module, name)
+    if opcode in BRANCH_OPCODES:
+        match = BRANCH_TARGET_RE.match(operand)
+        return opcode, int(match.group(1)) if match else None
+    if opcode in CONSTANT_OPCODES:
+        match = CONSTANT_RE.match(operand)
+        return opcode, int(match.group(1)) if match else None
+    return opcode, None
+
+def parse_disassembly(path):
+    """Parse a Move disassembly file into a list of MoveFunction"""
+    functions = []
+    module = None
+    current = None
+    with open(path, 'r', encoding='utf-8', errors='replace') as f:
+        for line in f:
+            if current is not None:
+                match = INSTRUCTION_RE.match(line)
+                if match:
+                    opcode, operand = parse_instruction(match.group(2), match.group(3))
+                    current.instructions.append((int(match.group(1)), opcode, operand))
+                elif line.startswith('}'):
+                    current = None
+                continue
+            match = MODULE_RE.match(line)
+            if match:
+                module = match.group(1)
+                continue
+            match = FUNCTION_RE.match(line) if module is not None else None
+            if match:
+                modifiers = match.group(1).split()
+                function = MoveFunction(module, match.group(2), 'entry' in modifiers, 'native' in modifiers, [])
+                functions.append(function)
+                # Native functions have no body
+                if line.rstrip().endswith('{'):
+                    current = function
+    return functions
+
+def find_disassembly_files(paths):
+    """Return the disassembly files given directly or found under the given directories"""
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.rglob('*') if p.suffix in DISASSEMBLY_SUFFIXES and p.is_file()))
+        elif path.exists():
+            files.append(path)
+        else:
+            print(f"Disassembly not found at: {path}")
+    return files
+
+def parse_disassembly_files(files, jobs=1):
+    """Parse disassembly files, in worker processes when jobs > 1, yielding results in file order"""
+    if jobs <= 1 or len(files) <= 1:
+        yield from map(parse_disassembly, files)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from executor.map(parse_disassembly, files, chunksize=max(1, len(files) // (jobs * 4)))
+
+def load_functions(paths, jobs=1):
+    """Parse every disassembly file and return a dict mapping (module, function) to MoveFunction"""
+    files = find_disassembly_files(paths)
+    functions = {}
+    for path, module_functions in zip(files, parse_disassembly_files(files, jobs)):
+        for function in module_functions:
+            if (function.module, function.name) in functions:
+                print(f"Warning: {function.module}::{function.name} in {path} is defined twice, keeping the first")
+                continue
+            functions[(function.module, function.name)] = function
+    return functions
+
+def load_loop_bounds(path):
+    """Load loop-bound annotations from a JSON file
+
+    Keys are `module::function@B<n>` for the loop headed by block n, or
+    `module::function` for the loops of a function whose bound cannot be
+    inferred from the loop test; values are the iterations per entry of
+    the loop.
+    """
+    with open(path, 'r') as f:
+        return {key: int(value) for key, value in json.load(f).items()}
+
+def basic_blocks(instructions):
+    """Split a function body into basic blocks
+
+    Returns (blocks, successors): blocks lists the instructions of every
+    block in code order, successors the indices of the blocks each can
+    branch or fall through to.
+    """
+    offsets = [offset for offset, _, _ in instructions]
+    leaders = {offsets[0]}
+    for i, (_, opcode, operand) in enumerate(instructions):
+        if opcode in BRANCH_OPCODES and operand is not None:
+            leaders.add(operand)
+        if (opcode in BRANCH_OPCODES or opcode in EXIT_OPCODES) and i + 1 < len(offsets):
+            leaders.add(offsets[i + 1])
+    leaders = sorted(leader for leader in leaders if offsets[0] <= leader <= offsets[-1])
+
+    blocks = [[] for _ in leaders]
+    for instruction in instructions:
+        blocks[bisect_right(leaders, instruction[0]) - 1].append(instruction)
+
+    successors = []
+    for index, block in enumerate(blocks):
+        _, opcode, operand = block[-1]
+        targets = []
+        if opcode in BRANCH_OPCODES and operand is not None:
+            targets.append(bisect_right(leaders, operand) - 1)
+        if opcode not in EXIT_OPCODES and opcode != 'branch' and index + 1 < len(blocks):
+            targets.append(index + 1)
+        successors.append(targets)
+    return blocks, successors
+
+def find_loops(successors):
+    """Find the natural loops of a control-flow graph
+
+    Returns (back_edges, loops): back_edges is the set of (latch, header)
+    edges found by depth-first search from block 0, loops maps every header
+    to the set of blocks of its loop.
+    """
+    back_edges = set()
+    state = {0: 'open'}
+    stack = [(0, iter(successors[0]))]
+    while stack:
+        block, targets = stack[-1]
+        target = next(targets, None)
+        if target is None:
+            state[block] = 'done'
+            stack.pop()
+        elif state.get(target) == 'open':
+            back_edges.add((block, target))
+        elif target not in state:
+            state[target] = 'open'
+            stack.append((target, iter(successors[target])))
+
+    predecessors = [[] for _ in successors]
+    for block, targets in enumerate(successors):
+        for target in targets:
+            predecessors[target].append(block)
+
+    loops = {}
+    for latch, header in back_edges:
+        body = loops.setdefault(header, {header})
+        pending = [latch]
+        while pending:
+            block = pending.pop()
+            if block not in body:
+                body.add(block)
+                pending.extend(predecessors[block])
+    return back_edges, loops
+
+def infer_loop_bound(header_block):
+    """Infer the iterations of a `while (i < N)` loop from its header block, None when it has no such test"""
+    for i in range(len(header_block) - 1, 0, -1):
+        opcode = header_block[i][1]
+        if opcode in BOUND_COMPARISONS:
+            _, previous, constant = header_block[i - 1]
+            if previous in CONSTANT_OPCODES and constant is not None:
+                return constant + BOUND_COMPARISONS[opcode]
+            return None
+    return None
+
+def most_expensive_path(successors, back_edges, loops, weights):
+    """Return the blocks on the most expensive path from block 0 to an exit
+
+    Back edges are replaced by edges from the latch to the exits of its
+    loop, so a path runs through every loop body once and the loop
+    multiplicity is carried by the block weights. Falls back to every block
+    when the graph is not reducible to a DAG this way.
+    """
+    edges = [[target for target in targets if (block, target) not in back_edges]
+             for block, targets in enumerate(successors)]
+    for latch, header in back_edges:
+        body = loops[header]
+        edges[latch].extend({target for block in body for target in successors[block] if target not in body})
+
+    incoming = [0] * len(edges)
+    for targets in edges:
+        for target in targets:
+            incoming[target] += 1
+    order = []
+    ready = [block for block, count in enumerate(incoming) if count == 0]
+    while ready:
+        block = ready.pop()
+        order.append(block)
+        for target in edges[block]:
+            incoming[target] -= 1
+            if incoming[target] == 0:
+                ready.append(target)
+    if len(order) < len(edges):
+        return range(len(edges))
+
+    best = {0: (weights[0], None)}
+    for block in order:
+        if block not in best:
+            continue
+        cost = best[block][0]
+        for target in edges[block]:
+            if target not in best or cost + weights[target] > best[target][0]:
+                best[target] = (cost + weights[target], block)
+
+    exits = [block for block in best if not edges[block]]
+    block = max(exits, key=lambda exit_block: best[exit_block][0]) if exits else 0
+    path = []
+    while block is not None:
+        path.append(block)
+        block = best[block][1]
+    return path
+
+class StaticEstimator:
+    """Estimate the execution gas of Move functions from their disassembly
+
+    Opcodes are counted per basic block, weighted by the iterations of the
+    loops around the block, and summed along the most expensive path of the
+    control-flow graph. Calls into functions that were disassembled too add
+    the callee's estimate; other calls only count the call itself and are
+    reported as unresolved.
+    """
+
+    def __init__(self, functions, unit_costs, loop_bounds=None, loop_iterations=DEFAULT_LOOP_ITERATIONS):
+        self.functions = functions
+        self.unit_costs = unit_costs.to_dict()
+        self.loop_bounds = loop_bounds or {}
+        self.loop_iterations = loop_iterations
+        self.estimates = {}
+        self._active = set()
+
+    def estimate(self, key):
+        """Return the FunctionEstimate of the function (module, name)"""
+        if key not in self.estimates:
+            self._active.add(key)
+            self.estimates[key] = self._estimate(self.functions[key])
+            self._active.discard(key)
+        return self.estimates[key]
+
+    def _call_hits(self, caller, target, unresolved):
+        """Return the opcode hits of a call into target, recording calls that cannot be followed"""
+        module, name = target
+        key = (module or caller.module, name)
+        if key in self._active:
+            unresolved.add(f"{key[0]}::{key[1]} (recursive)")
+            return Counter()
+        function = self.functions.get(key)
+        if function is None or function.native:
+            unresolved.add(f"{key[0]}::{key[1]}")
+            return Counter()
+        callee = self.estimate(key)
+        unresolved.update(callee.unresolved)
+        return callee.hits
+
+    def _loop_bound(self, function, header, header_block):
+        """Return (iterations, assumed) of the loop headed by block header"""
+        qualified = f"{function.module}::{function.name}"
+        if f"{qualified}@B{header}" in self.loop_bounds:
+            return self.loop_bounds[f"{qualified}@B{header}"], False
+        inferred = infer_loop_bound(header_block)
+        if inferred is not None:
+            return inferred, False
+        if qualified in self.loop_bounds:
+            return self.loop_bounds[qualified], False
+        return self.loop_iterations, True
+
+    def _estimate(self, function):
+        unresolved = set()
+        if not function.instructions:
+            return FunctionEstimate(Counter(), 0.0, 0, 0, 0, frozenset())
+
+        blocks, successors = basic_blocks(function.instructions)
+        back_edges, loops = find_loops(successors)
+
+        multiplicity = [1] * len(blocks)
+        assumed_loops = 0
+        for header, body in loops.items():
+            iterations, assumed = self._loop_bound(function, header, blocks[header])
+            assumed_loops += assumed
+            for block in body:
+                multiplicity[block] *= iterations
+
+        block_hits = []
+        weights = []
+        for index, block in enumerate(blocks):
+            hits = Counter(opcode for _, opcode, _ in block)
+            for _, opcode, operand in block:
+                if opcode in ('call', 'call_generic') and operand is not None:
+                    hits.update(self._call_hits(function, operand, unresolved))
+            block_hits.append(hits)
+            weights.append(multiplicity[index] * sum(count * self.unit_costs.get(opcode, 0.0)
+                                                     for opcode, count in hits.items()))
+
+        total = Counter()
+        for index in most_expensive_path(successors, back_edges, loops, weights):
+            for opcode, count in block_hits[index].items():
+                total[opcode] += count * multiplicity[index]
+        gas = sum(count * self.unit_costs.get(opcode, 0.0) for opcode, count in total.items())
+        return FunctionEstimate(total, gas, len(blocks), len(loops), assumed_loops, frozenset(unresolved))
+
+def load_unit_costs(stats_file='opcode_statistics.csv', cost_model_file=None):
+    """Return (unit_costs, overhead) from a fitted cost model, or the measured means of the opcode statistics"""
+    if cost_model_file:
+        return load_cost_model(cost_model_file)
+    return pd.read_csv(stats_file, index_col='opcode')['mean'], 0.0
+
+def estimate_gas(paths, stats_file='opcode_statistics.csv', cost_model_file=None, loop_bounds_file=None,
+                 loop_iterations=DEFAULT_LOOP_ITERATIONS, jobs=1):
+    """Estimate the execution gas of every function in the given disassembly files or directories
+
+    Returns a DataFrame with one row per function, or None when nothing
+    could be estimated.
+    """
+    start = time.perf_counter()
+    try:
+        unit_costs, overhead = load_unit_costs(stats_file, cost_model_file)
+        loop_bounds = load_loop_bounds(loop_bounds_file) if loop_bounds_file else None
+    except Exception as e:
+        print(f"Error loading estimator inputs: {e}")
+        return None
+
+    functions = load_functions(paths, jobs)
+    if not functions:
+        print("No disassembled functions found.")
+        return None
+
+    estimator = StaticEstimator(functions, unit_costs, loop_bounds, loop_iterations)
+    rows = []
+    for key, function in functions.items():
+        estimate = estimator.estimate(key)
+        unmeasured = sorted(opcode for opcode in estimate.hits if opcode not in estimator.unit_costs)
+        rows.append({
+            'module': function.module,
+            'function': function.name,
+            'entry': function.entry,
+            'blocks': estimate.blocks,
+            'loops': estimate.loops,
+            'assumed_loops': estimate.assumed_loops,
+            'opcodes': sum(estimate.hits.values()),
+            'estimated_gas': estimate.gas,
+            'transaction_gas': estimate.gas + overhead if function.entry else None,
+            'unmeasured_opcodes': ';'.join(unmeasured),
+            'unresolved_calls': ';'.join(sorted(estimate.unresolved))
+        })
+    estimates = pd.DataFrame(rows).sort_values(['module', 'function'], ignore_index=True)
+    modules = estimates['module'].nunique()
+    print(f"Estimated {len(estimates)} functions in {modules} modules in {time.perf_counter() - start:.2f}s")
+    return estimates
+
+def print_estimates(estimates, coverage_file='opcode_coverage.csv'):
+    """Print the estimates of the entry functions and the opcodes without a measured cost"""
+    entries = estimates[estimates['entry']]
+    if entries.empty:
+        print("\nNo entry functions found.")
+    else:
+        print("\nEstimated execution gas of entry functions (most expensive path):")
+        for _, row in entries.sort_values('estimated_gas', ascending=False).iterrows():
+            notes = []
+            if row['assumed_loops']:
+                notes.append(f"{row['assumed_loops']} loops with assumed bounds")
+            if row['unmeasured_opcodes']:
+                notes.append(f"unmeasured: {row['unmeasured_opcodes'].replace(';', ', ')}")
+            if row['unresolved_calls']:
+                notes.append(f"{row['unresolved_calls'].count(';') + 1} unresolved calls")
+            print(f"  {row['module']}::{row['function']}: {row['estimated_gas']:.6f} "
+                  f"({row['opcodes']} opcodes)" + (f" [{'; '.join(notes)}]" if notes else ''))
+
+    unmeasured = Counter(opcode for opcodes in estimates['unmeasured_opcodes'] if opcodes
+                         for opcode in opcodes.split(';'))
+    if not unmeasured:
+        return
+    status = {}
+    if Path(coverage_file).exists():
+        coverage = pd.read_csv(coverage_file, usecols=['Opcode', 'Status'])
+        status = dict(zip(coverage['Opcode'].str.lower(), coverage['Status']))
+    print("\nOpcodes without a measured cost (counted as 0 gas):")
+    for opcode, count in unmeasured.most_common():
+        print(f"  {opcode}: {status.get(opcode, 'not in the opcode catalogue')}, in {count} functions")
@@ -0,0 +1,256 @@
+import argparse
+import html
+import random
+from pathlib import Path
+
+# Opcodes of the synthetic traces: (unit cost, relative frequency), as measured in the real reports
+SYNTHETIC_OPCODES = {
+    'copy_loc': (0.000854, 16), 'create_ty': (0.0004, 20), 'ld_u64': (0.00022, 12), 'move_loc': (0.000441, 11),
+    'pop': (0.000147, 9), 'st_loc': (0.000441, 9), 'read_ref': (0.001295, 6), 'br_false': (0.000441, 5),
+    'add': (0.000588, 4), 'branch': (0.000294, 4), 'imm_borrow_loc': (0.00022, 3), 'mut_borrow_loc': (0.00022, 3),
+    'lt': (0.000588, 3), 'imm_borrow_field': (0.000735, 2), 'vec_imm_borrow': (0.001213, 2),
+    'br_true': (0.000441, 2), 'pack': (0.001102, 2), 'vec_push_back': (0.001396, 2), 'mod': (0.000588, 2),
+    'imm_borrow_global': (0.001838, 1), 'write_ref': (0.000735, 1), 'vec_len': (0.000808, 1),
+    'vec_pack': (0.002205, 1), 'eq': (0.001487, 1), 'exists_generic': (0.000919, 1), 'mul': (0.000588, 1),
+    'vec_swap': (0.001102, 1), 'unpack': (0.001102, 1), 'cast_u64': (0.000441, 1), 'move_to': (0.001838, 1),
+}
+
+# Cost of the call and ret opcodes that open and close a function frame
+CALL_COST = 0.00441
+RET_COST = 0.00022
+
+# Callees of the synthetic traces, drawn from the framework and the benchmark module
+SYNTHETIC_CALLEES = [
+    '0x1::signer::address_of', '0x1::vector::length', '0x1::vector::borrow', '0x1::option::is_some',
+    '0x1::bcs::to_bytes', '0xc3c2..::opcode_benchmark::helper', '0xc3c2..::opcode_benchmark::vector_pop_front',
+]
+
+# Fixed parts of every synthetic transaction, as in the real reports
+INTRINSIC_GAS = 2.76
+MODULE_NAME = '0xc3c2..::opcode_benchmark'
+MODULE_SIZE_BYTES = 4010
+MODULE_GAS = 0.24288
+RESOURCE = '0xc3c2a87b98a4db2dec669637a27b8dbbd2e4982beadfc423ac35c9a8f1b9f19a::opcode_benchmark::Storage'
+STATE_READ_GAS = 0.302385
+STATE_WRITE_GAS = 0.09918
+STATE_WRITE_APT = 0.0004432
+
+# Probability of calling into a function at any opcode, and the deepest call nesting
+CALL_PROBABILITY = 0.06
+MAX_CALL_DEPTH = 6
+
+# Column at which the gas of a trace line starts
+TRACE_NAME_WIDTH = 127
+
+REPORT_HEAD = """<!-- Copyright © Aptos Foundation -->
+<!-- SPDX-License-Identifier: Apache-2.0 -->
+
+<!DOCTYPE html>
+<html lang="en">
+
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Gas Report - {title}</title>
+    <style>
+        body {{
+            background-color: white;
+            color: black;
+        }}
+
+        table,
+        th,
+        td {{
+            border: 1px solid black;
+        }}
+    </style>
+</head>
+
+<body onload="init();">
+    <header>
+        <h1>Gas Report - {title}</h1>
+    </header>
+
+    <section>
+        <h2>Flamegraphs</h2>
+        <object data="assets/exec_io.svg" type="image/svg+xml" class="flamegraph"></object>
+
+        <object data="assets/storage.svg" type="image/svg+xml" class="flamegraph"></object>
+    </section>
+"""
+
+def format_gas(gas):
+    """Format gas like the profiler: six decimals without trailing zeros"""
+    text = f'{gas:.6f}'.rstrip('0')
+    return text + '0' if text.endswith('.') else text
+
+def generate_trace(rng, length):
+    """Generate the body of an entry function with length opcodes
+
+    Returns [depth, name, gas] nodes in trace order, depth 0 being the entry
+    function's own lines; function frames carry the gas of everything below
+    them once generation ends.
+    """
+    opcodes = list(SYNTHETIC_OPCODES)
+    weights = [frequency for _, frequency in SYNTHETIC_OPCODES.values()]
+    nodes = []
+    frames = []
+    emitted = 0
+    while emitted < length:
+        if len(frames) < MAX_CALL_DEPTH and rng.random() < CALL_PROBABILITY:
+            nodes.append([len(frames), 'call', CALL_COST])
+            nodes.append([len(frames), rng.choice(SYNTHETIC_CALLEES), 0.0])
+            frames.append(len(nodes) - 1)
+            emitted += 1
+            continue
+        opcode = rng.choices(opcodes, weights)[0]
+        nodes.append([len(frames), opcode, SYNTHETIC_OPCODES[opcode][0]])
+        emitted += 1
+        # Return from the innermost function once it has done some work
+        if frames and rng.random() < 0.15:
+            nodes.append([len(frames), 'ret', RET_COST])
+            frames.pop()
+    while frames:
+        nodes.append([len(frames), 'ret', RET_COST])
+        frames.pop()
+    nodes.append([0, 'ret', RET_COST])
+
+    # Frame gas is inclusive: add every line to the frames enclosing it
+    open_frames = []
+    for i, node in enumerate(nodes):
+        del open_frames[node[0]:]
+        for frame in open_frames:
+            nodes[frame][2] += node[2]
+        if node[1] in SYNTHETIC_CALLEES:
+            open_frames.append(i)
+    return nodes
+
+def trace_line(depth, name, gas=None, total=None):
+    """Format one line of the Full Execution Trace"""
+    label = ' ' * (4 * depth) + html.escape(name)
+    if gas is None:
+        return label.ljust(TRACE_NAME_WIDTH)
+    return f"{label.ljust(max(TRACE_NAME_WIDTH, len(label) + 4))}{format_gas(gas):<12}{gas / total:.2%}"
+
+def table(headers, rows, header_cell='th', left_columns=1):
+    """Render a report table; the first left_columns columns are left aligned and the others right aligned"""
+    def row(cells, tag):
+        rendered = [f'<{tag}>{cell}</{tag}>' if i < left_columns
+                    else f'<{tag} style="text-align: right">{cell}</{tag}>' for i, cell in enumerate(cells)]
+        return '            <tr>\n' + ''.join(f'                {cell}\n' for cell in rendered) + '            </tr>\n'
+    return ('        <table>\n' + row([f'<b>{header}</b>' for header in headers], header_cell)
+            + ''.join(row(cells, 'td') for cells in rows) + '        </table>\n')
+
+def render_report(benchmark, nodes, reads, writes, module='opcode_benchmark'):
+    """Render a complete synthetic report around the trace of an entry function of module"""
+    opcode_gas = {}
+    for depth, name, gas in nodes:
+        if name not in SYNTHETIC_CALLEES:
+            hits, total = opcode_gas.get(name, (0, 0.0))
+            opcode_gas[name] = (hits + 1, total + gas)
+    execution_gas = sum(gas for _, gas in opcode_gas.values()) + reads * STATE_READ_GAS
+    transaction_gas = round(0.011 + 0.000004 * len(nodes), 6)
+    write_gas = writes * STATE_WRITE_GAS
+    total = INTRINSIC_GAS + MODULE_GAS + execution_gas + transaction_gas + write_gas
+
+    def pct(gas):
+        return f'{gas / total:.2%}'
+
+    entry = f'{MODULE_NAME}::{benchmark}'
+    load = f'load<{MODULE_NAME}::{RESOURCE}>'
+    trace = [trace_line(0, 'execution & IO (gas unit, full trace)', total, total),
+             trace_line(1, 'intrinsic', INTRINSIC_GAS, total),
+             trace_line(1, 'keyless'),
+             trace_line(1, 'dependencies', MODULE_GAS, total),
+             trace_line(2, MODULE_NAME, MODULE_GAS, total),
+             trace_line(1, entry, execution_gas, total)]
+    trace.extend(trace_line(2, load, STATE_READ_GAS, total) for _ in range(reads))
+    trace.extend(trace_line(depth + 2, name, gas, total) for depth, name, gas in nodes)
+    trace += [trace_line(1, 'ledger writes', transaction_gas + write_gas, total),
+              trace_line(2, 'transaction', transaction_gas, total),
+              trace_line(2, 'events')]
+    if writes:
+        trace.append(trace_line(2, 'state write ops', write_gas, total))
+        trace.append(trace_line(3, f'create<{MODULE_NAME}::{RESOURCE}>', write_gas, total))
+    else:
+        trace.append(trace_line(2, 'state write ops'))
+
+    execution_rows = [[name, hits, format_gas(gas), pct(gas)]
+                      for name, (hits, gas) in sorted(opcode_gas.items(), key=lambda item: -item[1][1])]
+    parts = [
+        REPORT_HEAD.format(title=f'0xc3c2-{module}-{benchmark}'),
+        '\n    <section>\n        <h2>Cost Break-down</h2>\n        <h3> Execution & IO</h3>\n',
+        f'        <h4>Intrinsic Cost</h4>\n        {format_gas(INTRINSIC_GAS)} gas units\n'
+        f'        , {pct(INTRINSIC_GAS)} of the total cost for execution & IO.\n\n',
+        '        <h4>Dependencies</h4>\n',
+        table(['Name', 'Size in Bytes', 'Cost in Gas Units', 'Percentage'],
+              [[MODULE_NAME, MODULE_SIZE_BYTES, format_gas(MODULE_GAS), pct(MODULE_GAS)]]),
+        '        <h4>Execution</h4>\n',
+        table(['Operation', 'Number of Hits', 'Cost in Gas Units', 'Percentage'], execution_rows),
+        '        <h4>State Reads</h4>\n',
+        table(['Resource Name', 'Number of Hits', 'Cost in Gas Units', 'Percentage'],
+              [[RESOURCE, reads, format_gas(reads * STATE_READ_GAS), pct(reads * STATE_READ_GAS)]] if reads else [],
+              'td'),
+        '        <h4>Ledger Writes</h4>\n        <h5>Transaction Itself</h5>\n',
+        table(['Cost in Gas Units', 'Percentage'], [[format_gas(transaction_gas), pct(transaction_gas)]], 'td', 0),
+        '        <h5>Events</h5>\n        (No writes to show.)\n        <h5>State Write Ops</h5>\n',
+        table(['Resource Name', 'Number of Hits', 'Cost in Gas Units', 'Percentage'],
+              [[RESOURCE, writes, format_gas(write_gas), pct(write_gas)]], 'td') if writes
+        else '        (No writes to show.)\n',
+        '        <h3>Storage</h3>\n        <h4>Transaction</h4>\n        0 APT\n'
+        '        , 0.00% of the total cost for storage.\n        <h4>States</h4>\n',
+        table(['Path', 'Cost in APT', 'Percentage', 'Refund in APT', 'Percentage'],
+              [[f'{MODULE_NAME}::{RESOURCE}', STATE_WRITE_APT, '100.00%', '/', '/']], 'td') if writes
+        else '        (No states to show.)\n',
+        '        <h4>Events</h4>\n        (No events to show.)\n    </section>\n\n',
+        '    <section>\n        <h2>Full Execution Trace</h2>\n        <div>\n'
+        '            <pre style="display: inline-block; border:1px solid black; padding: 2px;"><code>',
+        '\n'.join(trace),
+        '\n</code></pre>\n        </div>\n    </section>\n\n    <footer>\n'
+        '        <p>Generated by the Aptos Gas Profiler</p>\n    </footer>\n</body>\n\n</html>\n',
+    ]
+    return ''.join(parts)
+
+def write_synthetic_reports(output_dir, reports=100, benchmarks=20, trace_length=60, seed=0):
+    """Write synthetic txn-*/index.html reports and return their directories
+
+    Reports are spread round-robin over benchmarks named
+    benchmark_synthetic_NNN. Every benchmark has its own fixed trace of about
+    trace_length opcodes, so its repeated reports are identical like repeated
+    runs of a real transaction, and the output is the same for the same seed.
+    """
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    names = [f'benchmark_synthetic_{i:03d}' for i in range(max(1, benchmarks))]
+
+    rendered = {}
+    report_dirs = []
+    for i in range(reports):
+        benchmark = names[i % len(names)]
+        if benchmark not in rendered:
+            benchmark_rng = random.Random(f'{seed}-{benchmark}')
+            length = max(1, int(trace_length * benchmark_rng.uniform(0.5, 1.5)))
+            rendered[benchmark] = render_report(benchmark, generate_trace(benchmark_rng, length),
+                                                reads=benchmark_rng.randint(0, 2), writes=benchmark_rng.randint(0, 1))
+        report_dir = output_dir / f'txn-{rng.getrandbits(32):08x}-0xc3c2-opcode_benchmark-{benchmark}'
+        report_dir.mkdir(exist_ok=True)
+        (report_dir / 'index.html').write_text(rendered[benchmark])
+        report_dirs.append(report_dir)
+    return report_dirs
+
+if __name__ == "__main__":
+    arg_parser = argparse.ArgumentParser(description='Write synthetic Aptos gas profiling reports')
+    arg_parser.add_argument('output_dir', nargs='?', default='gas-profiling',
+                            help='Directory to write the txn-* reports to (default: gas-profiling)')
+    arg_parser.add_argument('--reports', type=int, default=100,
+                            help='Number of reports to write (default: 100)')
+    arg_parser.add_argument('--benchmarks', type=int, default=20,
+                            help='Number of distinct benchmarks the reports are spread over (default: 20)')
+    arg_parser.add_argument('--trace-length', type=int, default=60,
+                            help='Average number of opcodes in the trace of a benchmark (default: 60)')
+    arg_parser.add_argument('--seed', type=int, default=0,
+                            help='Seed of the generator; the same seed writes the same reports (default: 0)')
+    args = arg_parser.parse_args()
+    written = write_synthetic_reports(args.output_dir, args.reports, args.benchmarks, args.trace_length, args.seed)
+    print(f"{len(written)} synthetic reports written to {args.output_dir}")
@@ -0,0 +1,88 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+from pathlib import Path
+
+# inotify events of an entry created in or moved into the watched directory
+IN_CREATE = 0x100
+IN_MOVED_TO = 0x080
+
+# Header of an inotify event: watch descriptor, mask, cookie and length of the name that follows
+INOTIFY_EVENT = struct.Struct('iIII')
+
+def open_inotify(path):
+    """Return an inotify descriptor watching path for new entries, None where inotify is unavailable"""
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(path), IN_CREATE | IN_MOVED_TO) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+def parse_inotify_events(data):
+    """Return the entry names of a buffer of inotify events"""
+    names = []
+    offset = 0
+    while offset + INOTIFY_EVENT.size <= len(data):
+        _, _, _, length = INOTIFY_EVENT.unpack_from(data, offset)
+        offset += INOTIFY_EVENT.size
+        name = data[offset:offset + length].rstrip(b'\0')
+        offset += length
+        if name:
+            names.append(os.fsdecode(name))
+    return names
+
+class DirectoryWatcher:
+    """Report entries created in or moved into a directory
+
+    Uses inotify where the C library provides it, so waiting costs nothing
+    until an entry arrives; otherwise, or with polling set, the directory
+    listing is compared every wait.
+    """
+
+    def __init__(self, path, polling=False):
+        self.path = Path(path)
+        self.fd = None if polling else open_inotify(self.path)
+        self.known = set(os.listdir(self.path)) if self.fd is None else None
+
+    @property
+    def mode(self):
+        """'inotify' or 'polling'"""
+        return 'polling' if self.fd is None else 'inotify'
+
+    def wait(self, timeout):
+        """Wait up to timeout seconds and return the names of the entries that arrived"""
+        if self.fd is None:
+            time.sleep(timeout)
+            names = set(os.listdir(self.path))
+            arrived = names - self.known
+            self.known = names
+            return sorted(arrived)
+
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return []
+        names = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            names.extend(parse_inotify_events(data))
+        return names
+
+    def close(self):
+        """Stop watching"""
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None